@@ -0,0 +1,56 @@
+-- Consultas representativas da tabela vendas (notebook de análise e dashboards).
+-- Usadas por src/consumer/indices_tabela.py para escolher os índices da tabela.
+-- Separe as consultas com ';'.
+
+SELECT categoria, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total, AVG(valor_total) AS valor_medio, SUM(quantidade) AS quantidade_total
+FROM vendas
+GROUP BY categoria
+ORDER BY valor_total DESC;
+
+SELECT DATETRUNC('MINUTE', fromEpochMillis(timestamp)) AS minuto, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total
+FROM vendas
+WHERE timestamp > 1700000000000
+GROUP BY DATETRUNC('MINUTE', fromEpochMillis(timestamp))
+ORDER BY minuto ASC;
+
+SELECT estado, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total, AVG(valor_total) AS valor_medio
+FROM vendas
+GROUP BY estado
+ORDER BY valor_total DESC;
+
+SELECT cidade, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total, AVG(valor_total) AS valor_medio
+FROM vendas
+GROUP BY cidade
+ORDER BY valor_total DESC
+LIMIT 10;
+
+SELECT forma_pagamento, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total, AVG(valor_total) AS valor_medio
+FROM vendas
+GROUP BY forma_pagamento
+ORDER BY valor_total DESC;
+
+SELECT categoria, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total
+FROM vendas
+WHERE timestamp > 1700000000000
+GROUP BY categoria
+ORDER BY valor_total DESC;
+
+SELECT produto, categoria, COUNT(*) AS num_vendas, SUM(quantidade) AS quantidade_total, SUM(valor_total) AS valor_total
+FROM vendas
+GROUP BY produto, categoria
+ORDER BY quantidade_total DESC
+LIMIT 5;
+
+SELECT HOUR(fromEpochMillis(timestamp)) AS hora, COUNT(*) AS num_vendas, AVG(valor_total) AS valor_medio, SUM(valor_total) AS valor_total
+FROM vendas
+GROUP BY HOUR(fromEpochMillis(timestamp))
+ORDER BY hora ASC;
+
+SELECT categoria, forma_pagamento, COUNT(*) AS num_vendas, SUM(valor_total) AS valor_total
+FROM vendas
+GROUP BY categoria, forma_pagamento
+ORDER BY categoria, valor_total DESC;
+
+SELECT COUNT(*) FROM vendas;
+
+SELECT * FROM vendas WHERE id_venda = '00000000-0000-0000-0000-000000000000';
@@ -0,0 +1 @@
+"""Benchmarks do gerador, dos serializadores e do consumidor com um Kafka em memória."""
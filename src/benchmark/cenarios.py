@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cenários de benchmark do pipeline de vendas sobre o Kafka em memória.
+
+Cada cenário recebe a quantidade de registros e a duração das medições
+por tempo e retorna {caso: {métrica: valor}}. Métricas terminadas em _s
+(msgs_s, mb_s) são vazões, maiores são melhores; as demais (_us, _ms,
+bytes_msg) são custos, menores são melhores.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+import numpy as np
+
+# Diretórios src/, src/producer e src/consumer no path para importar os scripts
+DIRETORIO_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO_SRC)
+sys.path.insert(0, os.path.join(DIRETORIO_SRC, 'producer'))
+sys.path.insert(0, os.path.join(DIRETORIO_SRC, 'consumer'))
+
+import data_generator
+import kafka_consumer
+from data_generator import gerar_venda, gerar_vendas_lote, lote_para_registros, executar_carga
+from kafka_consumer import consumir_um_lote, TAMANHO_LOTE, LATENCIA_MAX_MS
+from gerenciador_commits import GerenciadorCommits
+from agregacao_janelas import AgregacaoStreaming
+from pipeline_transacional import PipelineTransacional
+from schemas.serializadores import SERIALIZADORES, obter_serializador
+from schemas.validacao import compilar_validador, separar_invalidas, TOLERANCIA_VALOR
+from schemas.vendas import carregar_definicao, TIPOS_PYTHON
+from schemas.dominios import valores_dimensoes
+from benchmark.kafka_falso import BrokerFalso, ProdutorFalso, ConsumidorFalso
+
+# Configurações dos cenários
+TAMANHOS_LOTE_BENCHMARK = [int(t) for t in os.environ.get('TAMANHOS_LOTE_BENCHMARK', '1,10,100,500,2000').split(',')]
+TAMANHOS_TRANSACAO_BENCHMARK = [int(t) for t in os.environ.get('TAMANHOS_TRANSACAO_BENCHMARK',
+                                                               '100,1000,10000,50000').split(',')]
+LATENCIA_TRANSACAO_BENCHMARK_MS = float(os.environ.get('LATENCIA_TRANSACAO_BENCHMARK_MS', '10'))  # Custo de um commit
+TAXA_PONTA_A_PONTA = float(os.environ.get('TAXA_PONTA_A_PONTA', '20000'))  # msgs/s; 0 = máximo possível
+SEMENTE = 42
+FRACAO_INVALIDAS_BENCHMARK = 0.01  # Vendas inválidas no cenário de validação
+
+def _vendas(registros):
+    """Vendas reprodutíveis geradas em lote"""
+    rng = np.random.default_rng(SEMENTE)
+    vendas = []
+    for lote in gerar_vendas_lote(registros, rng=rng):
+        vendas.extend(lote_para_registros(lote))
+    return vendas
+
+def _por_registro_us(inicio, registros):
+    return (time.perf_counter() - inicio) / max(registros, 1) * 1e6
+
+def geracao(registros, duracao):
+    """Vazão de gerar_venda(), da geração em lote e de executar_carga() sobre o ProdutorFalso"""
+    resultados = {}
+
+    inicio = time.perf_counter()
+    for _ in range(registros):
+        gerar_venda()
+    custo = _por_registro_us(inicio, registros)
+    resultados["gerar_venda"] = {"registro_us": custo, "msgs_s": 1e6 / custo}
+
+    inicio = time.perf_counter()
+    for lote in gerar_vendas_lote(registros, rng=np.random.default_rng(SEMENTE)):
+        lote_para_registros(lote)
+    custo = _por_registro_us(inicio, registros)
+    resultados["gerar_vendas_lote"] = {"registro_us": custo, "msgs_s": 1e6 / custo}
+
+    produtor = ProdutorFalso(BrokerFalso())
+    totais = executar_carga(produtor, taxa=0, duracao=duracao, rng=np.random.default_rng(SEMENTE))
+    produtor.flush()
+    resultados["executar_carga"] = {
+        "msgs_s": totais["mensagens"] / totais["duracao_s"],
+        "mb_s": totais["bytes"] / totais["duracao_s"] / 1e6,
+    }
+    return resultados
+
+def serializacao(registros, duracao):
+    """Custo por mensagem e tamanho de cada formato, com json.dumps/loads de dict como referência"""
+    vendas = _vendas(registros)
+    resultados = {}
+
+    casos = [(nome, obter_serializador(nome).serializar, obter_serializador(nome).desserializar_venda)
+             for nome in SERIALIZADORES]
+    casos.append(("json_dict", lambda venda: json.dumps(venda._asdict()).encode('utf-8'), json.loads))
+    compacto = obter_serializador('compacto')
+    casos.append(("compacto_codificada", compacto.serializar, compacto.desserializar_codificada))
+
+    for nome, serializar, desserializar in casos:
+        inicio = time.perf_counter()
+        mensagens = [serializar(venda) for venda in vendas]
+        custo_serializar = _por_registro_us(inicio, registros)
+
+        inicio = time.perf_counter()
+        for mensagem in mensagens:
+            desserializar(mensagem)
+        custo_desserializar = _por_registro_us(inicio, registros)
+
+        resultados[nome] = {
+            "serializar_us": custo_serializar,
+            "desserializar_us": custo_desserializar,
+            "bytes_msg": sum(map(len, mensagens)) / len(mensagens),
+            "msgs_s": 1e6 / (custo_serializar + custo_desserializar),
+        }
+    return resultados
+
+def _carregar_topico(broker, topico, registros):
+    """Grava registros vendas serializadas no tópico, como o produtor faria"""
+    serializador = obter_serializador()
+    produtor = ProdutorFalso(broker, fila_max=registros + 1)
+    for venda in _vendas(registros):
+        produtor.produce(topico, key=venda.id_venda.encode('utf-8'), value=serializador.serializar(venda))
+    produtor.flush()
+
+def _criar_consumidor(broker, topico):
+    gerenciador = GerenciadorCommits()
+    consumidor = ConsumidorFalso(broker, gerenciador.config_consumidor())
+    gerenciador.vincular(consumidor)
+    consumidor.subscribe([topico], on_revoke=gerenciador.ao_revogar)
+    return consumidor, gerenciador
+
+def lotes_consumidor(registros, duracao):
+    """Vazão de consumir_um_lote() (consume, decodificação, processar_lote e commits) por tamanho de lote"""
+    broker = BrokerFalso()
+    topico = kafka_consumer.KAFKA_TOPIC
+    _carregar_topico(broker, topico, registros)
+    serializador = obter_serializador()
+    resultados = {}
+
+    for tamanho in TAMANHOS_LOTE_BENCHMARK:
+        consumidor, gerenciador = _criar_consumidor(broker, topico)
+        processadas = lotes = 0
+        inicio = time.perf_counter()
+        while processadas < registros:
+            processadas += consumir_um_lote(consumidor, serializador, tamanho, 0, gerenciador)
+            lotes += 1
+        gerenciador.commit_final()
+        decorrido = time.perf_counter() - inicio
+        consumidor.close()
+        resultados[f"lote_{tamanho}"] = {
+            "msgs_s": processadas / decorrido,
+            "lote_us": decorrido / lotes * 1e6,
+            "commits": gerenciador.commits_assincronos + gerenciador.commits_sincronos,
+        }
+    return resultados
+
+def ponta_a_ponta(registros, duracao):
+    """
+    executar_carga() em uma thread e o loop de consumo em lote na principal.
+
+    A latência vai do produce() ao fim do processamento do lote que contém a
+    mensagem. A taxa é limitada (TAXA_PONTA_A_PONTA) para que a latência
+    reflita o pipeline e não uma fila crescendo sem limite.
+    """
+    broker = BrokerFalso()
+    topico = data_generator.KAFKA_TOPIC
+    consumidor, gerenciador = _criar_consumidor(broker, topico)
+    serializador = obter_serializador()
+    produtor = ProdutorFalso(broker)
+    totais = {}
+
+    def produzir():
+        totais.update(executar_carga(produtor, taxa=TAXA_PONTA_A_PONTA, duracao=duracao,
+                                     rng=np.random.default_rng(SEMENTE)))
+        produtor.flush()
+
+    thread = threading.Thread(target=produzir, name="produtor-benchmark")
+    latencias = []
+    processadas = 0
+    inicio = time.perf_counter()
+    thread.start()
+    while thread.is_alive() or processadas < broker.total(topico):
+        processadas += consumir_um_lote(consumidor, serializador, TAMANHO_LOTE, LATENCIA_MAX_MS, gerenciador)
+        fim = time.perf_counter()
+        latencias.extend(fim - msg.criada for msg in consumidor.ultimo_lote)
+    decorrido = time.perf_counter() - inicio
+    thread.join()
+    gerenciador.commit_final()
+    consumidor.close()
+
+    latencias_ms = np.array(latencias) * 1000
+    return {
+        f"taxa_{TAXA_PONTA_A_PONTA:.0f}": {
+            "msgs_s": processadas / decorrido,
+            "produzidas_msgs_s": totais.get("mensagens", 0) / totais.get("duracao_s", 1),
+            "latencia_p50_ms": float(np.percentile(latencias_ms, 50)) if len(latencias_ms) else 0.0,
+            "latencia_p99_ms": float(np.percentile(latencias_ms, 99)) if len(latencias_ms) else 0.0,
+            "latencia_max_ms": float(latencias_ms.max()) if len(latencias_ms) else 0.0,
+        }
+    }
+
+def transacoes(registros, duracao):
+    """
+    Vazão do pipeline transacional (validação, enriquecimento, produce e commits) por tamanho de transação.
+
+    Cada commit de transação custa LATENCIA_TRANSACAO_BENCHMARK_MS no ProdutorFalso,
+    o que aproxima as idas ao coordenador de transações de um broker real.
+    """
+    broker = BrokerFalso()
+    topico = kafka_consumer.KAFKA_TOPIC
+    _carregar_topico(broker, topico, registros)
+    resultados = {}
+
+    for tamanho in TAMANHOS_TRANSACAO_BENCHMARK:
+        consumidor = ConsumidorFalso(broker, {'enable.auto.commit': False})
+        consumidor.subscribe([topico])
+        produtor = ProdutorFalso(broker, latencia_transacao_ms=LATENCIA_TRANSACAO_BENCHMARK_MS)
+        pipeline = PipelineTransacional(consumidor, produtor, topico_saida=f"vendas-curadas-{tamanho}",
+                                        transacao_msgs=tamanho, transacao_intervalo_ms=3600000)
+        pipeline.iniciar()
+        inicio = time.perf_counter()
+        while True:
+            mensagens = consumidor.consume(num_messages=min(TAMANHO_LOTE, tamanho), timeout=0)
+            if not mensagens:
+                break
+            pipeline.processar(mensagens)
+            pipeline.talvez_confirmar()
+        pipeline.confirmar()
+        decorrido = time.perf_counter() - inicio
+        consumidor.close()
+        estatisticas = pipeline.estatisticas()
+        resultados[f"transacao_{tamanho}"] = {
+            "msgs_s": estatisticas["consumidas"] / decorrido,
+            "transacoes": estatisticas["transacoes"],
+            "commit_ms": estatisticas["commit_medio_ms"],
+        }
+    return resultados
+
+def agregacao_dimensoes(registros, duracao):
+    """
+    Decodificação + agregação em janelas por lote: vendas por extenso (json, avro)
+    contra os códigos do dicionário (compacto), em lotes de TAMANHO_LOTE.
+    """
+    vendas = _vendas(registros)
+    resultados = {}
+    casos = [("json", False), ("avro", False), ("compacto", False), ("compacto_codificada", True)]
+    for nome, codificados in casos:
+        serializador = obter_serializador(nome.split('_')[0])
+        desserializar = serializador.desserializar_codificada if codificados else serializador.desserializar_venda
+        mensagens = [serializador.serializar(venda) for venda in vendas]
+        agregacao = AgregacaoStreaming(dicionario=serializador.dicionario if codificados else None)
+        inicio = time.perf_counter()
+        for i in range(0, registros, TAMANHO_LOTE):
+            lote = [desserializar(mensagem) for mensagem in mensagens[i:i + TAMANHO_LOTE]]
+            agregacao.registrar_lote(lote, codificados)
+        custo = _por_registro_us(inicio, registros)
+        resultados[nome] = {"registro_us": custo, "msgs_s": 1e6 / custo}
+    return resultados
+
+def _validador_interpretado():
+    """Referência: percorre a definição a cada venda, com isinstance e dicts"""
+    campos = carregar_definicao()["fields"]
+    dominios = {nome: set(valores) for nome, valores in valores_dimensoes().items()}
+
+    def validar(venda):
+        registro = venda._asdict()
+        for campo in campos:
+            nome, valor, regras = campo["name"], registro[campo["name"]], campo.get("validacao", {})
+            tipo = TIPOS_PYTHON[campo["type"]]
+            if isinstance(valor, bool) or not isinstance(valor, (int, float) if tipo is float else tipo):
+                return f"tipo:{nome}"
+            if regras.get("positivo") and not valor > 0:
+                return f"positivo:{nome}"
+            if "minimo" in regras and not valor >= regras["minimo"]:
+                return f"minimo:{nome}"
+            if "dominio" in regras and valor not in dominios[regras["dominio"]]:
+                return f"dominio:{nome}"
+            if "produto_de" in regras:
+                esperado = registro[regras["produto_de"][0]] * registro[regras["produto_de"][1]]
+                if abs(valor - esperado) > TOLERANCIA_VALOR:
+                    return f"produto_de:{nome}"
+        return None
+    return validar
+
+def validacao(registros, duracao):
+    """
+    Vazão da validação de lotes com FRACAO_INVALIDAS_BENCHMARK de vendas inválidas:
+    validador compilado (Venda e VendaCodificada) contra a referência interpretada.
+    """
+    rng = np.random.default_rng(SEMENTE)
+    vendas = [venda._replace(valor_total=-venda.valor_total) if invalida else venda
+              for venda, invalida in zip(_vendas(registros), rng.random(registros) < FRACAO_INVALIDAS_BENCHMARK)]
+    compacto = obter_serializador('compacto')
+    codificadas = [compacto.desserializar_codificada(compacto.serializar(venda)) for venda in vendas]
+    casos = [
+        ("interpretado", vendas, _validador_interpretado()),
+        ("compilado", vendas, compilar_validador()),
+        ("compilado_codificada", codificadas, compilar_validador(dicionario=compacto.dicionario)),
+    ]
+    resultados = {}
+    for nome, lote, validar in casos:
+        invalidas = 0
+        inicio = time.perf_counter()
+        for i in range(0, registros, TAMANHO_LOTE):
+            invalidas += len(separar_invalidas(lote[i:i + TAMANHO_LOTE], validar)[1])
+        custo = _por_registro_us(inicio, registros)
+        resultados[nome] = {"registro_us": custo, "msgs_s": 1e6 / custo, "invalidas": invalidas}
+    return resultados
+
+# Cenários na ordem de execução
+CENARIOS = {
+    "geracao": geracao,
+    "serializacao": serializacao,
+    "agregacao_dimensoes": agregacao_dimensoes,
+    "validacao": validacao,
+    "lotes_consumidor": lotes_consumidor,
+    "ponta_a_ponta": ponta_a_ponta,
+    "transacoes": transacoes,
+}
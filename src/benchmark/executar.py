@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Executa os cenários de benchmark e grava os resultados em JSON.
+
+O arquivo de resultados leva o commit (git describe --always --dirty), a
+versão do Python e a máquina, e pode ser comparado com o de outro commit
+com --comparar.
+
+Uso:
+    python src/benchmark/executar.py [--cenarios geracao,serializacao] [--registros 50000]
+                                     [--duracao 3] [--saida arquivo.json] [--comparar base.json]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+
+# Diretório src/ no path para importar o pacote benchmark
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark.cenarios import CENARIOS
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DIRETORIO_RESULTADOS = os.path.join(RAIZ_PROJETO, 'data', 'benchmark')
+
+logger = logging.getLogger(__name__)
+
+def versao_codigo():
+    """Commit atual (com -dirty se houver alterações locais) ou 'desconhecido'"""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RAIZ_PROJETO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+def executar(nomes, registros, duracao):
+    """Executa os cenários pedidos e retorna o documento de resultados"""
+    resultados = {}
+    for nome in nomes:
+        print(f"Executando cenário {nome}...", file=sys.stderr)
+        resultados[nome] = CENARIOS[nome](registros, duracao)
+    return {
+        "metadados": {
+            "commit": versao_codigo(),
+            "data_hora": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+            "registros": registros,
+            "duracao_s": duracao,
+        },
+        "resultados": resultados,
+    }
+
+def imprimir(documento):
+    print(f"Commit {documento['metadados']['commit']}")
+    for cenario, casos in documento["resultados"].items():
+        for caso, metricas in casos.items():
+            valores = ", ".join(f"{metrica}={valor:,.2f}" for metrica, valor in metricas.items())
+            print(f"  {cenario}/{caso}: {valores}")
+
+def comparar(base, atual):
+    """Imprime a variação percentual de cada métrica presente nos dois resultados"""
+    print(f"\nComparação {base['metadados']['commit']} -> {atual['metadados']['commit']}")
+    print(f"{'métrica':<55}{'base':>14}{'atual':>14}{'variação':>10}")
+    for cenario, casos in atual["resultados"].items():
+        for caso, metricas in casos.items():
+            anteriores = base["resultados"].get(cenario, {}).get(caso, {})
+            for metrica, valor in metricas.items():
+                if metrica not in anteriores:
+                    continue
+                anterior = anteriores[metrica]
+                variacao = f"{(valor - anterior) / anterior * 100:+.1f}%" if anterior else "-"
+                print(f"{cenario + '/' + caso + '/' + metrica:<55}{anterior:>14,.2f}{valor:>14,.2f}{variacao:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de vendas com Kafka em memória")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS),
+                        help=f"Cenários separados por vírgula ({', '.join(CENARIOS)})")
+    parser.add_argument("--registros", type=int, default=50000, help="Registros por medição")
+    parser.add_argument("--duracao", type=float, default=3.0, help="Duração das medições por tempo (s)")
+    parser.add_argument("--saida", help="Arquivo de resultados (padrão: data/benchmark/<commit>.json)")
+    parser.add_argument("--comparar", help="Resultados anteriores para comparar")
+    parser.add_argument("--verboso", action="store_true", help="Mantém os logs dos scripts medidos")
+    args = parser.parse_args()
+
+    nomes = [n for n in args.cenarios.split(",") if n]
+    desconhecidos = [n for n in nomes if n not in CENARIOS]
+    if desconhecidos:
+        parser.error(f"Cenários desconhecidos: {', '.join(desconhecidos)}")
+
+    # Os logs por intervalo dos scripts distorceriam a medição
+    if not args.verboso:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    documento = executar(nomes, args.registros, args.duracao)
+    imprimir(documento)
+
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, f"{documento['metadados']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(json.load(f), documento)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kafka em memória para benchmarks.
+
+ProdutorFalso e ConsumidorFalso implementam a parte da API do
+confluent_kafka usada pelos scripts (produce/poll/flush, transações,
+subscribe/consume/poll/commit/seek/pause/resume/close) sobre um BrokerFalso
+compartilhado, sem rede nem serialização extra. Assim o custo medido é só o
+do código do projeto.
+
+Cada MensagemFalsa guarda o instante (perf_counter) em que foi produzida,
+para medir a latência de ponta a ponta no consumidor.
+"""
+
+import time
+import zlib
+import threading
+from collections import deque
+
+from confluent_kafka import TopicPartition, KafkaError, KafkaException, TIMESTAMP_CREATE_TIME
+
+PARTICOES_PADRAO = 3
+FILA_MAX_PADRAO = 100000  # Equivalente a queue.buffering.max.messages
+
+class MensagemFalsa:
+    """Mensagem com a mesma interface de confluent_kafka.Message"""
+
+    __slots__ = ('_topico', '_particao', '_offset', '_chave', '_valor', '_timestamp', '_headers', 'criada')
+
+    def __init__(self, topico, particao, chave, valor, headers=None, timestamp=None):
+        self._topico = topico
+        self._particao = particao
+        self._offset = -1
+        self._chave = chave
+        self._valor = valor
+        self._headers = headers
+        self._timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+        self.criada = time.perf_counter()
+
+    def topic(self):
+        return self._topico
+
+    def partition(self):
+        return self._particao
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._chave
+
+    def value(self):
+        return self._valor
+
+    def headers(self):
+        return self._headers
+
+    def timestamp(self):
+        return TIMESTAMP_CREATE_TIME, self._timestamp
+
+    def error(self):
+        return None
+
+    def latency(self):
+        return time.perf_counter() - self.criada
+
+    def __len__(self):
+        return len(self._valor) if self._valor is not None else 0
+
+class BrokerFalso:
+    """
+    Tópicos e partições em memória, compartilhados entre produtores e consumidores.
+
+    Args:
+        particoes (int): Partições criadas para cada tópico novo
+    """
+
+    def __init__(self, particoes=PARTICOES_PADRAO):
+        self.particoes = particoes
+        self.topicos = {}  # tópico -> [lista de mensagens por partição]
+        self.condicao = threading.Condition()
+
+    def particoes_do_topico(self, topico):
+        """Partições do tópico, criando-o se não existir"""
+        particoes = self.topicos.get(topico)
+        if particoes is None:
+            particoes = self.topicos.setdefault(topico, [[] for _ in range(self.particoes)])
+        return particoes
+
+    def anexar(self, mensagem):
+        """Grava a mensagem no fim da partição e acorda consumidores em espera"""
+        with self.condicao:
+            log = self.particoes_do_topico(mensagem._topico)[mensagem._particao]
+            mensagem._offset = len(log)
+            log.append(mensagem)
+            self.condicao.notify_all()
+
+    def total(self, topico):
+        """Quantidade de mensagens gravadas no tópico"""
+        return sum(len(log) for log in self.topicos.get(topico, []))
+
+class ProdutorFalso:
+    """
+    Produtor em memória com a interface de confluent_kafka.Producer.
+
+    As mensagens ficam visíveis no broker assim que produzidas; os callbacks
+    de entrega são chamados em poll()/flush(), como no librdkafka. Com mais
+    de fila_max entregas pendentes, produce() levanta BufferError.
+
+    Dentro de uma transação as mensagens só são gravadas no broker (e os
+    offsets enviados com send_offsets_to_transaction só são confirmados no
+    consumidor) em commit_transaction(), como um consumidor read_committed as
+    veria; latencia_transacao_ms simula a ida ao coordenador de transações.
+    """
+
+    def __init__(self, broker, fila_max=FILA_MAX_PADRAO, latencia_transacao_ms=0):
+        self.broker = broker
+        self.fila_max = fila_max
+        self.latencia_transacao_s = latencia_transacao_ms / 1000.0
+        self._entregas = deque()
+        self.produzidas = 0
+        self._transacional = False
+        self._transacao = None  # mensagens da transação aberta
+        self._offsets_transacao = []  # (consumidor, offsets)
+        self.transacoes_confirmadas = 0
+        self.transacoes_abortadas = 0
+
+    def produce(self, topic, value=None, key=None, partition=-1, on_delivery=None, callback=None,
+                timestamp=0, headers=None):
+        if len(self._entregas) >= self.fila_max:
+            raise BufferError("Local: Queue full")
+        if partition is None or partition < 0:
+            num_particoes = len(self.broker.particoes_do_topico(topic))
+            partition = zlib.crc32(key) % num_particoes if key else self.produzidas % num_particoes
+        mensagem = MensagemFalsa(topic, partition, key, value, headers, timestamp or None)
+        if self._transacao is not None:
+            self._transacao.append(mensagem)
+        elif self._transacional:
+            raise KafkaException(KafkaError(KafkaError._STATE, "Operation not valid in state Ready"))
+        else:
+            self.broker.anexar(mensagem)
+        self.produzidas += 1
+        self._entregas.append((callback or on_delivery, mensagem))
+
+    def poll(self, timeout=None):
+        """Chama os callbacks de entrega pendentes e retorna quantos foram chamados"""
+        entregas = self._entregas
+        chamados = 0
+        while entregas:
+            callback, mensagem = entregas.popleft()
+            if callback is not None:
+                callback(None, mensagem)
+            chamados += 1
+        return chamados
+
+    def flush(self, timeout=None):
+        self.poll(0)
+        return 0
+
+    def init_transactions(self, timeout=None):
+        self._transacional = True
+
+    def begin_transaction(self):
+        if not self._transacional or self._transacao is not None:
+            raise KafkaException(KafkaError(KafkaError._STATE, "Operation not valid in current state"))
+        self._transacao = []
+        self._offsets_transacao = []
+
+    def send_offsets_to_transaction(self, positions, group_metadata, timeout=None):
+        if self._transacao is None:
+            raise KafkaException(KafkaError(KafkaError._STATE, "No transaction in progress"))
+        self._offsets_transacao.append((group_metadata, list(positions)))
+
+    def commit_transaction(self, timeout=None):
+        if self._transacao is None:
+            raise KafkaException(KafkaError(KafkaError._STATE, "No transaction in progress"))
+        self.poll(0)
+        if self.latencia_transacao_s:
+            time.sleep(self.latencia_transacao_s)
+        for mensagem in self._transacao:
+            self.broker.anexar(mensagem)
+        for consumidor, offsets in self._offsets_transacao:
+            for p in offsets:
+                consumidor.confirmados[(p.topic, p.partition)] = p.offset
+        self._transacao = None
+        self.transacoes_confirmadas += 1
+
+    def abort_transaction(self, timeout=None):
+        if self._transacao is None:
+            raise KafkaException(KafkaError(KafkaError._STATE, "No transaction in progress"))
+        self.poll(0)
+        self._transacao = None
+        self._offsets_transacao = []
+        self.transacoes_abortadas += 1
+
+    def __len__(self):
+        return len(self._entregas)
+
+class ConsumidorFalso:
+    """
+    Consumidor em memória com a interface de confluent_kafka.Consumer.
+
+    subscribe() atribui todas as partições dos tópicos a este consumidor.
+    O callback on_commit da configuração é chamado no poll()/consume()
+    seguinte a cada commit assíncrono, como no librdkafka. As mensagens da
+    última entrega ficam em ultimo_lote.
+
+    Args:
+        broker (BrokerFalso): Broker compartilhado
+        config (dict): Configuração no formato do Consumer ('on_commit' e
+            'auto.offset.reset' são usados)
+    """
+
+    def __init__(self, broker, config=None):
+        self.broker = broker
+        self.config = dict(config or {})
+        self._on_commit = self.config.get('on_commit')
+        self._inicio_no_fim = self.config.get('auto.offset.reset') == 'latest'
+        self._posicoes = {}  # (tópico, partição) -> próximo offset
+        self._pausadas = set()
+        self._on_revoke = None
+        self._commits_pendentes = deque()
+        self._proxima = 0  # rodízio entre partições
+        self.confirmados = {}
+        self.ultimo_lote = []
+
+    def subscribe(self, topics, on_assign=None, on_revoke=None, on_lost=None):
+        self._on_revoke = on_revoke
+        particoes = []
+        for topico in topics:
+            for particao, log in enumerate(self.broker.particoes_do_topico(topico)):
+                inicio = self.confirmados.get((topico, particao), len(log) if self._inicio_no_fim else 0)
+                particoes.append(TopicPartition(topico, particao, inicio))
+        self.assign(particoes)
+        if on_assign is not None:
+            on_assign(self, particoes)
+
+    def assign(self, partitions):
+        self._posicoes = {(p.topic, p.partition): max(p.offset, 0) for p in partitions}
+
+    def assignment(self):
+        return [TopicPartition(t, p) for t, p in self._posicoes]
+
+    def seek(self, partition):
+        self._posicoes[(partition.topic, partition.partition)] = max(partition.offset, 0)
+
+    def consumer_group_metadata(self):
+        """Identifica o grupo em send_offsets_to_transaction (aqui, o próprio consumidor)"""
+        return self
+
+    def pause(self, partitions):
+        self._pausadas.update((p.topic, p.partition) for p in partitions)
+
+    def resume(self, partitions):
+        self._pausadas.difference_update((p.topic, p.partition) for p in partitions)
+
+    def consume(self, num_messages=1, timeout=-1):
+        self._chamar_on_commit()
+        limite = None if timeout is None or timeout < 0 else time.monotonic() + timeout
+        with self.broker.condicao:
+            while True:
+                mensagens = self._coletar(num_messages)
+                if mensagens:
+                    break
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    break
+                self.broker.condicao.wait(restante)
+        self.ultimo_lote = mensagens
+        return mensagens
+
+    def poll(self, timeout=None):
+        mensagens = self.consume(1, -1 if timeout is None else timeout)
+        return mensagens[0] if mensagens else None
+
+    def commit(self, message=None, offsets=None, asynchronous=True):
+        if message is not None:
+            offsets = [TopicPartition(message.topic(), message.partition(), message.offset() + 1)]
+        elif offsets is None:
+            offsets = [TopicPartition(t, p, o) for (t, p), o in self._posicoes.items()]
+        for p in offsets:
+            self.confirmados[(p.topic, p.partition)] = p.offset
+        if asynchronous:
+            self._commits_pendentes.append(offsets)
+            return None
+        return offsets
+
+    def committed(self, partitions, timeout=None):
+        return [TopicPartition(p.topic, p.partition, self.confirmados.get((p.topic, p.partition), -1001))
+                for p in partitions]
+
+    def get_watermark_offsets(self, partition, timeout=None, cached=False):
+        log = self.broker.particoes_do_topico(partition.topic)[partition.partition]
+        return 0, len(log)
+
+    def close(self):
+        if self._on_revoke is not None and self._posicoes:
+            self._on_revoke(self, self.assignment())
+        self._chamar_on_commit()
+        self._posicoes = {}
+
+    def _coletar(self, num_messages):
+        """Lê até num_messages das partições não pausadas, em rodízio (chamar com a condição adquirida)"""
+        mensagens = []
+        chaves = [c for c in self._posicoes if c not in self._pausadas]
+        if not chaves:
+            return mensagens
+        topicos = self.broker.topicos
+        for i in range(len(chaves)):
+            chave = chaves[(self._proxima + i) % len(chaves)]
+            log = topicos[chave[0]][chave[1]]
+            posicao = self._posicoes[chave]
+            falta = num_messages - len(mensagens)
+            lidas = log[posicao:posicao + falta]
+            if lidas:
+                mensagens.extend(lidas)
+                self._posicoes[chave] = posicao + len(lidas)
+                if len(mensagens) >= num_messages:
+                    break
+        self._proxima += 1
+        return mensagens
+
+    def _chamar_on_commit(self):
+        while self._commits_pendentes:
+            offsets = self._commits_pendentes.popleft()
+            if self._on_commit is not None:
+                self._on_commit(None, offsets)
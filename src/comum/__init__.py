@@ -0,0 +1 @@
+"""Infraestrutura compartilhada pelos produtores, consumidores e conectores (métricas, logs)."""
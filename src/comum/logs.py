@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Configuração de logs compartilhada pelos scripts.
+
+Os registros são enfileirados por um QueueHandler e formatados e escritos
+por um QueueListener em uma thread de fundo, de modo que a thread de
+produção/consumo só paga o custo de criar o LogRecord. A mensagem é montada
+na thread de fundo: use formatação preguiçosa (logger.info("... %s", valor))
+nos caminhos quentes e não passe como argumento objetos que serão alterados
+logo em seguida.
+
+LOG_FORMATO=json escreve um objeto JSON por linha, incluindo os campos
+passados em extra={...}. LogAmostrado limita logs por mensagem a 1 a cada
+N chamadas e/ou a um máximo por segundo.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing.util
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Configurações dos logs
+LOG_NIVEL = os.environ.get('LOG_NIVEL', 'INFO').upper()
+LOG_FORMATO = os.environ.get('LOG_FORMATO', 'texto')  # 'texto' ou 'json'
+LOG_ASSINCRONO = os.environ.get('LOG_ASSINCRONO', 'true').lower() == 'true'
+LOG_MAX_POR_S = float(os.environ.get('LOG_MAX_POR_S', '10'))  # Logs por mensagem por segundo; 0 = sem limite
+
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos padrão do LogRecord; os demais vieram de extra={...}
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_lock = threading.Lock()
+
+class FormatadorJSON(logging.Formatter):
+    """Um objeto JSON por linha com data/hora, nível, logger, mensagem e campos extras"""
+
+    def format(self, record):
+        documento = {
+            "data_hora": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith('_'):
+                documento[chave] = valor
+        if record.exc_info:
+            documento["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(documento, ensure_ascii=False, default=str)
+
+class _QueueHandlerLocal(QueueHandler):
+    """
+    Enfileira o LogRecord sem formatá-lo.
+
+    QueueHandler.prepare() monta a mensagem na thread que loga (necessário só
+    quando a fila cruza processos); aqui a fila é local e a formatação fica
+    para o QueueListener.
+    """
+
+    def prepare(self, record):
+        return record
+
+def criar_formatador(formato=LOG_FORMATO):
+    if formato == 'json':
+        return FormatadorJSON()
+    return logging.Formatter(FORMATO_TEXTO)
+
+def configurar_logs(nivel=LOG_NIVEL, formato=LOG_FORMATO, assincrono=LOG_ASSINCRONO):
+    """
+    Configura o logger raiz do processo (substitui logging.basicConfig).
+
+    Chamadas repetidas (vários módulos importados no mesmo processo) não
+    alteram a configuração já feita.
+
+    Args:
+        nivel (str|int): Nível mínimo dos logs
+        formato (str): 'texto' ou 'json'
+        assincrono (bool): Escreve os logs em uma thread de fundo (QueueListener)
+    """
+    global _listener
+    raiz = logging.getLogger()
+    with _lock:
+        if getattr(raiz, '_logs_configurados', False):
+            return
+        raiz._logs_configurados = True
+
+        destino = logging.StreamHandler(sys.stderr)
+        destino.setFormatter(criar_formatador(formato))
+        raiz.setLevel(nivel)
+        if not assincrono:
+            raiz.addHandler(destino)
+            return
+
+        fila = queue.SimpleQueue()
+        raiz.addHandler(_QueueHandlerLocal(fila))
+        _listener = QueueListener(fila, destino, respect_handler_level=True)
+        _listener.start()
+        atexit.register(encerrar_logs)
+        # Processos filhos criados por fork (frota de produtores) herdam a fila, mas não a thread
+        os.register_at_fork(after_in_child=_reiniciar_listener)
+        multiprocessing.util.register_after_fork(fila, _finalizar_no_filho)
+
+def _reiniciar_listener():
+    global _listener
+    if _listener is not None:
+        _listener = QueueListener(_listener.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+def _finalizar_no_filho(_fila):
+    # multiprocessing encerra os filhos com os._exit, sem rodar o atexit
+    multiprocessing.util.Finalize(None, encerrar_logs, exitpriority=0)
+
+def encerrar_logs():
+    """Escreve os logs ainda na fila e para a thread de fundo"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+class LogAmostrado:
+    """
+    Logs por mensagem com amostragem e limite de taxa.
+
+    Emite 1 a cada `a_cada` chamadas e no máximo `max_por_s` por segundo; as
+    chamadas suprimidas pelo limite de taxa são contadas e informadas no
+    próximo log emitido. O nível é verificado antes de tudo, então chamadas
+    abaixo do nível configurado custam apenas uma comparação.
+
+    Args:
+        logger (logging.Logger): Logger de destino
+        a_cada (int): Emite uma a cada N chamadas
+        max_por_s (float): Máximo de logs emitidos por segundo; 0 = sem limite
+    """
+
+    def __init__(self, logger, a_cada=1, max_por_s=LOG_MAX_POR_S):
+        self.logger = logger
+        self.a_cada = max(1, a_cada)
+        self.max_por_s = max_por_s
+        self._chamadas = 0
+        self._segundo = 0
+        self._emitidas_segundo = 0
+        self.suprimidas = 0
+
+    def log(self, nivel, msg, *args):
+        if not self.logger.isEnabledFor(nivel):
+            return
+        self._chamadas += 1
+        if self._chamadas % self.a_cada:
+            return
+        if self.max_por_s > 0:
+            segundo = int(time.monotonic())
+            if segundo != self._segundo:
+                self._segundo = segundo
+                self._emitidas_segundo = 0
+            if self._emitidas_segundo >= self.max_por_s:
+                self.suprimidas += 1
+                return
+            self._emitidas_segundo += 1
+        if self.suprimidas:
+            msg = f"{msg} (+%d omitidas pelo limite de taxa)"
+            args = args + (self.suprimidas,)
+            self.suprimidas = 0
+        self.logger.log(nivel, msg, *args, stacklevel=3)
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Métricas no formato de texto do Prometheus, sem dependências externas.
+
+Contadores, medidores (gauges) e histogramas ficam em um registro por
+processo e são servidos em /metrics por um servidor HTTP em thread de fundo
+(METRICAS_PORTA; 0 desativa). Métricas com rótulos são acessadas por
+rotulado(...), que devolve a série daquela combinação de valores; nos
+caminhos quentes a série deve ser obtida uma vez e reutilizada.
+
+Exemplo:
+    ENVIADAS = contador('vendas_produzidas_total', 'Vendas enviadas ao produtor')
+    ENVIADAS.incrementar()
+    with histograma('lote_segundos', 'Tempo por lote', ['modo']).rotulado('lote').medir():
+        ...
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+logger = logging.getLogger(__name__)
+
+# Configurações do endpoint
+METRICAS_PORTA = int(os.environ.get('METRICAS_PORTA', '0'))  # 0 = endpoint desativado
+METRICAS_ENDERECO = os.environ.get('METRICAS_ENDERECO', '0.0.0.0')
+INTERVALO_LAG_S = float(os.environ.get('INTERVALO_LAG_S', '15'))  # Intervalo entre consultas de lag
+
+# Limites padrão dos histogramas, em segundos
+LIMITES_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _formatar_valor(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = list(zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class _Valor:
+    """Série de um contador ou medidor"""
+
+    __slots__ = ('valor', '_lock')
+
+    def __init__(self):
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def incrementar(self, valor=1):
+        with self._lock:
+            self.valor += valor
+
+    def definir(self, valor):
+        self.valor = valor
+
+class _Distribuicao:
+    """Série de um histograma: contagem por bucket, soma e total"""
+
+    __slots__ = ('limites', 'contagens', 'soma', 'total', '_lock')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # último bucket = +Inf
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        i = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            self.contagens[i] += 1
+            self.soma += valor
+            self.total += 1
+
+    @contextmanager
+    def medir(self):
+        """Observa o tempo de execução do bloco, em segundos"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio)
+
+class _Familia:
+    """Métrica com nome, ajuda e rótulos; cada combinação de valores é uma série"""
+
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def rotulado(self, *valores):
+        """Série da combinação de valores de rótulos (na ordem de rotulos)"""
+        if len(valores) != len(self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}, recebeu {valores}")
+        serie = self._series.get(valores)
+        if serie is None:
+            with self._lock:
+                serie = self._series.setdefault(valores, self._nova_serie())
+        return serie
+
+    def _nova_serie(self):
+        return _Valor()
+
+    def expor(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        for valores, serie in list(self._series.items()):
+            linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_formatar_valor(serie.valor)}")
+        return linhas
+
+class Contador(_Familia):
+    """Valor que só aumenta (mensagens, bytes, erros)"""
+
+    tipo = 'counter'
+
+    def incrementar(self, valor=1):
+        self.rotulado().incrementar(valor)
+
+class Medidor(_Familia):
+    """Valor que sobe e desce (lag, tamanho de fila)"""
+
+    tipo = 'gauge'
+
+    def definir(self, valor):
+        self.rotulado().definir(valor)
+
+    def incrementar(self, valor=1):
+        self.rotulado().incrementar(valor)
+
+class Histograma(_Familia):
+    """Distribuição de valores em buckets fixos (latências, tempos de processamento)"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), limites=LIMITES_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(sorted(limites))
+
+    def _nova_serie(self):
+        return _Distribuicao(self.limites)
+
+    def observar(self, valor):
+        self.rotulado().observar(valor)
+
+    def medir(self):
+        return self.rotulado().medir()
+
+    def expor(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        for valores, serie in list(self._series.items()):
+            with serie._lock:
+                contagens, soma, total = list(serie.contagens), serie.soma, serie.total
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float('inf'),), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, valores, ('le', _formatar_valor(limite)))
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, valores)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_valor(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+class Registro:
+    """Métricas de um processo, na ordem de criação"""
+
+    def __init__(self):
+        self._familias = {}
+        self._lock = threading.Lock()
+
+    def obter_ou_criar(self, classe, nome, ajuda, rotulos=(), **kwargs):
+        """
+        Retorna a métrica já registrada com o nome ou cria uma nova.
+
+        Módulos que declaram a mesma métrica (ex.: os dois consumidores)
+        compartilham a instância. Levanta ValueError se o tipo ou os rótulos
+        diferirem.
+        """
+        with self._lock:
+            familia = self._familias.get(nome)
+            if familia is None:
+                familia = self._familias[nome] = classe(nome, ajuda, rotulos, **kwargs)
+            elif type(familia) is not classe or familia.rotulos != tuple(rotulos):
+                raise ValueError(f"Métrica {nome} já registrada como {familia.tipo} com rótulos {familia.rotulos}")
+            return familia
+
+    def expor(self):
+        """Texto de todas as métricas no formato de exposição do Prometheus"""
+        with self._lock:
+            familias = list(self._familias.values())
+        linhas = []
+        for familia in familias:
+            linhas.extend(familia.expor())
+        return "\n".join(linhas) + "\n"
+
+# Registro padrão do processo
+REGISTRO = Registro()
+
+def contador(nome, ajuda, rotulos=(), registro=REGISTRO):
+    return registro.obter_ou_criar(Contador, nome, ajuda, rotulos)
+
+def medidor(nome, ajuda, rotulos=(), registro=REGISTRO):
+    return registro.obter_ou_criar(Medidor, nome, ajuda, rotulos)
+
+def histograma(nome, ajuda, rotulos=(), limites=LIMITES_PADRAO, registro=REGISTRO):
+    return registro.obter_ou_criar(Histograma, nome, ajuda, rotulos, limites=limites)
+
+def iniciar_servidor(porta=METRICAS_PORTA, endereco=METRICAS_ENDERECO, registro=REGISTRO):
+    """
+    Serve /metrics em uma thread de fundo.
+
+    Returns:
+        ThreadingHTTPServer: Servidor iniciado, ou None se porta for 0
+    """
+    if porta <= 0:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            corpo = registro.expor().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', TIPO_CONTEUDO)
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    logger.info(f"Métricas disponíveis em http://{endereco}:{porta}/metrics")
+    return servidor
+
+# Lag do consumidor, compartilhado pelos consumidores
+LAG_CONSUMIDOR = medidor('kafka_consumidor_lag_mensagens',
+                         'Mensagens entre o último offset confirmado e o fim da partição',
+                         ['topico', 'particao'])
+
+def atualizar_lag(consumidor, timeout=5.0, medidor_lag=LAG_CONSUMIDOR):
+    """
+    Atualiza o lag de cada partição atribuída: high watermark - offset confirmado.
+
+    Partições sem offset confirmado contam a partir do low watermark.
+
+    Returns:
+        dict: {(tópico, partição): lag}
+    """
+    particoes = consumidor.assignment()
+    if not particoes:
+        return {}
+    lags = {}
+    for tp in consumidor.committed(particoes, timeout=timeout):
+        baixo, alto = consumidor.get_watermark_offsets(tp, timeout=timeout, cached=False)
+        confirmado = tp.offset if tp.offset >= 0 else baixo
+        lag = max(alto - confirmado, 0)
+        medidor_lag.rotulado(tp.topic, str(tp.partition)).definir(lag)
+        lags[(tp.topic, tp.partition)] = lag
+    return lags
+
+class MonitorLag:
+    """
+    Chama atualizar_lag() no máximo a cada intervalo_s.
+
+    Feito para ser chamado a cada iteração do loop de consumo, na mesma
+    thread do poll: committed() e get_watermark_offsets() consultam o broker.
+    """
+
+    def __init__(self, consumidor, intervalo_s=INTERVALO_LAG_S):
+        self.consumidor = consumidor
+        self.intervalo_s = intervalo_s
+        self._ultima = 0.0
+
+    def talvez_atualizar(self):
+        agora = time.monotonic()
+        if agora - self._ultima < self.intervalo_s:
+            return
+        self._ultima = agora
+        try:
+            atualizar_lag(self.consumidor)
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar o lag do consumidor: {e}")
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Backfill de vendas históricas no Apache Pinot por push de segmentos (tabela OFFLINE).
+
+Em vez de reenviar o histórico pelo Kafka e pelos segmentos realtime, lê as
+vendas de arquivos (JSON lines ou Avro) ou de um intervalo de offsets do
+tópico, grava arquivos Avro grandes com o schema de vendas_schema.json e os
+envia ao endpoint /ingestFromFile do controller, que cria um segmento por
+arquivo na tabela OFFLINE `vendas`. Com --hibrido, garante também a tabela
+REALTIME de mesmo nome, formando uma tabela híbrida.
+
+Para testar sem um cluster Pinot, use --stub: o pipeline roda contra um
+controller falso local que apenas registra schemas, tabelas e segmentos.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fastavro
+from confluent_kafka import Consumer, TopicPartition, KafkaError
+
+# Diretório src/ no path para importar os módulos compartilhados (schemas/) e src/consumer/
+DIRETORIO_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO_SRC)
+sys.path.insert(0, os.path.join(DIRETORIO_SRC, 'consumer'))
+from schemas.serializadores import obter_serializador, carregar_schema_avro, FORMATO_SERIALIZACAO
+from schemas.vendas import schema_pinot
+from comum.logs import configurar_logs
+from pinot_client import PinotClient
+from indices_tabela import aplicar_indices, config_tabela_realtime
+
+# Configurar logging
+configurar_logs()
+logger = logging.getLogger(__name__)
+
+# Caminhos do projeto
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurações Kafka
+KAFKA_BOOTSTRAP_SERVERS = os.environ.get('KAFKA_BOOTSTRAP_SERVERS', 'localhost:29092')
+KAFKA_TOPIC = os.environ.get('KAFKA_TOPIC', 'vendas-tempo-real')
+
+# Configurações Pinot
+PINOT_CONTROLLER_URL = os.environ.get('PINOT_CONTROLLER_URL', 'http://localhost:9000')
+PINOT_TABLE = os.environ.get('PINOT_TABLE', 'vendas')
+
+# Tabela REALTIME da tabela híbrida (--hibrido), com as mesmas variáveis do pinot_consumer.py
+PINOT_TOPICO = os.environ.get('PINOT_TOPICO', KAFKA_TOPIC)
+PINOT_FORMATO_MENSAGENS = os.environ.get('PINOT_FORMATO_MENSAGENS', FORMATO_SERIALIZACAO)
+KAFKA_CONNECT_URL = os.environ.get('KAFKA_CONNECT_URL', 'kafka:9092')  # Kafka visto pelo Pinot
+
+# Configurações do backfill
+DIRETORIO_BACKFILL = os.environ.get('DIRETORIO_BACKFILL', os.path.join(RAIZ_PROJETO, 'data', 'backfill'))
+LINHAS_POR_ARQUIVO = int(os.environ.get('LINHAS_POR_ARQUIVO', '500000'))  # Registros por segmento
+CODEC_AVRO = 'deflate'
+TIMEOUT_PUSH_S = 300  # Criação de segmento no controller pode ser lenta
+
+# ---------------------------------------------------------------------------
+# Leitura das vendas
+# ---------------------------------------------------------------------------
+
+def ler_arquivos(caminhos):
+    """
+    Lê vendas de arquivos JSON lines (.json/.jsonl) ou Avro (.avro).
+
+    Yields:
+        dict: Registro de venda
+    """
+    for caminho in caminhos:
+        logger.info(f"Lendo {caminho}...")
+        if caminho.endswith('.avro'):
+            with open(caminho, 'rb') as f:
+                yield from fastavro.reader(f)
+        else:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if linha:
+                        yield json.loads(linha)
+
+def ler_kafka(topico, inicio, fim=None, particoes=None, formato=None, timeout_s=10):
+    """
+    Lê vendas de um intervalo de offsets do tópico.
+
+    Args:
+        topico (str): Tópico de origem
+        inicio (int): Offset inicial (inclusive) em cada partição
+        fim (int): Offset final (exclusive); None = high watermark atual
+        particoes (list): Partições a ler; None = todas
+        formato (str): Formato de serialização das mensagens
+        timeout_s (float): Tempo máximo sem receber mensagens antes de desistir
+
+    Yields:
+        dict: Registro de venda
+    """
+    serializador = obter_serializador(formato)
+    consumidor = Consumer({
+        'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
+        'group.id': f"backfill-pinot-{int(time.time())}",
+        'enable.auto.commit': False,
+        'enable.partition.eof': True
+    })
+    try:
+        if particoes is None:
+            metadados = consumidor.list_topics(topico, timeout=timeout_s)
+            particoes = sorted(metadados.topics[topico].partitions)
+
+        limites = {}
+        atribuicao = []
+        for p in particoes:
+            baixo, alto = consumidor.get_watermark_offsets(TopicPartition(topico, p), timeout=timeout_s)
+            final = alto if fim is None else min(fim, alto)
+            inicial = max(inicio, baixo)
+            if inicial < final:
+                limites[p] = final
+                atribuicao.append(TopicPartition(topico, p, inicial))
+        logger.info(f"Lendo {topico} a partir do offset {inicio}: {len(atribuicao)} partições com dados")
+
+        consumidor.assign(atribuicao)
+        ultimo_recebimento = time.monotonic()
+        while limites:
+            mensagens = consumidor.consume(num_messages=10000, timeout=1.0)
+            if not mensagens and time.monotonic() - ultimo_recebimento > timeout_s:
+                logger.warning(f"Sem mensagens há {timeout_s}s; partições incompletas: {sorted(limites)}")
+                break
+            for msg in mensagens:
+                ultimo_recebimento = time.monotonic()
+                if msg.error():
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        limites.pop(msg.partition(), None)
+                    else:
+                        logger.error(f"Erro do consumidor: {msg.error()}")
+                    continue
+                final = limites.get(msg.partition())
+                if final is None or msg.offset() >= final:
+                    limites.pop(msg.partition(), None)
+                    continue
+                yield serializador.desserializar(msg.value())
+                if msg.offset() + 1 >= final:
+                    limites.pop(msg.partition(), None)
+    finally:
+        consumidor.close()
+
+# ---------------------------------------------------------------------------
+# Escrita dos arquivos de segmento
+# ---------------------------------------------------------------------------
+
+def escrever_arquivos_avro(registros, diretorio=DIRETORIO_BACKFILL, linhas_por_arquivo=LINHAS_POR_ARQUIVO):
+    """
+    Grava os registros em arquivos Avro (container com compressão) de até linhas_por_arquivo linhas.
+
+    Returns:
+        list: Caminhos dos arquivos gerados
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    schema = carregar_schema_avro()
+    prefixo = f"{PINOT_TABLE}_{time.strftime('%Y%m%d%H%M%S')}"
+    arquivos = []
+    lote = []
+
+    def gravar():
+        caminho = os.path.join(diretorio, f"{prefixo}_{len(arquivos):05d}.avro")
+        with open(caminho, 'wb') as f:
+            fastavro.writer(f, schema, lote, codec=CODEC_AVRO)
+        logger.info(f"Arquivo {caminho} gravado com {len(lote)} registros")
+        arquivos.append(caminho)
+
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= linhas_por_arquivo:
+            gravar()
+            lote = []
+    if lote:
+        gravar()
+    return arquivos
+
+# ---------------------------------------------------------------------------
+# Configuração e push no Pinot
+# ---------------------------------------------------------------------------
+
+def config_tabela_offline(hibrido=False):
+    """Configuração da tabela OFFLINE de vendas, com os índices gerados a partir do workload"""
+    return aplicar_indices({
+        "tableName": PINOT_TABLE,
+        "tableType": "OFFLINE",
+        "segmentsConfig": {
+            "timeColumnName": "timestamp",
+            "timeType": "MILLISECONDS",
+            "replication": "1",
+            "schemaName": PINOT_TABLE
+        },
+        "tenants": {},
+        "tableIndexConfig": {
+            "loadMode": "MMAP"
+        },
+        "ingestionConfig": {
+            "batchIngestionConfig": {
+                "segmentIngestionType": "APPEND",
+                # Na tabela híbrida, a fronteira de tempo do broker fica 1 período antes do fim dos dados offline
+                "segmentIngestionFrequency": "HOURLY" if hibrido else "DAILY"
+            }
+        },
+        "metadata": {
+            "customConfigs": {}
+        }
+    })
+
+def garantir_schema_e_tabelas(cliente, hibrido=False):
+    """Cria o schema e a tabela OFFLINE (e a REALTIME, se hibrido) caso não existam"""
+    resposta = cliente.get_controller("/schemas")
+    resposta.raise_for_status()
+    if PINOT_TABLE not in resposta.json():
+        cliente.post_controller("/schemas", json=schema_pinot(PINOT_TABLE)).raise_for_status()
+        logger.info(f"Schema {PINOT_TABLE} criado")
+
+    resposta = cliente.get_controller("/tables")
+    resposta.raise_for_status()
+    tabelas = resposta.json().get("tables", [])
+
+    if f"{PINOT_TABLE}_OFFLINE" not in tabelas:
+        cliente.post_controller("/tables", json=config_tabela_offline(hibrido)).raise_for_status()
+        logger.info(f"Tabela {PINOT_TABLE}_OFFLINE criada")
+
+    if hibrido and f"{PINOT_TABLE}_REALTIME" not in tabelas:
+        # A tabela realtime é a mesma configurada pelo consumidor Pinot (pinot_consumer.py)
+        config = config_tabela_realtime(PINOT_TABLE, PINOT_TOPICO, KAFKA_CONNECT_URL,
+                                        obter_serializador(PINOT_FORMATO_MENSAGENS))
+        cliente.post_controller("/tables", json=config).raise_for_status()
+        logger.info(f"Tabela {PINOT_TABLE}_REALTIME criada")
+
+def enviar_segmento(cliente, caminho):
+    """Envia um arquivo Avro ao controller, que gera e carrega um segmento OFFLINE"""
+    parametros = {
+        "tableNameWithType": f"{PINOT_TABLE}_OFFLINE",
+        "batchConfigMapStr": json.dumps({"inputFormat": "avro"})
+    }
+    # Conteúdo lido antes do POST: uma nova tentativa após falha de conexão reenvia o arquivo
+    # inteiro (um objeto de arquivo já consumido iria vazio)
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    resposta = cliente.post_controller(
+        "/ingestFromFile",
+        params=parametros,
+        files={"file": (os.path.basename(caminho), conteudo, "application/octet-stream")},
+        timeout=(3, TIMEOUT_PUSH_S)
+    )
+    if resposta.status_code != 200:
+        raise RuntimeError(f"Erro no push de {caminho}: {resposta.status_code}, {resposta.text}")
+    logger.info(f"Segmento enviado: {os.path.basename(caminho)} ({os.path.getsize(caminho) / 1e6:.1f} MB)")
+
+def executar_backfill(registros, controller=PINOT_CONTROLLER_URL, hibrido=False,
+                      diretorio=DIRETORIO_BACKFILL, linhas_por_arquivo=LINHAS_POR_ARQUIVO):
+    """
+    Executa o pipeline completo: grava os arquivos Avro e faz o push de cada um.
+
+    Returns:
+        dict: Arquivos gerados, registros e tempo total
+    """
+    inicio = time.monotonic()
+    contagem = {"registros": 0}
+
+    def contar(origem):
+        for registro in origem:
+            contagem["registros"] += 1
+            yield registro
+
+    # O broker não é usado no backfill; apenas o controller
+    cliente = PinotClient(controller, controller)
+    try:
+        garantir_schema_e_tabelas(cliente, hibrido)
+        arquivos = escrever_arquivos_avro(contar(registros), diretorio, linhas_por_arquivo)
+        for caminho in arquivos:
+            enviar_segmento(cliente, caminho)
+    finally:
+        cliente.fechar()
+
+    duracao = time.monotonic() - inicio
+    logger.info(f"Backfill concluído: {contagem['registros']} registros em {len(arquivos)} segmentos, {duracao:.1f}s")
+    return {"arquivos": arquivos, "registros": contagem["registros"], "duracao_s": duracao}
+
+# ---------------------------------------------------------------------------
+# Controller falso para testes locais
+# ---------------------------------------------------------------------------
+
+class _ManipuladorControllerStub(BaseHTTPRequestHandler):
+    """Implementa o mínimo da API do controller usada pelo backfill"""
+
+    def log_message(self, formato, *args):
+        logger.debug(f"Stub: {formato % args}")
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_corpo(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        estado = self.server.estado
+        caminho = urlparse(self.path).path
+        if caminho == "/health":
+            self._responder(200, "OK")
+        elif caminho == "/schemas":
+            self._responder(200, list(estado["schemas"]))
+        elif caminho == "/tables":
+            self._responder(200, {"tables": list(estado["tabelas"])})
+        else:
+            self._responder(404, {"error": f"Caminho não suportado pelo stub: {caminho}"})
+
+    def do_POST(self):
+        estado = self.server.estado
+        url = urlparse(self.path)
+        corpo = self._ler_corpo()
+        if url.path == "/schemas":
+            schema = json.loads(corpo)
+            estado["schemas"][schema["schemaName"]] = schema
+            self._responder(200, {"status": f"{schema['schemaName']} successfully added"})
+        elif url.path == "/tables":
+            config = json.loads(corpo)
+            nome = f"{config['tableName']}_{config['tableType']}"
+            estado["tabelas"][nome] = config
+            self._responder(200, {"status": f"Table {nome} successfully added"})
+        elif url.path == "/ingestFromFile":
+            tabela = parse_qs(url.query).get("tableNameWithType", [""])[0]
+            if tabela not in estado["tabelas"]:
+                self._responder(404, {"error": f"Tabela {tabela} não existe"})
+                return
+            estado["segmentos"].append({"tabela": tabela, "bytes": len(corpo)})
+            self._responder(200, {"status": f"Successfully ingested file into table: {tabela}"})
+        else:
+            self._responder(404, {"error": f"Caminho não suportado pelo stub: {url.path}"})
+
+def iniciar_controller_stub(porta=0):
+    """
+    Inicia um controller Pinot falso em uma thread.
+
+    Returns:
+        ThreadingHTTPServer: Servidor; a URL é http://127.0.0.1:{server_port} e o que
+        foi recebido fica em servidor.estado (schemas, tabelas, segmentos)
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), _ManipuladorControllerStub)
+    servidor.estado = {"schemas": {}, "tabelas": {}, "segmentos": []}
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+# ---------------------------------------------------------------------------
+
+def main():
+    """Interface de linha de comando do backfill"""
+    parser = argparse.ArgumentParser(description="Backfill de vendas históricas no Pinot (tabela OFFLINE)")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--arquivos", nargs="+", help="Arquivos de vendas (.jsonl/.json ou .avro)")
+    origem.add_argument("--kafka-inicio", type=int, help="Offset inicial em cada partição do tópico")
+    parser.add_argument("--kafka-fim", type=int, help="Offset final (exclusive); padrão: fim atual")
+    parser.add_argument("--particoes", type=int, nargs="+", help="Partições a ler; padrão: todas")
+    parser.add_argument("--controller", default=PINOT_CONTROLLER_URL, help="URL do Pinot Controller")
+    parser.add_argument("--hibrido", action="store_true", help="Garante também a tabela REALTIME (tabela híbrida)")
+    parser.add_argument("--linhas-por-arquivo", type=int, default=LINHAS_POR_ARQUIVO)
+    parser.add_argument("--diretorio", default=DIRETORIO_BACKFILL, help="Onde gravar os arquivos Avro")
+    parser.add_argument("--stub", action="store_true", help="Usar um controller falso local (teste)")
+    args = parser.parse_args()
+
+    if args.arquivos:
+        registros = ler_arquivos(args.arquivos)
+    else:
+        registros = ler_kafka(KAFKA_TOPIC, args.kafka_inicio, args.kafka_fim, args.particoes)
+
+    controller = args.controller
+    stub = None
+    if args.stub:
+        stub = iniciar_controller_stub()
+        controller = f"http://127.0.0.1:{stub.server_port}"
+        logger.info(f"Usando controller falso em {controller}")
+
+    try:
+        executar_backfill(registros, controller, args.hibrido, args.diretorio, args.linhas_por_arquivo)
+        if stub is not None:
+            logger.info(f"Stub recebeu: tabelas {list(stub.estado['tabelas'])}, "
+                        f"{len(stub.estado['segmentos'])} segmentos")
+    finally:
+        if stub is not None:
+            stub.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gravação e reprodução de um tópico Kafka em arquivos de segmento comprimidos.
+
+A captura consome o tópico (vendas-tempo-real por padrão) e grava as
+mensagens, com chave, partição, offset e timestamp originais, em blocos
+comprimidos com zlib. A reprodução lê os arquivos por mmap e envia as
+mensagens de volta ao Kafka respeitando os intervalos originais entre elas
+(velocidade 1), acelerados N vezes ou o mais rápido possível (velocidade 0).
+Assim é possível medir consumidores e a ingestão do Pinot com o formato real
+do tráfego de um incidente, sem o gerador ao vivo.
+
+Formato de uma gravação (um diretório):
+    segmento-NNNNN.grv  cabeçalho MAGICO + versão, seguido de blocos:
+                        [comprimido u32][original u32][registros u32][ts_min i64][ts_max i64][zlib]
+                        cada bloco descomprimido é uma sequência de registros:
+                        [timestamp i64][offset i64][partição i32][chave i32, -1 = nula][valor u32][chave][valor]
+    segmento-NNNNN.idx  índice esparso, uma entrada por bloco:
+                        [ts_min i64][ts_max i64][posição do bloco u64][primeiro registro u64]
+
+O índice permite começar a reprodução em um instante (--desde) sem
+descomprimir os blocos anteriores; sem ele os cabeçalhos dos blocos são
+percorridos. As mensagens são reproduzidas na ordem em que foram consumidas;
+entre partições essa ordem segue só aproximadamente os timestamps, e uma
+mensagem "atrasada" é enviada sem espera.
+
+Uso:
+    python src/connector/gravacao_topico.py capturar data/gravacoes/incidente --inicio inicio --ate-o-fim
+    python src/connector/gravacao_topico.py info data/gravacoes/incidente
+    python src/connector/gravacao_topico.py reproduzir data/gravacoes/incidente --velocidade 10
+"""
+
+import os
+import sys
+import mmap
+import time
+import zlib
+import glob
+import struct
+import logging
+import argparse
+from datetime import datetime, timezone
+
+from confluent_kafka import (Consumer, TopicPartition, KafkaError, OFFSET_BEGINNING, OFFSET_END,
+                             TIMESTAMP_NOT_AVAILABLE)
+
+# Diretórios src/ e src/producer no path para reutilizar o produtor do gerador
+DIRETORIO_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO_SRC)
+sys.path.insert(0, os.path.join(DIRETORIO_SRC, 'producer'))
+from comum import metricas
+from comum.logs import configurar_logs
+import data_generator
+
+# Configurar logging
+configurar_logs()
+logger = logging.getLogger(__name__)
+
+# Caminhos do projeto
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurações Kafka
+KAFKA_BOOTSTRAP_SERVERS = os.environ.get('KAFKA_BOOTSTRAP_SERVERS', 'localhost:29092')
+KAFKA_TOPIC = os.environ.get('KAFKA_TOPIC', 'vendas-tempo-real')
+
+# Configurações da gravação
+DIRETORIO_GRAVACOES = os.environ.get('DIRETORIO_GRAVACOES', os.path.join(RAIZ_PROJETO, 'data', 'gravacoes'))
+GRAVACAO_BLOCO_BYTES = int(os.environ.get('GRAVACAO_BLOCO_BYTES', str(1 << 20)))  # Bytes por bloco antes da compressão
+GRAVACAO_SEGMENTO_BYTES = int(os.environ.get('GRAVACAO_SEGMENTO_BYTES', str(256 << 20)))  # Tamanho de cada arquivo
+GRAVACAO_NIVEL_ZLIB = int(os.environ.get('GRAVACAO_NIVEL_ZLIB', '6'))
+INTERVALO_RELATORIO_S = 5
+
+# Formato dos arquivos
+MAGICO = b'VGRV'
+VERSAO_FORMATO = 1
+CABECALHO_ARQUIVO = struct.Struct('<4sB')
+CABECALHO_BLOCO = struct.Struct('<IIIqq')
+CABECALHO_REGISTRO = struct.Struct('<qqiiI')
+ENTRADA_INDICE = struct.Struct('<qqQQ')
+EXTENSAO_SEGMENTO = '.grv'
+EXTENSAO_INDICE = '.idx'
+
+class ErroGravacao(ValueError):
+    """Arquivo de gravação inválido ou corrompido"""
+
+# ---------------------------------------------------------------------------
+# Escrita
+# ---------------------------------------------------------------------------
+
+class EscritorSegmentos:
+    """
+    Grava mensagens em blocos comprimidos, com rotação de arquivos e índice esparso.
+
+    Args:
+        diretorio (str): Diretório da gravação (criado se não existir)
+        bloco_bytes (int): Bytes de registros acumulados antes de comprimir um bloco
+        segmento_bytes (int): Tamanho a partir do qual um novo arquivo é iniciado
+        nivel (int): Nível de compressão do zlib
+    """
+
+    def __init__(self, diretorio, bloco_bytes=GRAVACAO_BLOCO_BYTES, segmento_bytes=GRAVACAO_SEGMENTO_BYTES,
+                 nivel=GRAVACAO_NIVEL_ZLIB):
+        self.diretorio = diretorio
+        self.bloco_bytes = bloco_bytes
+        self.segmento_bytes = segmento_bytes
+        self.nivel = nivel
+        os.makedirs(diretorio, exist_ok=True)
+        self.arquivos = []
+        self.registros = self.bytes_originais = self.bytes_gravados = 0
+        self._arquivo = self._indice = None
+        self._bloco = bytearray()
+        self._registros_bloco = 0
+        self._ts_min = self._ts_max = None
+        self._primeiro_registro = 0
+
+    def adicionar(self, timestamp, particao, offset, chave, valor):
+        """Acrescenta uma mensagem ao bloco atual (chave pode ser None)"""
+        valor = valor or b''
+        self._bloco += CABECALHO_REGISTRO.pack(timestamp, offset, particao,
+                                               -1 if chave is None else len(chave), len(valor))
+        if chave:
+            self._bloco += chave
+        self._bloco += valor
+        self._registros_bloco += 1
+        if self._ts_min is None or timestamp < self._ts_min:
+            self._ts_min = timestamp
+        if self._ts_max is None or timestamp > self._ts_max:
+            self._ts_max = timestamp
+        if len(self._bloco) >= self.bloco_bytes:
+            self._gravar_bloco()
+
+    def _abrir_segmento(self):
+        caminho = os.path.join(self.diretorio, f"segmento-{len(self.arquivos):05d}{EXTENSAO_SEGMENTO}")
+        if os.path.exists(caminho):
+            raise FileExistsError(f"{caminho} já existe; use um diretório novo para cada gravação")
+        self._arquivo = open(caminho, 'wb')
+        self._indice = open(caminho[:-len(EXTENSAO_SEGMENTO)] + EXTENSAO_INDICE, 'wb')
+        self._arquivo.write(CABECALHO_ARQUIVO.pack(MAGICO, VERSAO_FORMATO))
+        self.arquivos.append(caminho)
+
+    def _gravar_bloco(self):
+        if not self._registros_bloco:
+            return
+        if self._arquivo is None:
+            self._abrir_segmento()
+        comprimido = zlib.compress(self._bloco, self.nivel)
+        posicao = self._arquivo.tell()
+        self._arquivo.write(CABECALHO_BLOCO.pack(len(comprimido), len(self._bloco), self._registros_bloco,
+                                                 self._ts_min, self._ts_max))
+        self._arquivo.write(comprimido)
+        self._indice.write(ENTRADA_INDICE.pack(self._ts_min, self._ts_max, posicao, self._primeiro_registro))
+        self.registros += self._registros_bloco
+        self.bytes_originais += len(self._bloco)
+        self.bytes_gravados += CABECALHO_BLOCO.size + len(comprimido)
+        self._primeiro_registro += self._registros_bloco
+        self._bloco = bytearray()
+        self._registros_bloco = 0
+        self._ts_min = self._ts_max = None
+        if self._arquivo.tell() >= self.segmento_bytes:
+            self._fechar_segmento()
+
+    def _fechar_segmento(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._indice.close()
+            self._arquivo = self._indice = None
+            self._primeiro_registro = 0
+
+    def fechar(self):
+        """Grava o bloco parcial e fecha o arquivo atual"""
+        self._gravar_bloco()
+        self._fechar_segmento()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+def listar_segmentos(caminho):
+    """Arquivos de segmento de uma gravação (diretório) ou o próprio arquivo, em ordem"""
+    if os.path.isdir(caminho):
+        arquivos = sorted(glob.glob(os.path.join(caminho, f"*{EXTENSAO_SEGMENTO}")))
+        if not arquivos:
+            raise ErroGravacao(f"Nenhum arquivo {EXTENSAO_SEGMENTO} em {caminho}")
+        return arquivos
+    return [caminho]
+
+class LeitorSegmentos:
+    """
+    Lê os registros de uma gravação mapeando os arquivos em memória (mmap).
+
+    Cada bloco é descomprimido direto da região mapeada; apenas o bloco em
+    uso fica em memória.
+
+    Args:
+        caminho (str): Diretório da gravação ou um arquivo de segmento
+    """
+
+    def __init__(self, caminho):
+        self.arquivos = listar_segmentos(caminho)
+
+    def _abrir(self, caminho):
+        with open(caminho, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapa.size() < CABECALHO_ARQUIVO.size:
+            mapa.close()
+            raise ErroGravacao(f"{caminho} não é um arquivo de gravação")
+        magico, versao = CABECALHO_ARQUIVO.unpack_from(mapa)
+        if magico != MAGICO or versao > VERSAO_FORMATO:
+            mapa.close()
+            raise ErroGravacao(f"{caminho} não é um arquivo de gravação (versão {VERSAO_FORMATO})")
+        return mapa
+
+    def _posicoes_blocos(self, caminho, mapa, desde_ms=None):
+        """Posições dos blocos a ler: pelo índice esparso, ou percorrendo os cabeçalhos"""
+        caminho_indice = caminho[:-len(EXTENSAO_SEGMENTO)] + EXTENSAO_INDICE
+        if os.path.exists(caminho_indice):
+            with open(caminho_indice, 'rb') as f:
+                entradas = list(ENTRADA_INDICE.iter_unpack(f.read()))
+            return [posicao for _, ts_max, posicao, _ in entradas if desde_ms is None or ts_max >= desde_ms]
+        posicoes = []
+        posicao = CABECALHO_ARQUIVO.size
+        while posicao + CABECALHO_BLOCO.size <= mapa.size():
+            comprimido, _, _, _, ts_max = CABECALHO_BLOCO.unpack_from(mapa, posicao)
+            if desde_ms is None or ts_max >= desde_ms:
+                posicoes.append(posicao)
+            posicao += CABECALHO_BLOCO.size + comprimido
+        return posicoes
+
+    def blocos(self, desde_ms=None):
+        """
+        Percorre os blocos descomprimidos.
+
+        Yields:
+            tuple: (bytes do bloco, quantidade de registros, ts_min, ts_max)
+        """
+        for caminho in self.arquivos:
+            mapa = self._abrir(caminho)
+            try:
+                for posicao in self._posicoes_blocos(caminho, mapa, desde_ms):
+                    comprimido, original, registros, ts_min, ts_max = CABECALHO_BLOCO.unpack_from(mapa, posicao)
+                    inicio = posicao + CABECALHO_BLOCO.size
+                    if inicio + comprimido > mapa.size():
+                        raise ErroGravacao(f"Bloco truncado em {caminho} na posição {posicao}")
+                    with memoryview(mapa)[inicio:inicio + comprimido] as regiao:
+                        dados = zlib.decompress(regiao, bufsize=original)
+                    if len(dados) != original:
+                        raise ErroGravacao(f"Bloco corrompido em {caminho} na posição {posicao}")
+                    yield dados, registros, ts_min, ts_max
+            finally:
+                mapa.close()
+
+    def registros(self, desde_ms=None):
+        """
+        Percorre as mensagens gravadas, na ordem de captura.
+
+        Yields:
+            tuple: (timestamp, partição, offset, chave ou None, valor)
+        """
+        tamanho_cabecalho = CABECALHO_REGISTRO.size
+        ler_cabecalho = CABECALHO_REGISTRO.unpack_from
+        for dados, registros, _, _ in self.blocos(desde_ms):
+            posicao = 0
+            for _ in range(registros):
+                timestamp, offset, particao, tamanho_chave, tamanho_valor = ler_cabecalho(dados, posicao)
+                posicao += tamanho_cabecalho
+                chave = None
+                if tamanho_chave >= 0:
+                    chave = dados[posicao:posicao + tamanho_chave]
+                    posicao += tamanho_chave
+                valor = dados[posicao:posicao + tamanho_valor]
+                posicao += tamanho_valor
+                if desde_ms is None or timestamp >= desde_ms:
+                    yield timestamp, particao, offset, chave, valor
+
+    def resumo(self):
+        """Totais da gravação lidos apenas dos cabeçalhos dos blocos"""
+        resumo = {"arquivos": len(self.arquivos), "blocos": 0, "registros": 0, "bytes_originais": 0,
+                  "bytes_gravados": 0, "ts_min": None, "ts_max": None}
+        for caminho in self.arquivos:
+            mapa = self._abrir(caminho)
+            try:
+                for posicao in self._posicoes_blocos(caminho, mapa):
+                    comprimido, original, registros, ts_min, ts_max = CABECALHO_BLOCO.unpack_from(mapa, posicao)
+                    resumo["blocos"] += 1
+                    resumo["registros"] += registros
+                    resumo["bytes_originais"] += original
+                    resumo["bytes_gravados"] += CABECALHO_BLOCO.size + comprimido
+                    resumo["ts_min"] = ts_min if resumo["ts_min"] is None else min(resumo["ts_min"], ts_min)
+                    resumo["ts_max"] = ts_max if resumo["ts_max"] is None else max(resumo["ts_max"], ts_max)
+            finally:
+                mapa.close()
+        return resumo
+
+# ---------------------------------------------------------------------------
+# Captura e reprodução
+# ---------------------------------------------------------------------------
+
+def capturar(consumidor, escritor, registros=0, duracao=0, ate_o_fim=False, parar=None):
+    """
+    Consome mensagens e as grava até o limite de registros, a duração ou o fim das partições.
+
+    Args:
+        consumidor (Consumer): Consumidor já inscrito ou com partições atribuídas
+        escritor (EscritorSegmentos): Destino das mensagens
+        registros (int): Quantidade máxima de mensagens; 0 = sem limite
+        duracao (float): Segundos de captura; 0 = sem limite
+        ate_o_fim (bool): Para quando todas as partições atribuídas chegarem ao fim
+            (requer enable.partition.eof)
+        parar (threading.Event): Sinaliza o fim da captura (opcional)
+
+    Returns:
+        int: Mensagens gravadas
+    """
+    inicio = ultimo_relatorio = time.monotonic()
+    pendentes = {(tp.topic, tp.partition) for tp in consumidor.assignment()} if ate_o_fim else None
+    gravadas = gravadas_relatorio = 0
+    while parar is None or not parar.is_set():
+        if registros and gravadas >= registros:
+            break
+        if duracao and time.monotonic() - inicio >= duracao:
+            break
+        if pendentes is not None and not pendentes:
+            break
+        mensagens = consumidor.consume(num_messages=10000, timeout=1.0)
+        for msg in mensagens:
+            if msg.error():
+                if msg.error().code() == KafkaError._PARTITION_EOF:
+                    if pendentes is not None:
+                        pendentes.discard((msg.topic(), msg.partition()))
+                else:
+                    logger.error(f"Erro do consumidor: {msg.error()}")
+                continue
+            tipo, timestamp = msg.timestamp()
+            if tipo == TIMESTAMP_NOT_AVAILABLE:
+                timestamp = int(time.time() * 1000)
+            escritor.adicionar(timestamp, msg.partition(), msg.offset(), msg.key(), msg.value())
+            gravadas += 1
+            if registros and gravadas >= registros:
+                break
+        agora = time.monotonic()
+        if agora - ultimo_relatorio >= INTERVALO_RELATORIO_S:
+            logger.info(f"Capturadas {gravadas} mensagens ({(gravadas - gravadas_relatorio) / (agora - ultimo_relatorio):.0f} "
+                        f"msgs/s), {escritor.bytes_gravados / 1e6:.1f} MB gravados")
+            ultimo_relatorio, gravadas_relatorio = agora, gravadas
+    return gravadas
+
+def reproduzir(produtor, leitor, topico=KAFKA_TOPIC, velocidade=1.0, desde_ms=None, preservar_particao=False,
+               manter_timestamp=False, parar=None, estatisticas=None):
+    """
+    Envia as mensagens gravadas ao Kafka mantendo os intervalos originais entre elas.
+
+    Args:
+        produtor (Producer): Produtor Kafka, idealmente criado com alta_vazao=True
+        leitor (LeitorSegmentos): Gravação a reproduzir
+        topico (str): Tópico de destino
+        velocidade (float): 1 = tempo original, N = N vezes mais rápido, 0 = sem espera
+        desde_ms (int): Reproduz apenas mensagens com timestamp a partir deste instante
+        preservar_particao (bool): Envia cada mensagem à partição original (senão, particionador pela chave)
+        manter_timestamp (bool): Usa o timestamp original como timestamp da mensagem Kafka
+        parar (threading.Event): Sinaliza o fim da reprodução (opcional)
+        estatisticas (EstatisticasEntrega): Contador de entregas (opcional)
+
+    Returns:
+        dict: Mensagens e bytes enviados, duração real e duração original do trecho
+    """
+    estatisticas = estatisticas if estatisticas is not None else data_generator.EstatisticasEntrega()
+    inicio = ultimo_relatorio = time.monotonic()
+    ts_inicial = ts_atual = None
+    enviadas = bytes_enviados = enviadas_relatorio = 0
+    enviadas_metricas = bytes_metricas = 0
+    logger.info(f"Reproduzindo {len(leitor.arquivos)} arquivos em {topico}, velocidade "
+                f"{'máxima' if velocidade <= 0 else f'{velocidade:g}x'}")
+    try:
+        for timestamp, particao, _, chave, valor in leitor.registros(desde_ms):
+            if parar is not None and parar.is_set():
+                break
+            if ts_inicial is None:
+                ts_inicial = timestamp
+            ts_atual = timestamp
+            if velocidade > 0:
+                espera = (timestamp - ts_inicial) / 1000.0 / velocidade - (time.monotonic() - inicio)
+                if espera > 0:
+                    produtor.poll(0)
+                    time.sleep(espera)
+            extras = {}
+            if preservar_particao:
+                extras['partition'] = particao
+            if manter_timestamp:
+                extras['timestamp'] = timestamp
+            data_generator.produzir_com_espera(produtor, topico, valor, chave, estatisticas.delivery_report,
+                                               **extras)
+            enviadas += 1
+            bytes_enviados += len(valor)
+            if enviadas % 1000 == 0:
+                produtor.poll(0)
+                data_generator.VENDAS_PRODUZIDAS.incrementar(enviadas - enviadas_metricas)
+                data_generator.BYTES_PRODUZIDOS.incrementar(bytes_enviados - bytes_metricas)
+                enviadas_metricas, bytes_metricas = enviadas, bytes_enviados
+                agora = time.monotonic()
+                if agora - ultimo_relatorio >= INTERVALO_RELATORIO_S:
+                    logger.info(f"Reproduzidas {enviadas} mensagens "
+                                f"({(enviadas - enviadas_relatorio) / (agora - ultimo_relatorio):.0f} msgs/s), "
+                                f"posição original {_formatar_ts(timestamp)}")
+                    ultimo_relatorio, enviadas_relatorio = agora, enviadas
+    finally:
+        data_generator.VENDAS_PRODUZIDAS.incrementar(enviadas - enviadas_metricas)
+        data_generator.BYTES_PRODUZIDOS.incrementar(bytes_enviados - bytes_metricas)
+        produtor.flush()
+    decorrido = max(time.monotonic() - inicio, 1e-9)
+    totais = {
+        "mensagens": enviadas,
+        "bytes": bytes_enviados,
+        "entregues": estatisticas.entregues,
+        "erros": estatisticas.erros,
+        "duracao_s": decorrido,
+        "duracao_original_s": (ts_atual - ts_inicial) / 1000.0 if enviadas else 0.0,
+    }
+    logger.info(f"Reprodução finalizada: {enviadas} mensagens em {decorrido:.1f}s ({enviadas / decorrido:.0f} msgs/s), "
+                f"trecho original de {totais['duracao_original_s']:.1f}s")
+    return totais
+
+def _formatar_ts(timestamp):
+    return datetime.fromtimestamp(timestamp / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+def criar_consumidor_captura(topico, inicio='fim', ate_o_fim=False, timeout_s=10):
+    """
+    Consumidor com grupo próprio e sem commits, com todas as partições do tópico atribuídas.
+
+    Args:
+        topico (str): Tópico a capturar
+        inicio (str): 'inicio' (offsets mais antigos) ou 'fim' (só mensagens novas)
+        ate_o_fim (bool): Habilita os eventos de fim de partição
+    """
+    consumidor = Consumer({
+        'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
+        'group.id': f"gravacao-{topico}-{int(time.time())}",
+        'enable.auto.commit': False,
+        'enable.partition.eof': ate_o_fim,
+    })
+    metadados = consumidor.list_topics(topico, timeout=timeout_s)
+    offset = OFFSET_BEGINNING if inicio == 'inicio' else OFFSET_END
+    consumidor.assign([TopicPartition(topico, p, offset) for p in sorted(metadados.topics[topico].partitions)])
+    return consumidor
+
+def main():
+    """Interface de linha de comando da gravação e reprodução"""
+    parser = argparse.ArgumentParser(description="Grava um tópico Kafka em arquivos e o reproduz depois")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    captura = comandos.add_parser("capturar", help="Consome o tópico e grava as mensagens")
+    captura.add_argument("destino", nargs="?", help="Diretório da gravação (padrão: data/gravacoes/<data-hora>)")
+    captura.add_argument("--topico", default=KAFKA_TOPIC)
+    captura.add_argument("--inicio", choices=("inicio", "fim"), default="fim",
+                         help="Começar pelos offsets mais antigos ou só pelas mensagens novas")
+    captura.add_argument("--registros", type=int, default=0, help="Quantidade máxima de mensagens (0 = sem limite)")
+    captura.add_argument("--duracao", type=float, default=0, help="Segundos de captura (0 = sem limite)")
+    captura.add_argument("--ate-o-fim", action="store_true", help="Para ao alcançar o fim de todas as partições")
+
+    reproducao = comandos.add_parser("reproduzir", help="Envia uma gravação ao Kafka")
+    reproducao.add_argument("origem", help="Diretório da gravação ou arquivo de segmento")
+    reproducao.add_argument("--topico", default=KAFKA_TOPIC)
+    reproducao.add_argument("--velocidade", type=float, default=1.0,
+                            help="1 = tempo original, N = N vezes mais rápido, 0 = o mais rápido possível")
+    reproducao.add_argument("--desde", help="Começa no instante (ISO, UTC) indicado, usando o índice")
+    reproducao.add_argument("--preservar-particao", action="store_true", help="Envia à partição original")
+    reproducao.add_argument("--manter-timestamp", action="store_true",
+                            help="Usa o timestamp original nas mensagens Kafka (atenção à retenção do tópico)")
+
+    informacoes = comandos.add_parser("info", help="Resume uma gravação")
+    informacoes.add_argument("origem", help="Diretório da gravação ou arquivo de segmento")
+    args = parser.parse_args()
+
+    if args.comando == "info":
+        resumo = LeitorSegmentos(args.origem).resumo()
+        for chave, valor in resumo.items():
+            print(f"{chave}: {_formatar_ts(valor) if chave.startswith('ts_') and valor is not None else valor}")
+        if resumo["bytes_gravados"]:
+            print(f"compressao: {resumo['bytes_originais'] / resumo['bytes_gravados']:.2f}x")
+        return
+
+    metricas.iniciar_servidor()
+    if args.comando == "capturar":
+        destino = args.destino or os.path.join(DIRETORIO_GRAVACOES, time.strftime('%Y%m%d%H%M%S'))
+        consumidor = criar_consumidor_captura(args.topico, args.inicio, args.ate_o_fim)
+        escritor = EscritorSegmentos(destino)
+        logger.info(f"Capturando {args.topico} em {destino}")
+        try:
+            capturar(consumidor, escritor, args.registros, args.duracao, args.ate_o_fim)
+        except KeyboardInterrupt:
+            logger.info("Interrompido pelo usuário. Finalizando...")
+        finally:
+            escritor.fechar()
+            consumidor.close()
+            taxa = escritor.bytes_originais / escritor.bytes_gravados if escritor.bytes_gravados else 0
+            logger.info(f"Gravação finalizada: {escritor.registros} mensagens em {len(escritor.arquivos)} arquivos, "
+                        f"{escritor.bytes_gravados / 1e6:.1f} MB (compressão {taxa:.2f}x)")
+        return
+
+    desde_ms = None
+    if args.desde:
+        desde_ms = int(datetime.fromisoformat(args.desde).replace(tzinfo=timezone.utc).timestamp() * 1000)
+    produtor = data_generator.criar_produtor(alta_vazao=True)
+    try:
+        reproduzir(produtor, LeitorSegmentos(args.origem), args.topico, args.velocidade, desde_ms,
+                   args.preservar_particao, args.manter_timestamp)
+    except KeyboardInterrupt:
+        logger.info("Interrompido pelo usuário. Finalizando...")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Agregação em janelas de tempo (tumbling e sliding) sobre o stream de vendas.
+
+Mantém em memória contagem, soma e média de valor_total por dimensão
+(categoria, estado, cidade, forma_pagamento) em janelas baseadas no
+timestamp do evento, com watermark para eventos atrasados. Permite servir os
+totais por minuto dos dashboards sem consultar o Pinot.
+"""
+
+import os
+import math
+import logging
+import threading
+from operator import attrgetter
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Configurações da agregação em janelas
+AGREGACAO_JANELAS = os.environ.get('AGREGACAO_JANELAS', 'false').lower() == 'true'
+AGREGACAO_DIMENSOES = [d for d in os.environ.get(
+    'AGREGACAO_DIMENSOES', 'categoria,estado,cidade,forma_pagamento').split(',') if d]
+JANELA_TAMANHO_MS = int(os.environ.get('JANELA_TAMANHO_MS', '60000'))    # 1 minuto
+JANELA_DESLIZE_MS = int(os.environ.get('JANELA_DESLIZE_MS', '60000'))    # = tamanho -> tumbling
+JANELA_ATRASO_MAX_MS = int(os.environ.get('JANELA_ATRASO_MAX_MS', '5000'))  # Atraso tolerado
+JANELAS_RETIDAS = int(os.environ.get('JANELAS_RETIDAS', '60'))  # Janelas fechadas mantidas em memória
+
+class AgregadorJanelas:
+    """
+    Contagem e soma de uma métrica por valor de uma dimensão, em janelas de tempo.
+
+    Os valores da dimensão são convertidos em códigos inteiros e cada janela
+    guarda dois arrays (contagens e somas) indexados pelo código. Com
+    deslize_ms == tamanho_ms as janelas são tumbling; com deslize_ms menor,
+    cada evento entra em tamanho_ms / deslize_ms janelas sobrepostas.
+
+    A watermark é o maior timestamp visto menos atraso_max_ms. Janelas cujo
+    fim fica antes da watermark são fechadas; eventos que só pertencem a
+    janelas fechadas são descartados e contados em `atrasados`.
+
+    Args:
+        dimensao (str): Campo usado como chave; None agrega apenas o total
+        tamanho_ms (int): Duração da janela
+        deslize_ms (int): Passo entre inícios de janelas (divisor de tamanho_ms)
+        atraso_max_ms (int): Atraso máximo tolerado antes de fechar uma janela
+        janelas_retidas (int): Quantidade de janelas fechadas mantidas
+    """
+
+    def __init__(self, dimensao=None, tamanho_ms=JANELA_TAMANHO_MS, deslize_ms=None,
+                 atraso_max_ms=JANELA_ATRASO_MAX_MS, janelas_retidas=JANELAS_RETIDAS):
+        deslize_ms = deslize_ms or tamanho_ms
+        if tamanho_ms % deslize_ms != 0:
+            raise ValueError("O tamanho da janela deve ser múltiplo do deslize")
+        self.dimensao = dimensao
+        self.tamanho_ms = tamanho_ms
+        self.deslize_ms = deslize_ms
+        self.atraso_max_ms = atraso_max_ms
+        self.janelas_retidas = janelas_retidas
+
+        self.codigos = {}   # valor da dimensão -> código
+        self.valores = []   # código -> valor da dimensão
+        self._capacidade = 16
+
+        self._abertas = {}  # início da janela -> [contagens, somas]
+        self.fechadas = OrderedDict()  # início da janela -> (contagens, somas), mais antiga primeiro
+        self.max_timestamp = -math.inf
+        self.watermark = -math.inf
+        self.atrasados = 0
+
+    def codificar(self, valores):
+        """Converte valores da dimensão em códigos, registrando valores novos"""
+        codigos = self.codigos
+        resultado = np.empty(len(valores), dtype=np.int64)
+        for i, valor in enumerate(valores):
+            codigo = codigos.get(valor)
+            if codigo is None:
+                codigo = codigos[valor] = len(self.valores)
+                self.valores.append(valor)
+            resultado[i] = codigo
+        if len(self.valores) > self._capacidade:
+            self._crescer(len(self.valores))
+        return resultado
+
+    def _crescer(self, minimo):
+        capacidade = self._capacidade
+        while capacidade < minimo:
+            capacidade *= 2
+        for acumuladores in self._abertas.values():
+            for i, array in enumerate(acumuladores):
+                novo = np.zeros(capacidade, dtype=array.dtype)
+                novo[:len(array)] = array
+                acumuladores[i] = novo
+        self._capacidade = capacidade
+
+    def registrar_lote(self, timestamps, metricas, codigos=None):
+        """
+        Acumula um lote de eventos.
+
+        Args:
+            timestamps (array-like): Timestamps dos eventos em ms
+            metricas (array-like): Valor somado de cada evento (ex.: valor_total)
+            codigos (array-like): Códigos da dimensão (de codificar()); None se dimensao=None
+        """
+        ts = np.asarray(timestamps, dtype=np.int64)
+        if ts.size == 0:
+            return
+        metricas = np.asarray(metricas, dtype=np.float64)
+        codigos = np.zeros(ts.size, dtype=np.int64) if codigos is None else np.asarray(codigos, dtype=np.int64)
+
+        base = (ts // self.deslize_ms) * self.deslize_ms
+        algum_aberto = np.zeros(ts.size, dtype=bool)
+        for k in range(self.tamanho_ms // self.deslize_ms):
+            inicios = base - k * self.deslize_ms
+            abertos = inicios + self.tamanho_ms > self.watermark
+            algum_aberto |= abertos
+            for inicio in np.unique(inicios[abertos]):
+                selecao = abertos & (inicios == inicio)
+                acumuladores = self._abertas.get(int(inicio))
+                if acumuladores is None:
+                    acumuladores = self._abertas[int(inicio)] = [
+                        np.zeros(self._capacidade, dtype=np.int64),
+                        np.zeros(self._capacidade, dtype=np.float64)
+                    ]
+                acumuladores[0] += np.bincount(codigos[selecao], minlength=self._capacidade)
+                acumuladores[1] += np.bincount(codigos[selecao], weights=metricas[selecao],
+                                               minlength=self._capacidade)
+        self.atrasados += int(ts.size - algum_aberto.sum())
+
+        self.max_timestamp = max(self.max_timestamp, int(ts.max()))
+        self.watermark = self.max_timestamp - self.atraso_max_ms
+        self._fechar_janelas()
+
+    def _fechar_janelas(self):
+        for inicio in sorted(i for i in self._abertas if i + self.tamanho_ms <= self.watermark):
+            self.fechadas[inicio] = tuple(self._abertas.pop(inicio))
+            while len(self.fechadas) > self.janelas_retidas:
+                self.fechadas.popitem(last=False)
+
+    def resultado(self, inicio):
+        """
+        Retorna os agregados de uma janela (aberta ou fechada).
+
+        Returns:
+            list: dicts {dimensao, num_vendas, valor_total, valor_medio}, maior valor_total primeiro
+        """
+        acumuladores = self.fechadas.get(inicio) or self._abertas.get(inicio)
+        if acumuladores is None:
+            return []
+        contagens, somas = acumuladores
+        linhas = []
+        for codigo in np.nonzero(contagens)[0]:
+            linhas.append({
+                self.dimensao or "total": self.valores[codigo] if self.dimensao else "total",
+                "num_vendas": int(contagens[codigo]),
+                "valor_total": round(float(somas[codigo]), 2),
+                "valor_medio": round(float(somas[codigo] / contagens[codigo]), 2)
+            })
+        return sorted(linhas, key=lambda linha: linha["valor_total"], reverse=True)
+
+    def janelas(self, incluir_abertas=True):
+        """Inícios das janelas disponíveis, em ordem cronológica"""
+        inicios = list(self.fechadas)
+        if incluir_abertas:
+            inicios += sorted(self._abertas)
+        return inicios
+
+_timestamp = attrgetter('timestamp')
+_valor_total = attrgetter('valor_total')
+
+class AgregacaoStreaming:
+    """
+    Conjunto de agregadores (um por dimensão, mais o total) alimentado por lotes de vendas.
+
+    Com um dicionário de dimensões (schemas/dicionario.py), os agregadores
+    começam com os valores do dicionário na mesma ordem, de modo que o código
+    de cada valor é o mesmo do dicionário: lotes de VendaCodificada entram
+    direto nos arrays, e os textos só são expandidos em resultado().
+
+    Seguro para uso a partir de várias threads (ex.: EstagioProcessamento com threads).
+    """
+
+    def __init__(self, dimensoes=AGREGACAO_DIMENSOES, tamanho_ms=JANELA_TAMANHO_MS,
+                 deslize_ms=JANELA_DESLIZE_MS, atraso_max_ms=JANELA_ATRASO_MAX_MS, dicionario=None):
+        parametros = dict(tamanho_ms=tamanho_ms, deslize_ms=deslize_ms, atraso_max_ms=atraso_max_ms)
+        self.total = AgregadorJanelas(None, **parametros)
+        self.por_dimensao = {d: AgregadorJanelas(d, **parametros) for d in dimensoes}
+        self._campos = {d: attrgetter(d) for d in dimensoes}
+        self.dicionario = dicionario
+        if dicionario is not None:
+            for dimensao, agregador in self.por_dimensao.items():
+                if dimensao in dicionario.dimensoes:
+                    agregador.codificar(dicionario.dimensoes[dimensao])
+        self._lock = threading.Lock()
+        self._ultima_fechada = None
+
+        tipo = "tumbling" if deslize_ms == tamanho_ms else f"sliding (deslize de {deslize_ms} ms)"
+        logger.info(f"Agregação em janelas de {tamanho_ms} ms {tipo} por {', '.join(dimensoes) or 'total'}")
+
+    def registrar_lote(self, registros, codificados=False):
+        """
+        Acumula um lote de vendas em todas as dimensões.
+
+        Args:
+            registros (list): Lista de Venda, ou de VendaCodificada com codificados=True
+            codificados (bool): Dimensões do dicionário já vêm como códigos
+                (requer a agregação criada com o mesmo dicionário)
+        """
+        if not registros:
+            return
+        timestamps = list(map(_timestamp, registros))
+        valores = list(map(_valor_total, registros))
+        with self._lock:
+            self.total.registrar_lote(timestamps, valores)
+            for dimensao, agregador in self.por_dimensao.items():
+                coluna = list(map(self._campos[dimensao], registros))
+                if codificados and self.dicionario is not None and dimensao in self.dicionario.dimensoes:
+                    codigos = self._codigos_do_dicionario(agregador, coluna)
+                else:
+                    codigos = agregador.codificar(coluna)
+                agregador.registrar_lote(timestamps, valores, codigos)
+            self._logar_janelas_fechadas()
+
+    @staticmethod
+    def _codigos_do_dicionario(agregador, coluna):
+        """Códigos do dicionário usados como estão; valores por extenso (fora do dicionário) são codificados"""
+        if any(isinstance(valor, str) for valor in coluna):
+            return np.array([agregador.codificar([valor])[0] if isinstance(valor, str) else valor
+                             for valor in coluna], dtype=np.int64)
+        return np.fromiter(coluna, dtype=np.int64, count=len(coluna))
+
+    def _logar_janelas_fechadas(self):
+        for inicio in self.total.fechadas:
+            if self._ultima_fechada is not None and inicio <= self._ultima_fechada:
+                continue
+            total = self.total.resultado(inicio)
+            if total:
+                logger.info(f"Janela {inicio}: {total[0]['num_vendas']} vendas, R$ {total[0]['valor_total']:.2f} "
+                            f"(atrasados descartados: {self.total.atrasados})")
+            self._ultima_fechada = inicio
+
+    def totais_por_janela(self, incluir_abertas=True):
+        """Retorna [(início da janela, num_vendas, valor_total)] em ordem cronológica"""
+        with self._lock:
+            linhas = []
+            for inicio in self.total.janelas(incluir_abertas):
+                resultado = self.total.resultado(inicio)
+                if resultado:
+                    linhas.append((inicio, resultado[0]['num_vendas'], resultado[0]['valor_total']))
+            return linhas
+
+    def consultar(self, dimensao, inicio=None):
+        """
+        Agregados por valor da dimensão em uma janela.
+
+        Args:
+            dimensao (str): Uma das dimensões configuradas
+            inicio (int): Início da janela; None = última janela fechada
+        """
+        with self._lock:
+            agregador = self.por_dimensao[dimensao]
+            if inicio is None:
+                if not agregador.fechadas:
+                    return []
+                inicio = next(reversed(agregador.fechadas))
+            return agregador.resultado(inicio)
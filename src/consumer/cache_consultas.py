@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache de resultados das consultas SQL enviadas ao broker do Pinot.
+
+Duas camadas:
+
+- LRU com TTL, indexado pelo SQL normalizado (espaços colapsados fora de
+  literais), para consultas idênticas repetidas pelo notebook e pelo
+  consumidor;
+- cache de minutos fechados para consultas agrupadas por
+  DATETRUNC('MINUTE', fromEpochMillis(timestamp)). Minutos que terminaram
+  antes de (agora - atraso de ingestão) não mudam mais e ficam guardados;
+  a consulta é reescrita para buscar só o minuto parcial do início do
+  filtro, os minutos ainda não guardados e a cauda aberta.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Configurações do cache
+CACHE_CONSULTAS_TTL_S = float(os.environ.get('CACHE_CONSULTAS_TTL_S', '10'))
+CACHE_CONSULTAS_MAX_ENTRADAS = int(os.environ.get('CACHE_CONSULTAS_MAX_ENTRADAS', '256'))
+CACHE_ATRASO_INGESTAO_MS = int(os.environ.get('CACHE_ATRASO_INGESTAO_MS', '15000'))  # Atraso até o minuto ser considerado fechado
+
+MINUTO_MS = 60000
+LIMITE_PADRAO_PINOT = 10        # LIMIT aplicado pelo broker quando a consulta não tem LIMIT
+LIMITE_REESCRITA = 100000       # LIMIT explícito das consultas reescritas
+COLUNA_TEMPO = 'timestamp'
+
+_RE_CONSULTA = re.compile(
+    r"^(?P<select>SELECT (?P<colunas>.+?) FROM \S+)"
+    r"(?: WHERE (?P<where>.+?))?"
+    r"(?: GROUP BY (?P<group>.+?))?"
+    r"(?: HAVING (?P<having>.+?))?"
+    r"(?: ORDER BY (?P<order>.+?))?"
+    r"(?: LIMIT (?P<limit>.+?))?$",
+    re.IGNORECASE | re.DOTALL
+)
+_RE_MINUTO = re.compile(
+    rf"^DATETRUNC\( ?'MINUTE' ?, ?fromEpochMillis\( ?{COLUNA_TEMPO} ?\) ?\)(?: AS (?P<alias>\w+))?$",
+    re.IGNORECASE
+)
+_RE_LIMITE_INFERIOR = re.compile(rf"^\(?{COLUNA_TEMPO} ?(?P<op>>=|>) ?(?P<valor>\d+)\)?$", re.IGNORECASE)
+_RE_AND = re.compile(r" AND ", re.IGNORECASE)
+
+def normalizar_sql(sql):
+    """Colapsa espaços fora de literais e remove ';' final, para uso como chave do cache"""
+    partes = re.split(r"('(?:[^']|'')*')", sql.strip().rstrip(';').strip())
+    for i in range(0, len(partes), 2):
+        partes[i] = re.sub(r"\s+", " ", partes[i])
+        partes[i] = re.sub(r"\( ", "(", partes[i])
+        partes[i] = re.sub(r" \)", ")", partes[i])
+    return "".join(partes).strip()
+
+def _dividir_no_nivel_zero(texto, separador=","):
+    """Divide texto pelo separador ignorando os que estão dentro de parênteses ou literais"""
+    partes, atual, profundidade, em_literal = [], [], 0, False
+    for caractere in texto:
+        if caractere == "'":
+            em_literal = not em_literal
+        elif not em_literal and caractere == "(":
+            profundidade += 1
+        elif not em_literal and caractere == ")":
+            profundidade -= 1
+        if caractere == separador and profundidade == 0 and not em_literal:
+            partes.append("".join(atual).strip())
+            atual = []
+        else:
+            atual.append(caractere)
+    partes.append("".join(atual).strip())
+    return partes
+
+def _minuto_ms(valor):
+    """Converte o valor de DATETRUNC retornado pelo broker (epoch ms ou texto) em epoch ms"""
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    texto = str(valor)
+    if texto.isdigit():
+        return int(texto)
+    data = datetime.fromisoformat(texto.replace(" ", "T"))
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return int(data.timestamp() * 1000)
+
+class _ConsultaPorMinuto:
+    """Partes de uma consulta agrupada por minuto que o cache de minutos fechados sabe reescrever"""
+
+    def __init__(self, select, demais_filtros, group, having, order_desc, indice_minuto, op, limite_inferior):
+        self.select = select
+        self.demais_filtros = demais_filtros
+        self.group = group
+        self.having = having
+        self.order_desc = order_desc
+        self.indice_minuto = indice_minuto
+        self.op = op
+        self.limite_inferior = limite_inferior
+
+    @property
+    def chave(self):
+        # Consultas que diferem só no limite inferior de tempo compartilham os minutos guardados
+        return (self.select, tuple(self.demais_filtros), self.group, self.having)
+
+    def primeiro_minuto_completo(self):
+        """Início do primeiro minuto inteiramente dentro do filtro de tempo (None = sem filtro)"""
+        if self.limite_inferior is None:
+            return None
+        if self.op == ">":
+            return (self.limite_inferior // MINUTO_MS + 1) * MINUTO_MS
+        return -(-self.limite_inferior // MINUTO_MS) * MINUTO_MS
+
+    def sql(self, intervalos, incluir_parcial, corte):
+        """
+        Monta a consulta com o filtro de tempo reescrito.
+
+        Args:
+            intervalos (list): Intervalos [inicio, fim) de minutos a buscar (inicio None = sem limite)
+            incluir_parcial (bool): Inclui o trecho entre o limite inferior e o primeiro minuto completo
+            corte (int): Início da cauda aberta, sempre buscada
+        """
+        condicoes = []
+        if incluir_parcial:
+            condicoes.append(f"({COLUNA_TEMPO} {self.op} {self.limite_inferior} "
+                             f"AND {COLUNA_TEMPO} < {self.primeiro_minuto_completo()})")
+        for inicio, fim in intervalos:
+            if inicio is None:
+                condicoes.append(f"{COLUNA_TEMPO} < {fim}")
+            else:
+                condicoes.append(f"({COLUNA_TEMPO} >= {inicio} AND {COLUNA_TEMPO} < {fim})")
+        condicoes.append(f"{COLUNA_TEMPO} >= {corte}")
+        filtros = self.demais_filtros + [f"({' OR '.join(condicoes)})"]
+        sql = f"{self.select} WHERE {' AND '.join(filtros)} GROUP BY {self.group}"
+        if self.having:
+            sql += f" HAVING {self.having}"
+        return f"{sql} LIMIT {LIMITE_REESCRITA}"
+
+    @classmethod
+    def analisar(cls, sql_normalizado):
+        """Retorna a consulta decomposta, ou None se ela não pode usar o cache de minutos"""
+        partes = _RE_CONSULTA.match(sql_normalizado)
+        if partes is None or partes.group("limit") or not partes.group("group"):
+            return None
+        if sql_normalizado.upper().count("SELECT") != 1:
+            return None
+
+        # Coluna do minuto no SELECT e na lista do GROUP BY
+        indice_minuto, alias = None, None
+        for i, coluna in enumerate(_dividir_no_nivel_zero(partes.group("colunas"))):
+            encontrada = _RE_MINUTO.match(coluna)
+            if encontrada:
+                indice_minuto, alias = i, encontrada.group("alias")
+                break
+        if indice_minuto is None:
+            return None
+        chaves_group = _dividir_no_nivel_zero(partes.group("group"))
+        if not any(_RE_MINUTO.match(chave) or chave == alias for chave in chaves_group):
+            return None
+
+        # ORDER BY só pelo minuto, que é a ordenação refeita ao juntar as linhas
+        order_desc = False
+        if partes.group("order"):
+            termos = partes.group("order").rsplit(" ", 1)
+            direcao = termos[1].upper() if len(termos) == 2 and termos[1].upper() in ("ASC", "DESC") else None
+            expressao = termos[0] if direcao else partes.group("order")
+            if not (_RE_MINUTO.match(expressao) or (alias and expressao == alias)):
+                return None
+            order_desc = direcao == "DESC"
+
+        # WHERE: conjunções simples com no máximo um limite inferior de tempo
+        op, limite_inferior, demais = None, None, []
+        if partes.group("where"):
+            where = partes.group("where")
+            if re.search(r"\bOR\b", where, re.IGNORECASE):
+                return None
+            for condicao in _RE_AND.split(where):
+                limite = _RE_LIMITE_INFERIOR.match(condicao)
+                if limite and limite_inferior is None:
+                    op, limite_inferior = limite.group("op"), int(limite.group("valor"))
+                elif re.search(rf"\b{COLUNA_TEMPO}\b", condicao, re.IGNORECASE):
+                    return None
+                else:
+                    demais.append(condicao)
+
+        return cls(partes.group("select"), demais, partes.group("group"), partes.group("having"),
+                   order_desc, indice_minuto, op, limite_inferior)
+
+class _MinutosFechados:
+    """Linhas dos minutos fechados de uma consulta e o intervalo contíguo que elas cobrem"""
+
+    def __init__(self):
+        self.linhas = {}        # início do minuto -> linhas do resultado
+        self.inicio = None      # None = desde o início da tabela
+        self.fim = None         # None = nada coberto ainda
+
+    def faltantes(self, primeiro, corte):
+        """
+        Intervalos de [primeiro, corte) ainda não cobertos; reinicia se ficariam buracos.
+
+        Minutos anteriores a primeiro são descartados: com o filtro de tempo
+        avançando (ex.: última hora), as linhas guardadas não crescem sem limite.
+        """
+        if self.fim is None or (primeiro is not None and primeiro > self.fim):
+            self.linhas, self.inicio, self.fim = {}, primeiro, primeiro
+            return [(primeiro, corte)]
+        if primeiro is not None and (self.inicio is None or primeiro > self.inicio):
+            self.linhas = {minuto: linhas for minuto, linhas in self.linhas.items() if minuto >= primeiro}
+            self.inicio = primeiro
+        intervalos = []
+        if self.inicio is not None and (primeiro is None or primeiro < self.inicio):
+            intervalos.append((primeiro, self.inicio))
+        if self.fim < corte:
+            intervalos.append((self.fim, corte))
+        return intervalos
+
+    def cobrir(self, intervalos):
+        for inicio, fim in intervalos:
+            if inicio is None or (self.inicio is not None and inicio < self.inicio):
+                self.inicio = inicio
+            self.fim = fim if self.fim is None else max(self.fim, fim)
+
+def _copiar_resultado(resultado):
+    """Cópia da resposta em que o chamador pode ordenar, cortar ou alterar as linhas sem mudar o cache"""
+    copia = dict(resultado)
+    if isinstance(copia.get("resultTable"), dict):
+        tabela = copia["resultTable"] = dict(copia["resultTable"])
+        if "rows" in tabela:
+            tabela["rows"] = [list(linha) for linha in tabela["rows"]]
+    return copia
+
+class CacheConsultas:
+    """
+    Cache na frente das consultas ao broker do Pinot (PinotClient.consultar_sql).
+
+    Consultas com LIMIT, subconsultas, OR no WHERE ou ORDER BY por outra
+    coluna usam apenas o LRU com TTL.
+
+    Args:
+        cliente: PinotClient usado para as consultas
+        ttl_s (float): Validade das entradas do LRU
+        max_entradas (int): Máximo de entradas no LRU e de consultas com minutos guardados
+        atraso_ingestao_ms (int): Atraso da ingestão em tempo real; minutos terminados
+            antes de agora - atraso são considerados fechados
+    """
+
+    def __init__(self, cliente, ttl_s=CACHE_CONSULTAS_TTL_S, max_entradas=CACHE_CONSULTAS_MAX_ENTRADAS,
+                 atraso_ingestao_ms=CACHE_ATRASO_INGESTAO_MS):
+        self.cliente = cliente
+        self.ttl_s = ttl_s
+        self.max_entradas = max_entradas
+        self.atraso_ingestao_ms = atraso_ingestao_ms
+
+        self._resultados = OrderedDict()  # SQL normalizado -> (expira em, resposta)
+        self._minutos = OrderedDict()     # chave da consulta por minuto -> _MinutosFechados
+        self._lock = threading.Lock()
+
+        self.acertos = 0
+        self.faltas = 0
+        self.consultas_reescritas = 0
+        self.minutos_reaproveitados = 0
+
+    def consultar(self, sql):
+        """
+        Executa a consulta (ou responde do cache) e retorna o JSON da resposta do broker.
+
+        O resultado é uma cópia (as linhas inclusive): alterá-lo não muda a entrada guardada.
+        Levanta requests.exceptions.RequestException em falhas de conexão ou status HTTP de erro.
+        """
+        chave = normalizar_sql(sql)
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._resultados.get(chave)
+            if entrada is not None and entrada[0] > agora:
+                self._resultados.move_to_end(chave)
+                self.acertos += 1
+                return _copiar_resultado(entrada[1])
+            self.faltas += 1
+
+        consulta = _ConsultaPorMinuto.analisar(chave)
+        if consulta is not None:
+            resultado = self._consultar_por_minuto(consulta)
+        else:
+            resultado = self._executar(chave)
+
+        if not resultado.get("exceptions"):
+            with self._lock:
+                self._resultados[chave] = (time.monotonic() + self.ttl_s, resultado)
+                self._resultados.move_to_end(chave)
+                while len(self._resultados) > self.max_entradas:
+                    self._resultados.popitem(last=False)
+            return _copiar_resultado(resultado)
+        return resultado
+
+    def _executar(self, sql):
+        resposta = self.cliente.consultar_sql(sql)
+        resposta.raise_for_status()
+        return resposta.json()
+
+    def _consultar_por_minuto(self, consulta):
+        primeiro = consulta.primeiro_minuto_completo()
+        corte = (int(time.time() * 1000) - self.atraso_ingestao_ms) // MINUTO_MS * MINUTO_MS
+
+        with self._lock:
+            minutos = self._minutos.get(consulta.chave)
+            if minutos is None:
+                minutos = self._minutos[consulta.chave] = _MinutosFechados()
+                while len(self._minutos) > self.max_entradas:
+                    self._minutos.popitem(last=False)
+            self._minutos.move_to_end(consulta.chave)
+            if primeiro is not None and primeiro >= corte:
+                intervalos = []
+                corte = primeiro
+            else:
+                intervalos = minutos.faltantes(primeiro, corte)
+
+        incluir_parcial = consulta.limite_inferior is not None and consulta.limite_inferior < primeiro
+        resultado = self._executar(consulta.sql(intervalos, incluir_parcial, corte))
+        self.consultas_reescritas += 1
+        if resultado.get("exceptions") or "resultTable" not in resultado:
+            return resultado
+
+        linhas = resultado["resultTable"]["rows"]
+        indice = consulta.indice_minuto
+        abertas = []
+        fechadas = {}
+        for linha in linhas:
+            minuto = _minuto_ms(linha[indice])
+            if minuto < corte and (primeiro is None or minuto >= primeiro):
+                fechadas.setdefault(minuto, []).append(linha)
+            else:
+                abertas.append(linha)
+
+        with self._lock:
+            # Resultado truncado não garante minutos completos: não guarda nada
+            if len(linhas) < LIMITE_REESCRITA:
+                minutos.linhas.update(fechadas)
+                minutos.cobrir(intervalos)
+            guardadas = [linha for minuto, grupo in minutos.linhas.items()
+                         if minuto < corte and (primeiro is None or minuto >= primeiro)
+                         and minuto not in fechadas for linha in grupo]
+            self.minutos_reaproveitados += len({_minuto_ms(linha[indice]) for linha in guardadas})
+
+        todas = abertas + [linha for grupo in fechadas.values() for linha in grupo] + guardadas
+        todas.sort(key=lambda linha: _minuto_ms(linha[indice]), reverse=consulta.order_desc)
+        resultado["resultTable"]["rows"] = todas[:LIMITE_PADRAO_PINOT]
+        return resultado
+
+    def invalidar(self):
+        """Descarta todo o conteúdo do cache (ex.: após recriar a tabela ou um backfill)"""
+        with self._lock:
+            self._resultados.clear()
+            self._minutos.clear()
+
+    def estatisticas(self):
+        """Retorna acertos e faltas do LRU e o reaproveitamento de minutos fechados"""
+        with self._lock:
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "entradas": len(self._resultados),
+                "consultas_reescritas": self.consultas_reescritas,
+                "minutos_reaproveitados": self.minutos_reaproveitados
+            }
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Estágio de processamento paralelo para os consumidores Kafka.
+
+Tira o processamento da thread de poll: cada partição é enviada sempre ao
+mesmo trabalhador (thread ou processo), o que preserva a ordem por partição.
+Quando a fila de uma partição enche, a partição é pausada no consumidor até
+os trabalhadores alcançarem, e os offsets só são liberados para commit
+depois que o lote correspondente termina.
+"""
+
+import os
+import zlib
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+from confluent_kafka import TopicPartition
+
+logger = logging.getLogger(__name__)
+
+# Configurações do estágio de processamento
+PROCESSAMENTO_PARALELO = os.environ.get('PROCESSAMENTO_PARALELO', '')  # '', 'thread' ou 'processo'
+NUM_TRABALHADORES = int(os.environ.get('NUM_TRABALHADORES', os.cpu_count() or 1))
+MAX_LOTES_POR_PARTICAO = int(os.environ.get('MAX_LOTES_POR_PARTICAO', '4'))  # Lotes em voo antes de pausar
+
+class EstagioProcessamento:
+    """
+    Distribui lotes de mensagens entre trabalhadores mantendo a ordem por partição.
+
+    Cada trabalhador é um executor com um único worker, portanto os lotes de
+    uma partição são executados em sequência. A função de processamento recebe
+    a lista de valores brutos (bytes) do lote e precisa ser serializável por
+    pickle quando tipo='processo'.
+
+    Args:
+        consumidor (Consumer): Consumidor usado para pausar/retomar partições
+        funcao (callable): funcao(valores) -> quantidade de registros processados
+        num_trabalhadores (int): Quantidade de threads/processos
+        tipo (str): 'thread' ou 'processo'
+        max_lotes_por_particao (int): Lotes em voo por partição antes de pausá-la
+        gerenciador_commits (GerenciadorCommits): Recebe os offsets concluídos (opcional)
+    """
+
+    def __init__(self, consumidor, funcao, num_trabalhadores=NUM_TRABALHADORES, tipo='thread',
+                 max_lotes_por_particao=MAX_LOTES_POR_PARTICAO, gerenciador_commits=None):
+        if tipo not in ('thread', 'processo'):
+            raise ValueError(f"Tipo de processamento desconhecido: {tipo}. Use 'thread' ou 'processo'")
+        executor = ThreadPoolExecutor if tipo == 'thread' else ProcessPoolExecutor
+        self.consumidor = consumidor
+        self.funcao = funcao
+        self.tipo = tipo
+        self.max_lotes_por_particao = max(1, max_lotes_por_particao)
+        self.gerenciador_commits = gerenciador_commits
+        self.trabalhadores = [executor(max_workers=1) for _ in range(max(1, num_trabalhadores))]
+
+        self._filas = {}  # (tópico, partição) -> deque de (future, último offset, quantidade)
+        self._pausadas = set()
+        self.processadas = 0
+        self.erros = 0
+
+        logger.info(f"Estágio de processamento: {len(self.trabalhadores)} trabalhadores ({tipo}), "
+                    f"até {self.max_lotes_por_particao} lotes em voo por partição")
+
+    def trabalhador_da_particao(self, topico, particao):
+        """Índice fixo do trabalhador responsável pela partição"""
+        return (zlib.crc32(topico.encode('utf-8')) + particao) % len(self.trabalhadores)
+
+    def submeter(self, mensagens):
+        """
+        Agrupa as mensagens por partição (mantendo a ordem) e envia cada grupo ao seu trabalhador.
+
+        Mensagens com erro devem ser tratadas antes; aqui elas são ignoradas.
+        """
+        grupos = {}
+        for msg in mensagens:
+            if msg.error():
+                continue
+            grupos.setdefault((msg.topic(), msg.partition()), []).append(msg)
+
+        for (topico, particao), grupo in grupos.items():
+            trabalhador = self.trabalhadores[self.trabalhador_da_particao(topico, particao)]
+            futuro = trabalhador.submit(self.funcao, [msg.value() for msg in grupo])
+            fila = self._filas.setdefault((topico, particao), deque())
+            fila.append((futuro, grupo[-1].offset(), len(grupo)))
+
+            # Contrapressão: pausar a partição quando a fila enche
+            if len(fila) >= self.max_lotes_por_particao and (topico, particao) not in self._pausadas:
+                self.consumidor.pause([TopicPartition(topico, particao)])
+                self._pausadas.add((topico, particao))
+
+    def coletar(self):
+        """
+        Recolhe os lotes concluídos, na ordem de cada partição, e libera seus offsets.
+
+        Retoma as partições pausadas cuja fila caiu para a metade do limite.
+        """
+        for chave, fila in self._filas.items():
+            while fila and fila[0][0].done():
+                self._concluir(chave, fila.popleft())
+
+            if chave in self._pausadas and len(fila) <= self.max_lotes_por_particao // 2:
+                self.consumidor.resume([TopicPartition(*chave)])
+                self._pausadas.discard(chave)
+
+        if self.gerenciador_commits is not None:
+            self.gerenciador_commits.talvez_commitar()
+
+    def drenar(self, particoes=None):
+        """
+        Aguarda os lotes em voo terminarem e libera seus offsets.
+
+        Args:
+            particoes (list): TopicPartitions a drenar; None = todas
+        """
+        chaves = list(self._filas) if particoes is None else [(p.topic, p.partition) for p in particoes]
+        for chave in chaves:
+            fila = self._filas.get(chave)
+            if not fila:
+                continue
+            wait([item[0] for item in fila])
+            while fila:
+                self._concluir(chave, fila.popleft())
+
+    def ao_revogar(self, consumidor, particoes):
+        """Callback on_revoke: termina os lotes das partições revogadas antes do commit"""
+        self.drenar(particoes)
+        for p in particoes:
+            self._filas.pop((p.topic, p.partition), None)
+            self._pausadas.discard((p.topic, p.partition))
+        if self.gerenciador_commits is not None:
+            self.gerenciador_commits.ao_revogar(consumidor, particoes)
+
+    def encerrar(self):
+        """Drena todas as partições e finaliza os trabalhadores"""
+        self.drenar()
+        for trabalhador in self.trabalhadores:
+            trabalhador.shutdown(wait=True)
+
+    def _concluir(self, chave, item):
+        futuro, ultimo_offset, quantidade = item
+        try:
+            self.processadas += futuro.result()
+        except Exception as e:
+            self.erros += 1
+            logger.error(f"Erro ao processar lote de {quantidade} mensagens da partição {chave[1]}: {str(e)}")
+        # Lote tratado (com ou sem erro): offset liberado para commit, como no loop síncrono
+        if self.gerenciador_commits is not None:
+            self.gerenciador_commits.registrar_offset(chave[0], chave[1], ultimo_offset, quantidade)
+
+    def em_voo(self):
+        """Quantidade de lotes submetidos e ainda não concluídos"""
+        return sum(len(fila) for fila in self._filas.values())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fila de mensagens rejeitadas (dead-letter queue) dos consumidores de vendas.
+
+Mensagens que não decodificam ou que falham na validação (schemas/validacao.py)
+são acumuladas durante o lote e enviadas juntas ao tópico DLQ, com o valor e
+a chave originais e os metadados do erro nos headers:
+
+    dlq.motivo         motivo da rejeição ('decodificacao', 'tipo:preco', 'dominio:estado', ...)
+    dlq.detalhe        mensagem de erro, quando houver
+    dlq.estagio        estágio que rejeitou ('consumidor', 'pipeline')
+    dlq.topico         tópico, partição, offset e timestamp da mensagem original
+    dlq.particao
+    dlq.offset
+    dlq.timestamp
+
+Para reprocessar, corrija a causa e reenvie o valor ao tópico de origem;
+os headers identificam de onde cada mensagem veio.
+"""
+
+import os
+import logging
+from collections import Counter
+
+from confluent_kafka import Producer
+
+from comum import metricas
+
+logger = logging.getLogger(__name__)
+
+# Configurações Kafka
+KAFKA_BOOTSTRAP_SERVERS = os.environ.get('KAFKA_BOOTSTRAP_SERVERS', 'localhost:29092')
+
+# Configurações da DLQ
+KAFKA_TOPICO_DLQ = os.environ.get('KAFKA_TOPICO_DLQ', 'vendas-dlq')
+DLQ_HABILITADA = os.environ.get('DLQ_HABILITADA', 'true').lower() == 'true'
+DLQ_FLUSH_TIMEOUT_S = float(os.environ.get('DLQ_FLUSH_TIMEOUT_S', '10'))
+
+# Métricas da DLQ (servidas em /metrics com METRICAS_PORTA)
+MENSAGENS_DLQ = metricas.contador('vendas_dlq_total', 'Mensagens enviadas à DLQ por motivo', ['motivo'])
+
+class ErroEnvioDLQ(Exception):
+    """Mensagens rejeitadas que não foram confirmadas pelo tópico DLQ"""
+
+class FilaErros:
+    """
+    Acumula as mensagens rejeitadas de um lote e as envia ao tópico DLQ.
+
+    Com aguardar=True em enviar() o produtor é esvaziado antes de retornar,
+    para que os offsets das mensagens rejeitadas só sejam confirmados depois
+    que elas estão na DLQ; se alguma não for confirmada, enviar() levanta
+    ErroEnvioDLQ e o chamador não deve confirmar os offsets. Em um produtor
+    transacional, use aguardar=False: as mensagens da DLQ entram na transação
+    aberta e só são contadas (enviadas, vendas_dlq_total) quando o chamador
+    informa o resultado dela com confirmar_transacao() ou descartar_transacao().
+
+    Args:
+        produtor (Producer): Produtor Kafka usado para a DLQ
+        topico (str): Tópico DLQ
+        estagio (str): Estágio que rejeita as mensagens (header dlq.estagio)
+    """
+
+    def __init__(self, produtor, topico=KAFKA_TOPICO_DLQ, estagio='consumidor'):
+        self.produtor = produtor
+        self.topico = topico
+        self.estagio = estagio.encode('utf-8')
+        self._pendentes = []
+        self._na_transacao = Counter()  # Motivos enviados na transação aberta (aguardar=False)
+        self.enviadas = 0
+        self.erros_entrega = 0
+
+    def adicionar(self, msg, motivo, detalhe=None):
+        """Guarda uma mensagem rejeitada até o próximo enviar()"""
+        self._pendentes.append((msg, motivo, detalhe))
+
+    def __len__(self):
+        return len(self._pendentes)
+
+    def enviar(self, aguardar=True):
+        """
+        Envia as mensagens pendentes ao tópico DLQ.
+
+        Returns:
+            int: Mensagens enviadas
+        
+        Raises:
+            ErroEnvioDLQ: Com aguardar=True, se alguma mensagem não foi
+                confirmada pelo broker (falha de entrega ou timeout do flush)
+        """
+        if not self._pendentes:
+            return 0
+        pendentes, self._pendentes = self._pendentes, []
+        erros_antes = self.erros_entrega
+        for msg, motivo, detalhe in pendentes:
+            _, timestamp = msg.timestamp()
+            headers = [
+                ('dlq.motivo', motivo.encode('utf-8')),
+                ('dlq.estagio', self.estagio),
+                ('dlq.topico', msg.topic().encode('utf-8')),
+                ('dlq.particao', str(msg.partition()).encode('ascii')),
+                ('dlq.offset', str(msg.offset()).encode('ascii')),
+                ('dlq.timestamp', str(timestamp).encode('ascii')),
+            ]
+            if detalhe:
+                headers.append(('dlq.detalhe', str(detalhe)[:1000].encode('utf-8')))
+            while True:
+                try:
+                    self.produtor.produce(self.topico, value=msg.value(), key=msg.key(), headers=headers,
+                                          on_delivery=self._ao_entregar)
+                    break
+                except BufferError:
+                    self.produtor.poll(0.1)
+        if aguardar:
+            restantes = self.produtor.flush(DLQ_FLUSH_TIMEOUT_S)
+            falhas = self.erros_entrega - erros_antes
+            if restantes or falhas:
+                raise ErroEnvioDLQ(f"{len(pendentes)} mensagens rejeitadas sem confirmação de {self.topico}: "
+                                   f"{falhas} falhas de entrega, {restantes} pendentes após {DLQ_FLUSH_TIMEOUT_S}s")
+            self._contar(Counter(motivo for _, motivo, _ in pendentes))
+        else:
+            self.produtor.poll(0)
+            self._na_transacao.update(motivo for _, motivo, _ in pendentes)
+        logger.warning(f"{len(pendentes)} mensagens rejeitadas enviadas a {self.topico}")
+        return len(pendentes)
+
+    def confirmar_transacao(self):
+        """Conta as mensagens enviadas com aguardar=False depois que a transação foi confirmada"""
+        self._contar(self._na_transacao)
+        self._na_transacao = Counter()
+
+    def descartar_transacao(self):
+        """Esquece as mensagens enviadas com aguardar=False em uma transação abortada"""
+        self._na_transacao = Counter()
+
+    def _contar(self, motivos):
+        for motivo, quantidade in motivos.items():
+            MENSAGENS_DLQ.rotulado(motivo).incrementar(quantidade)
+        self.enviadas += sum(motivos.values())
+
+    def _ao_entregar(self, err, msg):
+        if err is not None:
+            self.erros_entrega += 1
+            logger.error(f"Erro ao enviar mensagem à DLQ {self.topico}: {err}")
+
+def criar_fila_erros(estagio='consumidor', topico=KAFKA_TOPICO_DLQ):
+    """FilaErros com um produtor idempotente próprio (consumidores sem produtor)"""
+    produtor = Producer({
+        'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
+        'enable.idempotence': True,
+        'linger.ms': 5
+    })
+    return FilaErros(produtor, topico, estagio)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Commit manual de offsets (at-least-once) para os consumidores Kafka.
+
+Com o auto-commit do librdkafka, offsets de mensagens ainda não processadas
+podem ser confirmados (perda em caso de queda) e até 5 s de mensagens já
+processadas podem ser reprocessados. O GerenciadorCommits desativa o
+auto-commit e só confirma offsets depois que o lote foi processado.
+"""
+
+import os
+import time
+import logging
+from confluent_kafka import TopicPartition, KafkaException
+
+logger = logging.getLogger(__name__)
+
+# Configurações de commit
+COMMIT_MANUAL = os.environ.get('COMMIT_MANUAL', 'true').lower() == 'true'
+COMMIT_A_CADA_MSGS = int(os.environ.get('COMMIT_A_CADA_MSGS', '5000'))  # Commit após N mensagens
+COMMIT_INTERVALO_MS = int(os.environ.get('COMMIT_INTERVALO_MS', '1000'))  # ... ou após T ms
+
+class GerenciadorCommits:
+    """
+    Acumula os offsets processados e os confirma em lote.
+
+    Commits assíncronos são disparados a cada commit_a_cada mensagens ou
+    intervalo_ms milissegundos; commits síncronos são feitos na revogação
+    de partições e no encerramento (commit_final). Latência e contagem de
+    commits ficam disponíveis em estatisticas().
+
+    Uso:
+        gerenciador = GerenciadorCommits()
+        consumidor = Consumer({..., **gerenciador.config_consumidor()})
+        gerenciador.vincular(consumidor)
+        consumidor.subscribe([topico], on_revoke=gerenciador.ao_revogar)
+    """
+
+    def __init__(self, commit_a_cada=COMMIT_A_CADA_MSGS, intervalo_ms=COMMIT_INTERVALO_MS):
+        self.commit_a_cada = commit_a_cada
+        self.intervalo_s = intervalo_ms / 1000.0
+        self.consumidor = None
+
+        self._offsets = {}  # (tópico, partição) -> próximo offset a consumir
+        self._pendentes = 0
+        self._ultimo_commit = time.monotonic()
+        self._em_voo = {}  # chave dos offsets -> instante do envio (commits assíncronos)
+
+        self.commits_assincronos = 0
+        self.commits_sincronos = 0
+        self.erros = 0
+        self.mensagens_confirmadas = 0
+        self._latencia_total_ms = 0.0
+        self._latencias_medidas = 0
+        self.latencia_max_ms = 0.0
+
+    def config_consumidor(self):
+        """Opções a incluir na configuração do Consumer"""
+        return {
+            'enable.auto.commit': False,
+            'on_commit': self._on_commit
+        }
+
+    def vincular(self, consumidor):
+        """Associa o consumidor cujos offsets serão confirmados"""
+        self.consumidor = consumidor
+
+    def registrar(self, mensagens):
+        """
+        Marca mensagens como processadas e faz commit assíncrono se algum limite foi atingido.
+
+        Args:
+            mensagens (list): Mensagens Kafka já processadas (erros são ignorados)
+        """
+        offsets = self._offsets
+        for msg in mensagens:
+            if msg.error():
+                continue
+            offsets[(msg.topic(), msg.partition())] = msg.offset() + 1
+            self._pendentes += 1
+        self.talvez_commitar()
+
+    def registrar_offset(self, topico, particao, offset, quantidade=1):
+        """
+        Marca como processadas as mensagens de uma partição até offset (inclusive).
+
+        Usado quando as mensagens foram processadas fora da thread de poll e
+        só o último offset do lote é conhecido. Não dispara commit.
+        """
+        self._offsets[(topico, particao)] = offset + 1
+        self._pendentes += quantidade
+
+    def talvez_commitar(self):
+        """Dispara um commit assíncrono se há N mensagens pendentes ou passaram T ms"""
+        if not self._offsets:
+            return
+        if (self._pendentes >= self.commit_a_cada
+                or time.monotonic() - self._ultimo_commit >= self.intervalo_s):
+            self._commitar(assincrono=True)
+
+    def commit_final(self):
+        """Commit síncrono de tudo o que foi processado (usar no finally antes de close())"""
+        if self._offsets:
+            self._commitar(assincrono=False)
+        logger.info(f"Commits: {self.estatisticas()}")
+
+    def ao_revogar(self, consumidor, particoes):
+        """Callback on_revoke: confirma de forma síncrona antes de perder as partições"""
+        if self._offsets:
+            logger.info(f"Partições revogadas: {[p.partition for p in particoes]}. Confirmando offsets...")
+            self._commitar(assincrono=False)
+
+    def _commitar(self, assincrono):
+        offsets = [TopicPartition(t, p, o) for (t, p), o in self._offsets.items()]
+        confirmadas = self._pendentes
+        self._offsets = {}
+        self._pendentes = 0
+        self._ultimo_commit = time.monotonic()
+
+        try:
+            if assincrono:
+                self._em_voo[self._chave(offsets)] = (time.monotonic(), confirmadas)
+                self.consumidor.commit(offsets=offsets, asynchronous=True)
+                self.commits_assincronos += 1
+            else:
+                inicio = time.monotonic()
+                self.consumidor.commit(offsets=offsets, asynchronous=False)
+                self._registrar_latencia((time.monotonic() - inicio) * 1000)
+                self.commits_sincronos += 1
+                self.mensagens_confirmadas += confirmadas
+        except KafkaException as e:
+            self.erros += 1
+            logger.error(f"Erro ao confirmar offsets {offsets}: {e}")
+
+    def _on_commit(self, err, particoes):
+        """Callback do librdkafka com o resultado dos commits"""
+        enviado = self._em_voo.pop(self._chave(particoes), None)
+        if err is not None:
+            self.erros += 1
+            logger.error(f"Erro no commit de offsets: {err}")
+            return
+        if enviado is not None:
+            inicio, confirmadas = enviado
+            self._registrar_latencia((time.monotonic() - inicio) * 1000)
+            self.mensagens_confirmadas += confirmadas
+
+    @staticmethod
+    def _chave(particoes):
+        return frozenset((p.topic, p.partition, p.offset) for p in particoes)
+
+    def _registrar_latencia(self, latencia_ms):
+        self._latencia_total_ms += latencia_ms
+        self._latencias_medidas += 1
+        self.latencia_max_ms = max(self.latencia_max_ms, latencia_ms)
+
+    def estatisticas(self):
+        """Retorna contagens e latências dos commits realizados até agora"""
+        media = self._latencia_total_ms / self._latencias_medidas if self._latencias_medidas else 0.0
+        return {
+            "commits_assincronos": self.commits_assincronos,
+            "commits_sincronos": self.commits_sincronos,
+            "erros": self.erros,
+            "em_voo": len(self._em_voo),
+            "mensagens_confirmadas": self.mensagens_confirmadas,
+            "latencia_media_ms": round(media, 2),
+            "latencia_max_ms": round(self.latencia_max_ms, 2)
+        }
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gerador da configuração de índices da tabela vendas no Apache Pinot.
+
+Deriva os índices do schema do Pinot (gerado de src/schemas/vendas_schema.json) e de um arquivo com
+as consultas representativas do workload (config/workload_consultas.sql):
+
+- índice invertido nas dimensões de baixa cardinalidade usadas em GROUP BY
+  ou filtros de igualdade;
+- star-tree sobre essas dimensões com as agregações usadas (COUNT, SUM, ...);
+- índice de intervalo no campo de tempo e nas colunas filtradas por faixa;
+- noDictionary (e bloom filter, se filtradas por igualdade) nas dimensões de
+  alta cardinalidade, como id_venda e email_cliente.
+
+Uso:
+    python src/consumer/indices_tabela.py            # imprime o tableIndexConfig gerado
+    python src/consumer/indices_tabela.py --diff     # compara com a tabela no Pinot
+    python src/consumer/indices_tabela.py --aplicar  # atualiza a tabela e recarrega os segmentos
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+from collections import Counter
+
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.vendas import schema_pinot
+from schemas.dominios import valores_dimensoes
+from pinot_client import PinotClient
+from cache_consultas import normalizar_sql
+from comum.logs import configurar_logs
+
+logger = logging.getLogger(__name__)
+
+# Caminhos do projeto
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CAMINHO_WORKLOAD = os.environ.get('PINOT_WORKLOAD', os.path.join(RAIZ_PROJETO, 'config', 'workload_consultas.sql'))
+
+# Dimensões com até este número de valores distintos são de baixa cardinalidade
+LIMITE_BAIXA_CARDINALIDADE = int(os.environ.get('LIMITE_BAIXA_CARDINALIDADE', '1000'))
+STAR_TREE_MAX_FOLHA = int(os.environ.get('STAR_TREE_MAX_FOLHA', '10000'))
+
+# Cardinalidades esperadas a partir dos domínios do gerador (schemas/dominios.py);
+# colunas ausentes são consideradas de alta cardinalidade
+CARDINALIDADES_ESTIMADAS = {campo: len(valores) for campo, valores in valores_dimensoes().items()}
+
+# Chaves do tableIndexConfig controladas pelo gerador
+CHAVES_INDICES = (
+    "invertedIndexColumns",
+    "rangeIndexColumns",
+    "noDictionaryColumns",
+    "bloomFilterColumns",
+    "starTreeIndexConfigs",
+    "enableDynamicStarTreeCreation",
+)
+
+_RE_AGREGACAO = re.compile(r"\b(COUNT|SUM|AVG|MIN|MAX)\((\*|\w+)\)", re.IGNORECASE)
+_RE_CLAUSULAS = re.compile(
+    r"\bWHERE (?P<where>.+?)(?= GROUP BY | ORDER BY | LIMIT |$)|\bGROUP BY (?P<group>.+?)(?= HAVING | ORDER BY | LIMIT |$)",
+    re.IGNORECASE
+)
+
+def carregar_workload(caminho=CAMINHO_WORKLOAD):
+    """Lê as consultas do arquivo de workload (separadas por ';', comentários com --)"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        texto = "\n".join(linha.split("--", 1)[0] for linha in f)
+    return [normalizar_sql(sql) for sql in texto.split(";") if sql.strip()]
+
+def analisar_workload(consultas, colunas):
+    """
+    Conta o uso das colunas do schema no workload.
+
+    Returns:
+        dict: Counters 'agrupamento', 'igualdade' e 'intervalo' por coluna e o
+            conjunto 'agregacoes' de pares (função, coluna)
+    """
+    uso = {"agrupamento": Counter(), "igualdade": Counter(), "intervalo": Counter(), "agregacoes": set()}
+    padroes = {coluna: re.compile(rf"\b{re.escape(coluna)}\b") for coluna in colunas}
+
+    for sql in consultas:
+        for funcao, coluna in _RE_AGREGACAO.findall(sql):
+            uso["agregacoes"].add((funcao.upper(), coluna))
+        for clausula in _RE_CLAUSULAS.finditer(sql):
+            if clausula.group("group"):
+                for coluna, padrao in padroes.items():
+                    if padrao.search(clausula.group("group")):
+                        uso["agrupamento"][coluna] += 1
+                continue
+            for predicado in re.split(r" AND | OR ", clausula.group("where"), flags=re.IGNORECASE):
+                for coluna, padrao in padroes.items():
+                    if not padrao.search(predicado):
+                        continue
+                    if re.search(rf"\b{coluna}\b ?(=|IN\b)", predicado, re.IGNORECASE):
+                        uso["igualdade"][coluna] += 1
+                    elif re.search(rf"\b{coluna}\b ?(<|>|BETWEEN\b)", predicado, re.IGNORECASE):
+                        uso["intervalo"][coluna] += 1
+    return uso
+
+def gerar_config_indices(schema=None, consultas=None, cardinalidades=CARDINALIDADES_ESTIMADAS):
+    """
+    Gera as chaves de índices do tableIndexConfig para o schema e o workload.
+
+    Args:
+        schema (dict): Schema do Pinot; padrão: gerado de vendas_schema.json
+        consultas (list): Consultas SQL do workload; padrão: config/workload_consultas.sql
+        cardinalidades (dict): Valores distintos esperados por coluna
+
+    Returns:
+        dict: Subconjunto do tableIndexConfig com as chaves de CHAVES_INDICES
+    """
+    schema = schema if schema is not None else schema_pinot()
+    consultas = consultas if consultas is not None else carregar_workload()
+
+    dimensoes = [c["name"] for c in schema.get("dimensionFieldSpecs", [])]
+    metricas = [c["name"] for c in schema.get("metricFieldSpecs", [])]
+    tempo = [c["name"] for c in schema.get("dateTimeFieldSpecs", []) if c["dataType"] in ("LONG", "INT", "TIMESTAMP")]
+    uso = analisar_workload(consultas, dimensoes + metricas + tempo)
+
+    def baixa_cardinalidade(coluna):
+        return cardinalidades.get(coluna, float('inf')) <= LIMITE_BAIXA_CARDINALIDADE
+
+    usadas = set(uso["agrupamento"]) | set(uso["igualdade"])
+    invertidas = sorted(d for d in dimensoes if d in usadas and baixa_cardinalidade(d))
+    # Dicionário só compensa em colunas com poucos valores distintos ou agrupadas
+    sem_dicionario = sorted(d for d in dimensoes if not baixa_cardinalidade(d) and d not in uso["agrupamento"])
+    bloom = sorted(d for d in sem_dicionario if d in uso["igualdade"])
+    intervalo = sorted(set(tempo) | {c for c in uso["intervalo"] if c in metricas or c in tempo})
+
+    config = {
+        "invertedIndexColumns": invertidas,
+        "rangeIndexColumns": intervalo,
+        "noDictionaryColumns": sem_dicionario,
+        "bloomFilterColumns": bloom,
+        "starTreeIndexConfigs": [],
+        "enableDynamicStarTreeCreation": False,
+    }
+
+    # Star-tree: dimensões agrupadas de baixa cardinalidade, da maior para a menor cardinalidade
+    dimensoes_arvore = sorted((d for d in invertidas if d in uso["agrupamento"]),
+                              key=lambda d: (-cardinalidades.get(d, 0), d))
+    pares = sorted(f"{funcao}__{coluna}" for funcao, coluna in uso["agregacoes"]
+                   if coluna == "*" and funcao == "COUNT" or coluna in metricas)
+    if dimensoes_arvore and pares:
+        config["starTreeIndexConfigs"] = [{
+            "dimensionsSplitOrder": dimensoes_arvore,
+            "skipStarNodeCreationForDimensions": [],
+            "functionColumnPairs": pares,
+            "maxLeafRecords": STAR_TREE_MAX_FOLHA
+        }]
+        config["enableDynamicStarTreeCreation"] = True
+    return config
+
+def aplicar_indices(table_config, indices=None):
+    """Inclui as chaves de índices geradas no tableIndexConfig de uma configuração de tabela"""
+    indices = indices if indices is not None else gerar_config_indices()
+    table_config.setdefault("tableIndexConfig", {}).update(indices)
+    return table_config
+
+def config_tabela_realtime(tabela, topico, brokers_kafka, serializador, indices=None):
+    """
+    Configuração da tabela REALTIME de vendas, com os índices gerados a partir do workload.
+
+    Args:
+        tabela (str): Nome da tabela e do schema no Pinot
+        topico (str): Tópico Kafka ingerido pela tabela
+        brokers_kafka (str): Endereço do Kafka visto pelo Pinot (ex.: kafka:9092)
+        serializador: Serializador das mensagens do tópico (define o decodificador do Pinot)
+        indices (dict): Chaves de índices; padrão: gerar_config_indices()
+    """
+    streams = {
+        "streamType": "kafka",
+        "stream.kafka.consumer.type": "lowlevel",
+        "stream.kafka.topic.name": topico,
+        "stream.kafka.consumer.factory.class.name": "org.apache.pinot.plugin.stream.kafka20.KafkaConsumerFactory",
+        "stream.kafka.broker.list": brokers_kafka,
+        "realtime.segment.flush.threshold.time": "3600000",
+        "realtime.segment.flush.threshold.size": "500000",
+        "stream.kafka.consumer.prop.auto.offset.reset": "smallest",
+        # Só mensagens de transações confirmadas (tópico curado); sem efeito em tópicos não transacionais
+        "stream.kafka.isolation.level": "read_committed"
+    }
+    # Decodificador do Pinot correspondente ao formato das mensagens
+    streams.update(serializador.config_decodificador_pinot())
+    return aplicar_indices({
+        "tableName": tabela,
+        "tableType": "REALTIME",
+        "segmentsConfig": {
+            "timeColumnName": "timestamp",
+            "timeType": "MILLISECONDS",
+            "replication": "1",
+            "schemaName": tabela
+        },
+        "tenants": {},
+        "tableIndexConfig": {
+            "loadMode": "MMAP",
+            "streamConfigs": streams
+        },
+        "metadata": {
+            "customConfigs": {}
+        }
+    }, indices)
+
+def diferencas(config_atual, indices):
+    """
+    Compara o tableIndexConfig de uma tabela com os índices propostos.
+
+    Returns:
+        list: Tuplas (chave, valor atual, valor proposto) das chaves que mudam
+    """
+    atual = config_atual.get("tableIndexConfig", {})
+    mudancas = []
+    for chave in CHAVES_INDICES:
+        valor_atual = atual.get(chave)
+        proposto = indices.get(chave)
+        if isinstance(valor_atual, list) and all(isinstance(v, str) for v in valor_atual):
+            valor_atual = sorted(valor_atual)
+        if (valor_atual or None) != (proposto or None):
+            mudancas.append((chave, valor_atual, proposto))
+    return mudancas
+
+def obter_config_tabela(cliente, tabela, tipo="REALTIME"):
+    """Retorna a configuração atual da tabela no controller (None se não existe)"""
+    resposta = cliente.get_controller(f"/tables/{tabela}?type={tipo.lower()}")
+    resposta.raise_for_status()
+    return resposta.json().get(tipo.upper())
+
+def atualizar_tabela(cliente, tabela, tipo="REALTIME", indices=None, recarregar=True):
+    """
+    Atualiza os índices de uma tabela existente (PUT /tables) e recarrega os segmentos.
+
+    Returns:
+        list: Diferenças aplicadas (vazia se a tabela já estava atualizada)
+    """
+    indices = indices if indices is not None else gerar_config_indices()
+    config = obter_config_tabela(cliente, tabela, tipo)
+    if config is None:
+        raise ValueError(f"Tabela {tabela}_{tipo.upper()} não encontrada")
+    mudancas = diferencas(config, indices)
+    if not mudancas:
+        logger.info(f"Índices de {tabela}_{tipo.upper()} já estão atualizados")
+        return mudancas
+
+    aplicar_indices(config, indices)
+    cliente.put_controller(f"/tables/{tabela}", json=config).raise_for_status()
+    logger.info(f"Tabela {tabela}_{tipo.upper()} atualizada: {[chave for chave, _, _ in mudancas]}")
+    if recarregar:
+        # Segmentos existentes só ganham os novos índices após o reload
+        cliente.post_controller(f"/segments/{tabela}_{tipo.upper()}/reload").raise_for_status()
+        logger.info(f"Recarga dos segmentos de {tabela}_{tipo.upper()} solicitada")
+    return mudancas
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera e aplica os índices da tabela vendas no Pinot")
+    parser.add_argument("--workload", default=CAMINHO_WORKLOAD, help="Arquivo com as consultas do workload")
+    parser.add_argument("--tabela", default=os.environ.get('PINOT_TABLE', 'vendas'))
+    parser.add_argument("--tipo", default="REALTIME", choices=["REALTIME", "OFFLINE"])
+    parser.add_argument("--controller", default=os.environ.get('PINOT_CONTROLLER_URL', 'http://localhost:9000'))
+    acao = parser.add_mutually_exclusive_group()
+    acao.add_argument("--diff", action="store_true", help="Compara com a configuração da tabela no Pinot")
+    acao.add_argument("--aplicar", action="store_true", help="Atualiza a tabela e recarrega os segmentos")
+    args = parser.parse_args()
+
+    configurar_logs()
+    indices = gerar_config_indices(consultas=carregar_workload(args.workload))
+
+    if not (args.diff or args.aplicar):
+        print(json.dumps(indices, indent=2, ensure_ascii=False))
+        return
+
+    cliente = PinotClient(args.controller, os.environ.get('PINOT_BROKER_URL', 'http://localhost:8099'))
+    try:
+        if args.aplicar:
+            atualizar_tabela(cliente, args.tabela, args.tipo, indices)
+            return
+        config = obter_config_tabela(cliente, args.tabela, args.tipo)
+        if config is None:
+            logger.error(f"Tabela {args.tabela}_{args.tipo} não encontrada")
+            sys.exit(1)
+        mudancas = diferencas(config, indices)
+        if not mudancas:
+            print("Sem diferenças")
+        for chave, atual, proposto in mudancas:
+            print(f"{chave}:\n  atual:    {json.dumps(atual, ensure_ascii=False)}\n"
+                  f"  proposto: {json.dumps(proposto, ensure_ascii=False)}")
+    finally:
+        cliente.fechar()
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,29 @@
 Consumidor Kafka para ler e processar mensagens de vendas em tempo real.
 """
 
-import json
 import time
 import signal
+import asyncio
+import functools
 import sys
 import logging
-from confluent_kafka import Consumer, KafkaError, KafkaException
+from confluent_kafka import Consumer, KafkaError, KafkaException, TopicPartition
 import os
 
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.serializadores import obter_serializador, ErroDesserializacao
+from schemas.validacao import compilar_validador, separar_invalidas
+from comum import metricas
+from comum.logs import configurar_logs, LogAmostrado
+from gerenciador_commits import GerenciadorCommits, COMMIT_MANUAL
+from estagio_processamento import EstagioProcessamento, PROCESSAMENTO_PARALELO
+from runtime_async import RUNTIME_CONSUMIDOR, executar as executar_async
+from agregacao_janelas import AgregacaoStreaming, AGREGACAO_JANELAS
+from fila_erros import criar_fila_erros, ErroEnvioDLQ, DLQ_HABILITADA
+
 # Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configurar_logs()
 logger = logging.getLogger(__name__)
 
 # Configurações Kafka
@@ -26,9 +36,49 @@ KAFKA_TOPIC = os.environ.get('KAFKA_TOPIC', 'vendas-tempo-real')
 KAFKA_GROUP_ID = os.environ.get('KAFKA_GROUP_ID', 'grupo-consumidor-vendas')
 KAFKA_AUTO_OFFSET_RESET = os.environ.get('KAFKA_AUTO_OFFSET_RESET', 'earliest')
 
+# Configurações do modo de consumo em lote (MODO_CONSUMO=lote)
+MODO_CONSUMO = os.environ.get('MODO_CONSUMO', 'mensagem')  # 'mensagem' ou 'lote'
+TAMANHO_LOTE = int(os.environ.get('TAMANHO_LOTE', '500'))  # Máximo de mensagens por lote
+LATENCIA_MAX_MS = int(os.environ.get('LATENCIA_MAX_MS', '100'))  # Espera máxima para completar um lote
+INTERVALO_RELATORIO_S = 5  # Intervalo entre relatórios de vazão no modo lote
+
+# Validação das vendas (schemas/validacao.py); inválidas vão para a DLQ com DLQ_HABILITADA
+VALIDACAO_VENDAS = os.environ.get('VALIDACAO_VENDAS', 'true').lower() == 'true'
+
+# Métricas do consumidor (servidas em /metrics com METRICAS_PORTA)
+VENDAS_CONSUMIDAS = metricas.contador('vendas_consumidas_total', 'Mensagens de venda recebidas do Kafka')
+BYTES_CONSUMIDOS = metricas.contador('vendas_consumidas_bytes_total', 'Bytes de mensagens de venda recebidas do Kafka')
+ERROS_CONSUMO = metricas.contador('vendas_erros_consumo_total', 'Mensagens descartadas por tipo de erro', ['tipo'])
+TEMPO_PROCESSAMENTO = metricas.histograma('vendas_processamento_segundos',
+                                          'Tempo de decodificação e processamento por mensagem ou lote', ['modo'])
+VENDAS_VALIDADAS = metricas.contador('vendas_validadas_total', 'Vendas decodificadas que passaram pela validação')
+VENDAS_INVALIDAS = metricas.contador('vendas_invalidas_total', 'Vendas rejeitadas pela validação por motivo', ['motivo'])
+TEMPO_VALIDACAO = metricas.histograma('vendas_validacao_segundos', 'Tempo de validação por lote')
+_erros_decodificacao = ERROS_CONSUMO.rotulado('decodificacao')
+_erros_validacao = ERROS_CONSUMO.rotulado('validacao')
+_vendas_validadas = VENDAS_VALIDADAS.rotulado()
+_tempo_validacao = TEMPO_VALIDACAO.rotulado()
+_erros_kafka = ERROS_CONSUMO.rotulado('kafka')
+_tempo_mensagem = TEMPO_PROCESSAMENTO.rotulado('mensagem')
+_tempo_lote = TEMPO_PROCESSAMENTO.rotulado('lote')
+
 # Controle para interrupções
 running = True
 
+# Agregação em janelas em memória (AGREGACAO_JANELAS=true); criada em main()
+agregacao = None
+
+# Lag por partição (metricas.MonitorLag); criado em main()
+monitor_lag = None
+
+# Dead-letter queue das mensagens rejeitadas (fila_erros.FilaErros); criada em main()
+fila_erros = None
+
+# Logs por mensagem: processamento limitado a LOG_MAX_POR_S linhas por segundo, progresso a cada 10
+_log_processamento = LogAmostrado(logger)
+_log_progresso = LogAmostrado(logger, a_cada=10)
+_log_invalidas = LogAmostrado(logger)
+
 def processar_mensagem(msg_value):
     """
     Processa uma mensagem de venda.
@@ -36,33 +86,145 @@ def processar_mensagem(msg_value):
     armazenamento em banco de dados, envio para outros sistemas, etc.
     
     Args:
-        msg_value (dict): Dados da venda
+        msg_value (Venda): Dados da venda
     """
     # Exemplo de processamento simples
-    categoria = msg_value.get('categoria')
-    valor = msg_value.get('valor_total', 0)
-    data_hora = msg_value.get('data_hora')
+    categoria = msg_value.categoria
+    valor = msg_value.valor_total
+    data_hora = msg_value.data_hora
     
-    logger.info(f"Processando venda: {data_hora} - {categoria} - R$ {valor:.2f}")
+    _log_processamento.info("Processando venda: %s - %s - R$ %.2f", data_hora, categoria, valor)
     
     # Aqui pode ser adicionada a lógica para:
     # - Validar os dados
-    # - Transformar os dados (ETL)
+    # - Transformar os dados (ETL); pipeline_transacional.py grava vendas validadas
+    #   e enriquecidas no tópico curado com exactly-once
     # - Armazenar em bancos de dados
     # - Realizar cálculos/agregações
     # - Chamar outros serviços
     
     # Exemplo de validação simples
     if valor <= 0:
-        logger.warning(f"Valor inválido: {valor}")
+        logger.warning("Valor inválido: %s", valor)
+    
+    # Cálculos/agregações em janelas de tempo
+    if agregacao is not None:
+        agregacao.registrar_lote([msg_value])
     
     # Simular pequeno atraso para representar processamento
     time.sleep(0.01)
     
     return True
 
-def criar_consumidor():
-    """Cria e retorna uma instância do consumidor Kafka"""
+def processar_lote(registros, codificados=False):
+    """
+    Processa um lote de vendas já decodificadas, sem pausa nem log por mensagem.
+    
+    Versão em lote de processar_mensagem: as mesmas validações são aplicadas
+    a todo o lote e apenas um resumo é logado quando há registros inválidos.
+    
+    Args:
+        registros (list): Lista de Venda, ou de VendaCodificada com codificados=True
+        codificados (bool): Dimensões representadas pelos códigos do dicionário
+    
+    Returns:
+        int: Quantidade de registros processados
+    """
+    invalidos = 0
+    for registro in registros:
+        if registro.valor_total <= 0:
+            invalidos += 1
+    
+    if invalidos:
+        logger.warning(f"{invalidos} de {len(registros)} vendas com valor inválido no lote")
+    
+    # Cálculos/agregações em janelas de tempo
+    if agregacao is not None:
+        agregacao.registrar_lote(registros, codificados)
+    
+    return len(registros)
+
+def processar_valores(valores, formato=None):
+    """
+    Decodifica e processa um lote de valores brutos (bytes) de uma partição.
+    
+    Executada pelos trabalhadores do EstagioProcessamento, fora da thread de poll.
+    
+    Args:
+        valores (list): Valores das mensagens Kafka
+        formato (str): Formato de serialização das mensagens
+    
+    Returns:
+        int: Quantidade de registros processados
+    """
+    serializador = obter_serializador(formato)
+    desserializar = _desserializador_lote(serializador)
+    registros = []
+    for valor in valores:
+        try:
+            registros.append(desserializar(valor))
+        except ErroDesserializacao as e:
+            _erros_decodificacao.incrementar()
+            logger.error(f"Erro ao decodificar mensagem ({serializador.nome}): {e} - {valor!r}")
+    # Sem as mensagens originais as inválidas são só contadas e logadas (sem DLQ)
+    if VALIDACAO_VENDAS and registros:
+        registros = validar_lote(registros, obter_validador(serializador.nome))
+    return processar_lote(registros, serializador.codifica_dimensoes)
+
+@functools.lru_cache(maxsize=None)
+def obter_validador(formato=None, codificados=True):
+    """
+    Validador compilado para as vendas do formato.
+    
+    Args:
+        formato (str): Formato de serialização das mensagens
+        codificados (bool): No formato compacto, valida as VendaCodificada dos
+            lotes (códigos do dicionário); False para Venda completa
+    """
+    serializador = obter_serializador(formato)
+    codificadas = codificados and serializador.codifica_dimensoes
+    return compilar_validador(dicionario=serializador.dicionario if codificadas else None)
+
+def validar_lote(registros, validar, mensagens=None, fila=None):
+    """
+    Separa as vendas inválidas de um lote decodificado.
+    
+    Args:
+        registros (list): Vendas decodificadas
+        validar (callable): Validador compilado (obter_validador)
+        mensagens (list): Mensagem Kafka de cada registro, na mesma ordem (necessárias para a DLQ)
+        fila (FilaErros): DLQ das inválidas; sem ela as inválidas são logadas
+    
+    Returns:
+        list: Vendas válidas, na ordem recebida
+    """
+    inicio = time.perf_counter()
+    validos, invalidos = separar_invalidas(registros, validar)
+    _tempo_validacao.observar(time.perf_counter() - inicio)
+    _vendas_validadas.incrementar(len(registros))
+    for indice, motivo in invalidos:
+        _erros_validacao.incrementar()
+        VENDAS_INVALIDAS.rotulado(motivo).incrementar()
+        if fila is not None and mensagens is not None:
+            fila.adicionar(mensagens[indice], motivo)
+        else:
+            _log_invalidas.warning("Venda inválida (%s): %s", motivo, registros[indice])
+    return validos
+
+def _desserializador_lote(serializador):
+    """Desserializador dos lotes: com o formato compacto, as dimensões ficam como códigos do dicionário"""
+    if serializador.codifica_dimensoes:
+        return serializador.desserializar_codificada
+    return serializador.desserializar_venda
+
+def criar_consumidor(gerenciador_commits=None):
+    """
+    Cria e retorna uma instância do consumidor Kafka
+    
+    Args:
+        gerenciador_commits (GerenciadorCommits): Se informado, desativa o
+            auto-commit e registra o callback de commit do gerenciador
+    """
     config = {
         'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
         'group.id': KAFKA_GROUP_ID,
@@ -72,6 +234,8 @@ def criar_consumidor():
         'max.poll.interval.ms': 300000,   # 5 minutos
         'session.timeout.ms': 30000       # 30 segundos
     }
+    if gerenciador_commits is not None:
+        config.update(gerenciador_commits.config_consumidor())
     return Consumer(config)
 
 def handle_signal(sig, frame):
@@ -80,8 +244,254 @@ def handle_signal(sig, frame):
     logger.info(f"Sinal recebido: {sig}. Encerrando o consumidor...")
     running = False
 
+def tratar_erro_mensagem(msg):
+    """Loga o erro de uma mensagem retornada pelo consumidor"""
+    _erros_kafka.incrementar()
+    if msg.error().code() == KafkaError._PARTITION_EOF:
+        logger.info(f"Fim da partição alcançado {msg.topic()}/{msg.partition()}")
+    elif msg.error().code() == KafkaError._TRANSPORT:
+        logger.error(f"Erro de transporte: {msg.error()}")
+    else:
+        logger.error(f"Erro do consumidor: {msg.error()}")
+
+def voltar_ao_inicio(consumidor, mensagens):
+    """Reposiciona o consumidor na primeira mensagem de cada partição do lote, que será consumido de novo"""
+    inicio = {}
+    for msg in mensagens:
+        if not msg.error():
+            inicio.setdefault((msg.topic(), msg.partition()), msg.offset())
+    for (topico, particao), offset in inicio.items():
+        consumidor.seek(TopicPartition(topico, particao, offset))
+
+def enviar_rejeitadas(consumidor, mensagens):
+    """
+    Envia as rejeitadas pendentes à DLQ antes do commit dos offsets das mensagens.
+    
+    Returns:
+        bool: True se os offsets podem ser registrados; False se a DLQ falhou
+            e o consumidor foi reposicionado para consumir as mensagens de novo
+    """
+    if fila_erros is None:
+        return True
+    try:
+        fila_erros.enviar()
+        return True
+    except ErroEnvioDLQ as e:
+        logger.error(f"{e}; {len(mensagens)} mensagens serão consumidas de novo")
+        voltar_ao_inicio(consumidor, mensagens)
+        return False
+
+def decodificar_lote(mensagens, serializador, validar=None, fila=None):
+    """
+    Decodifica um lote de mensagens Kafka, descartando erros e mensagens inválidas.
+    
+    Args:
+        validar (callable): Validador compilado; vendas inválidas são descartadas
+        fila (FilaErros): DLQ das mensagens que não decodificam ou são inválidas
+            (enviadas pelo chamador com fila.enviar()); sem ela são logadas
+    
+    Returns:
+        list: Vendas decodificadas (VendaCodificada se o serializador codifica
+            as dimensões), na ordem recebida
+    """
+    desserializar = _desserializador_lote(serializador)
+    registros = []
+    origens = [] if validar is not None and fila is not None else None
+    for msg in mensagens:
+        if msg.error():
+            tratar_erro_mensagem(msg)
+            continue
+        try:
+            registros.append(desserializar(msg.value()))
+        except ErroDesserializacao as e:
+            _erros_decodificacao.incrementar()
+            if fila is not None:
+                fila.adicionar(msg, 'decodificacao', e)
+            else:
+                logger.error(f"Erro ao decodificar mensagem ({serializador.nome}): {e} - {msg.value()!r}")
+            continue
+        if origens is not None:
+            origens.append(msg)
+    if validar is not None and registros:
+        registros = validar_lote(registros, validar, origens, fila)
+    return registros
+
+def consumir_mensagem_a_mensagem(consumidor, serializador, gerenciador_commits=None):
+    """Loop de consumo original: uma mensagem por poll()"""
+    # Mensagens processadas
+    contador = 0
+    # desserializar_venda retorna a Venda completa, mesmo no formato compacto
+    validar = obter_validador(serializador.nome, codificados=False) if VALIDACAO_VENDAS else None
+    
+    # Loop principal de consumo
+    while running:
+        # Tentar receber mensagem com timeout de 1 segundo
+        msg = consumidor.poll(timeout=1.0)
+        if monitor_lag is not None:
+            monitor_lag.talvez_atualizar()
+        
+        if msg is None:
+            if gerenciador_commits is not None:
+                gerenciador_commits.talvez_commitar()
+            continue
+        
+        if msg.error():
+            tratar_erro_mensagem(msg)
+            continue
+        
+        VENDAS_CONSUMIDAS.incrementar()
+        BYTES_CONSUMIDOS.incrementar(len(msg))
+        
+        # Processar mensagem recebida
+        try:
+            with _tempo_mensagem.medir():
+                # Decodificar mensagem no formato configurado
+                valor = serializador.desserializar_venda(msg.value())
+                
+                # Validar e processar mensagem (inválidas vão para a DLQ ou são logadas)
+                validas = validar_lote([valor], validar, [msg], fila_erros) if validar is not None else [valor]
+                processada = processar_mensagem(valor) if validas else False
+            if processada:
+                contador += 1
+                _log_progresso.info("Processadas %d mensagens até o momento", contador)
+            
+        except ErroDesserializacao as e:
+            _erros_decodificacao.incrementar()
+            if fila_erros is not None:
+                fila_erros.adicionar(msg, 'decodificacao', e)
+            else:
+                logger.error(f"Erro ao decodificar mensagem ({serializador.nome}): {e} - {msg.value()!r}")
+        except Exception as e:
+            logger.error(f"Erro ao processar mensagem: {str(e)}")
+        
+        # Rejeitada confirmada na DLQ antes do commit do offset
+        if not enviar_rejeitadas(consumidor, [msg]):
+            continue
+        
+        # Mensagem tratada: offset liberado para commit
+        if gerenciador_commits is not None:
+            gerenciador_commits.registrar([msg])
+
+def consumir_um_lote(consumidor, serializador, tamanho_lote=TAMANHO_LOTE, latencia_max_ms=LATENCIA_MAX_MS,
+                     gerenciador_commits=None, estagio=None):
+    """
+    Executa uma iteração do consumo em lote: consume(), processamento e commit.
+    
+    Returns:
+        int: Quantidade de registros processados nesta iteração
+    """
+    mensagens = consumidor.consume(num_messages=tamanho_lote, timeout=latencia_max_ms / 1000.0)
+    if monitor_lag is not None:
+        monitor_lag.talvez_atualizar()
+    if mensagens:
+        VENDAS_CONSUMIDAS.incrementar(len(mensagens))
+        BYTES_CONSUMIDOS.incrementar(sum(map(len, mensagens)))
+    
+    if estagio is not None:
+        antes = estagio.processadas
+        for msg in mensagens:
+            if msg.error():
+                tratar_erro_mensagem(msg)
+        estagio.submeter(mensagens)
+        estagio.coletar()
+        return estagio.processadas - antes
+    
+    if not mensagens:
+        if gerenciador_commits is not None:
+            gerenciador_commits.talvez_commitar()
+        return 0
+    
+    processadas = 0
+    registros = []
+    validar = obter_validador(serializador.nome) if VALIDACAO_VENDAS else None
+    inicio = time.perf_counter()
+    try:
+        registros = decodificar_lote(mensagens, serializador, validar, fila_erros)
+    except Exception as e:
+        logger.error(f"Erro ao decodificar lote de {len(mensagens)} mensagens: {str(e)}")
+    decorrido = time.perf_counter() - inicio
+    # Rejeitadas confirmadas na DLQ antes de processar o lote e do commit dos offsets:
+    # se a DLQ falha, o lote é consumido de novo e não pode já ter entrado na agregação
+    if not enviar_rejeitadas(consumidor, mensagens):
+        return 0
+    inicio = time.perf_counter()
+    try:
+        processadas = processar_lote(registros, serializador.codifica_dimensoes)
+    except Exception as e:
+        logger.error(f"Erro ao processar lote de {len(mensagens)} mensagens: {str(e)}")
+    # Tempo de decodificação e processamento, sem a espera pela DLQ
+    _tempo_lote.observar(decorrido + time.perf_counter() - inicio)
+    if gerenciador_commits is not None:
+        gerenciador_commits.registrar(mensagens)
+    return processadas
+
+def consumir_em_lotes(consumidor, serializador, tamanho_lote=TAMANHO_LOTE, latencia_max_ms=LATENCIA_MAX_MS,
+                      gerenciador_commits=None, estagio=None):
+    """
+    Loop de consumo em lote usando consume(num_messages, timeout).
+    
+    Cada chamada retorna até tamanho_lote mensagens ou o que chegou em
+    latencia_max_ms. O lote é decodificado e entregue inteiro a processar_lote;
+    a vazão é logada a cada INTERVALO_RELATORIO_S segundos. Com um
+    gerenciador de commits, os offsets do lote só são confirmados depois que
+    processar_lote retorna. Com um EstagioProcessamento, os lotes são
+    processados pelos trabalhadores do estágio e esta thread apenas consome,
+    submete e recolhe resultados.
+    """
+    contador = 0
+    contador_relatorio = 0
+    ultimo_relatorio = time.monotonic()
+    
+    logger.info(f"Consumo em lote: até {tamanho_lote} mensagens ou {latencia_max_ms} ms por lote")
+    
+    while running:
+        contador += consumir_um_lote(consumidor, serializador, tamanho_lote, latencia_max_ms,
+                                     gerenciador_commits, estagio)
+        
+        agora = time.monotonic()
+        if agora - ultimo_relatorio >= INTERVALO_RELATORIO_S:
+            relatar_vazao(contador, contador - contador_relatorio, agora - ultimo_relatorio,
+                          gerenciador_commits, estagio)
+            ultimo_relatorio = agora
+            contador_relatorio = contador
+
+def relatar_vazao(contador, processadas_intervalo, intervalo_s, gerenciador_commits=None, estagio=None):
+    """Loga o total processado, a vazão do intervalo e o estado dos commits"""
+    vazao = processadas_intervalo / intervalo_s if intervalo_s > 0 else 0.0
+    logger.info(f"Processadas {contador} mensagens até o momento ({vazao:.0f} msgs/s)"
+                + (f", {estagio.em_voo()} lotes em voo" if estagio is not None else ""))
+    if gerenciador_commits is not None:
+        logger.info(f"Commits: {gerenciador_commits.estatisticas()}")
+    if _tempo_validacao.soma > 0:
+        logger.info(f"Validação: {_vendas_validadas.valor} vendas, {_erros_validacao.valor} inválidas, "
+                    f"{_vendas_validadas.valor / _tempo_validacao.soma:.0f} msgs/s"
+                    + (f", {fila_erros.enviadas} enviadas à DLQ" if fila_erros is not None else ""))
+
+async def consumir_async(consumidor, serializador, gerenciador_commits=None, estagio=None):
+    """
+    Consumo em lote no runtime asyncio.
+    
+    O ciclo de consume/processamento/commit roda na thread de poll do
+    runtime; o event loop fica livre para tarefas concorrentes.
+    """
+    estado = {"contador": 0, "contador_relatorio": 0, "ultimo_relatorio": time.monotonic()}
+    
+    def ciclo():
+        estado["contador"] += consumir_um_lote(consumidor, serializador, TAMANHO_LOTE, LATENCIA_MAX_MS,
+                                               gerenciador_commits, estagio)
+        agora = time.monotonic()
+        if agora - estado["ultimo_relatorio"] >= INTERVALO_RELATORIO_S:
+            relatar_vazao(estado["contador"], estado["contador"] - estado["contador_relatorio"],
+                          agora - estado["ultimo_relatorio"], gerenciador_commits, estagio)
+            estado["ultimo_relatorio"] = agora
+            estado["contador_relatorio"] = estado["contador"]
+    
+    logger.info(f"Runtime asyncio: consumo em lote de até {TAMANHO_LOTE} mensagens ou {LATENCIA_MAX_MS} ms")
+    await executar_async(sys.modules[__name__], ciclo)
+
 def main():
     """Função principal para consumo de mensagens do Kafka"""
+    global agregacao, monitor_lag, fila_erros
     # Configurar manipuladores de sinal para encerramento adequado
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
@@ -89,55 +499,63 @@ def main():
     logger.info(f"Iniciando consumidor para o tópico: {KAFKA_TOPIC}")
     logger.info(f"Usando servidor Kafka: {KAFKA_BOOTSTRAP_SERVERS}")
     logger.info(f"Grupo de consumidores: {KAFKA_GROUP_ID}")
+    metricas.iniciar_servidor()
+    serializador = obter_serializador()
+    logger.info(f"Formato de serialização: {serializador.nome}")
+    
+    # Agregação em janelas de tempo (com PROCESSAMENTO_PARALELO=processo, cada trabalhador agrega suas partições);
+    # no formato compacto a agregação usa os códigos do dicionário da mensagem
+    if AGREGACAO_JANELAS:
+        agregacao = AgregacaoStreaming(
+            dicionario=serializador.dicionario if serializador.codifica_dimensoes else None)
     
-    # Criar e configurar consumidor
-    consumidor = criar_consumidor()
+    # Criar e configurar consumidor (commit manual at-least-once por padrão)
+    gerenciador_commits = GerenciadorCommits() if COMMIT_MANUAL else None
+    consumidor = criar_consumidor(gerenciador_commits)
+    if gerenciador_commits is not None:
+        gerenciador_commits.vincular(consumidor)
+    monitor_lag = metricas.MonitorLag(consumidor)
+    
+    # Estágio de processamento paralelo (modo lote ou runtime async)
+    estagio = None
+    if (MODO_CONSUMO == 'lote' or RUNTIME_CONSUMIDOR == 'async') and PROCESSAMENTO_PARALELO:
+        estagio = EstagioProcessamento(
+            consumidor, functools.partial(processar_valores, formato=serializador.nome),
+            tipo=PROCESSAMENTO_PARALELO, gerenciador_commits=gerenciador_commits
+        )
+    
+    # DLQ das mensagens rejeitadas (os trabalhadores do estágio paralelo não têm as mensagens originais)
+    if DLQ_HABILITADA and estagio is None:
+        fila_erros = criar_fila_erros()
+        logger.info(f"Mensagens rejeitadas vão para o tópico {fila_erros.topico}")
     
     try:
         # Inscrever nos tópicos
-        consumidor.subscribe([KAFKA_TOPIC])
+        if estagio is not None:
+            consumidor.subscribe([KAFKA_TOPIC], on_revoke=estagio.ao_revogar)
+        elif gerenciador_commits is not None:
+            consumidor.subscribe([KAFKA_TOPIC], on_revoke=gerenciador_commits.ao_revogar)
+        else:
+            consumidor.subscribe([KAFKA_TOPIC])
         logger.info(f"Inscrito no tópico: {KAFKA_TOPIC}")
         
-        # Mensagens processadas
-        contador = 0
-        
-        # Loop principal de consumo
-        while running:
-            # Tentar receber mensagem com timeout de 1 segundo
-            msg = consumidor.poll(timeout=1.0)
-            
-            if msg is None:
-                continue
-            
-            if msg.error():
-                # Erro fatal no consumidor
-                if msg.error().code() == KafkaError._PARTITION_EOF:
-                    logger.info(f"Fim da partição alcançado {msg.topic()}/{msg.partition()}")
-                elif msg.error().code() == KafkaError._TRANSPORT:
-                    logger.error(f"Erro de transporte: {msg.error()}")
-                else:
-                    logger.error(f"Erro do consumidor: {msg.error()}")
-                continue
-            
-            # Processar mensagem recebida
-            try:
-                # Decodificar mensagem JSON
-                valor = json.loads(msg.value().decode('utf-8'))
-                
-                # Processar mensagem
-                if processar_mensagem(valor):
-                    contador += 1
-                    if contador % 10 == 0:
-                        logger.info(f"Processadas {contador} mensagens até o momento")
-                
-            except json.JSONDecodeError:
-                logger.error(f"Erro ao decodificar JSON: {msg.value().decode('utf-8')}")
-            except Exception as e:
-                logger.error(f"Erro ao processar mensagem: {str(e)}")
+        if RUNTIME_CONSUMIDOR == 'async':
+            asyncio.run(consumir_async(consumidor, serializador, gerenciador_commits, estagio))
+        elif MODO_CONSUMO == 'lote':
+            consumir_em_lotes(consumidor, serializador, gerenciador_commits=gerenciador_commits,
+                              estagio=estagio)
+        else:
+            consumir_mensagem_a_mensagem(consumidor, serializador, gerenciador_commits)
     
     except KafkaException as e:
         logger.error(f"Erro Kafka: {e}")
     finally:
+        # Terminar os lotes em voo antes do commit final
+        if estagio is not None:
+            estagio.encerrar()
+        # Confirmar o que já foi processado antes de fechar
+        if gerenciador_commits is not None:
+            gerenciador_commits.commit_final()
         # Fechar o consumidor apropriadamente
         logger.info("Fechando consumidor Kafka...")
         consumidor.close()
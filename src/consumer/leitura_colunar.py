@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Leitura colunar de resultados do broker do Pinot (/query/sql) para NumPy e pandas.
+
+Em vez de um tuple Python por linha (DB-API do pinotdb), cada coluna do
+resultTable vira um array NumPy tipado pelo schema do Pinot
+(gerado de src/schemas/vendas_schema.json) e as dimensões de baixa cardinalidade viram
+categóricas codificadas por dicionário. Exportações grandes são lidas em
+páginas (LIMIT/OFFSET ou janelas de tempo) e entregues como um stream.
+"""
+
+import os
+import sys
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.vendas import schema_pinot
+
+logger = logging.getLogger(__name__)
+
+# Configurações da leitura
+DIMENSOES_CATEGORICAS = [d for d in os.environ.get(
+    'DIMENSOES_CATEGORICAS', 'produto,categoria,forma_pagamento,loja,cidade,estado').split(',') if d]
+TAMANHO_PAGINA_EXPORTACAO = int(os.environ.get('TAMANHO_PAGINA_EXPORTACAO', '50000'))
+COLUNA_TEMPO = 'timestamp'
+COLUNA_UNICA = 'id_venda'  # Desempate do ORDER BY: vendas de um lote têm o mesmo timestamp
+
+# Tipos do Pinot -> dtype NumPy (STRING e demais tipos ficam como object)
+DTYPES_PINOT = {
+    "INT": np.int32,
+    "LONG": np.int64,
+    "FLOAT": np.float32,
+    "DOUBLE": np.float64,
+    "BOOLEAN": np.bool_,
+    "TIMESTAMP": np.int64,
+}
+
+# Coluna codificada por dicionário: códigos int32 e lista de valores indexada pelo código
+Categorica = namedtuple('Categorica', ['codigos', 'categorias'])
+
+def carregar_tipos_schema():
+    """Retorna {coluna: dataType} a partir do schema do Pinot"""
+    schema = schema_pinot()
+    tipos = {}
+    for secao in ("dimensionFieldSpecs", "metricFieldSpecs", "dateTimeFieldSpecs"):
+        for campo in schema.get(secao, []):
+            tipos[campo["name"]] = campo["dataType"]
+    return tipos
+
+class LeitorColunar:
+    """
+    Converte respostas do broker em colunas NumPy.
+
+    Nas leituras paginadas os dicionários das colunas categóricas são
+    compartilhados entre as páginas, de forma que os códigos de uma mesma
+    categoria são estáveis em toda a exportação.
+
+    Args:
+        cliente: PinotClient usado nas consultas
+        tipos (dict): {coluna: dataType do Pinot} usado quando a resposta não traz
+            columnDataTypes; padrão: schema gerado de vendas_schema.json
+        categoricas (iterable): Colunas STRING codificadas por dicionário
+    """
+
+    def __init__(self, cliente, tipos=None, categoricas=DIMENSOES_CATEGORICAS):
+        self.cliente = cliente
+        self.tipos = tipos if tipos is not None else carregar_tipos_schema()
+        self.categoricas = set(categoricas)
+
+    def colunas(self, resultado, dicionarios=None):
+        """
+        Converte o JSON de uma resposta do broker em {coluna: array}.
+
+        Colunas categóricas retornam Categorica(codigos, categorias).
+
+        Args:
+            resultado (dict): JSON da resposta de /query/sql
+            dicionarios (dict): {coluna: {valor: código}} atualizado no lugar;
+                None usa dicionários novos (só as categorias presentes no resultado)
+        """
+        if dicionarios is None:
+            dicionarios = {}
+        if resultado.get("exceptions"):
+            raise RuntimeError(f"Erro na consulta: {resultado['exceptions']}")
+        tabela = resultado["resultTable"]
+        nomes = tabela["dataSchema"]["columnNames"]
+        tipos_resposta = tabela["dataSchema"].get("columnDataTypes", [])
+        linhas = tabela["rows"]
+        n = len(linhas)
+
+        colunas = {}
+        for j, nome in enumerate(nomes):
+            # O tipo da resposta reflete a expressão (ex.: AVG(quantidade) AS quantidade é DOUBLE);
+            # o do schema só vale quando o broker não informa os tipos
+            tipo = tipos_resposta[j] if j < len(tipos_resposta) else self.tipos.get(nome, "STRING")
+            valores = (linha[j] for linha in linhas)
+            if nome in self.categoricas and tipo == "STRING":
+                dicionario = dicionarios.setdefault(nome, {})
+                codigos = np.fromiter((dicionario.setdefault(v, len(dicionario)) for v in valores),
+                                      dtype=np.int32, count=n)
+                colunas[nome] = Categorica(codigos, list(dicionario))
+            elif tipo in DTYPES_PINOT:
+                colunas[nome] = np.fromiter(valores, dtype=DTYPES_PINOT[tipo], count=n)
+            else:
+                colunas[nome] = np.fromiter(valores, dtype=object, count=n)
+        return colunas
+
+    def consultar(self, sql, dicionarios=None):
+        """Executa a consulta no broker e retorna as colunas"""
+        resposta = self.cliente.consultar_sql(sql)
+        resposta.raise_for_status()
+        return self.colunas(resposta.json(), dicionarios)
+
+    def paginar_por_offset(self, sql, tamanho_pagina=TAMANHO_PAGINA_EXPORTACAO, dicionarios=None):
+        """
+        Lê uma consulta de seleção em páginas com LIMIT/OFFSET.
+
+        A consulta não deve ter LIMIT e o ORDER BY deve definir uma ordem total
+        (ex.: terminar em uma coluna única): o broker não ordena as linhas
+        empatadas sempre do mesmo jeito, e um empate na fronteira de uma
+        página repetiria ou pularia linhas.
+
+        Yields:
+            dict: Colunas de cada página
+        """
+        dicionarios = {} if dicionarios is None else dicionarios
+        offset = 0
+        while True:
+            pagina = self.consultar(f"{sql} LIMIT {tamanho_pagina} OFFSET {offset}", dicionarios)
+            linhas = _num_linhas(pagina)
+            if linhas:
+                yield pagina
+            if linhas < tamanho_pagina:
+                return
+            offset += linhas
+
+    def paginar_por_tempo(self, tabela, inicio_ms, fim_ms, passo_ms, colunas="*", filtro=None,
+                          tamanho_pagina=TAMANHO_PAGINA_EXPORTACAO):
+        """
+        Lê [inicio_ms, fim_ms) em janelas de passo_ms do campo de tempo.
+
+        Janelas com mais de tamanho_pagina linhas são lidas com LIMIT/OFFSET.
+
+        Yields:
+            dict: Colunas de cada página
+        """
+        dicionarios = {}
+        for inicio in range(inicio_ms, fim_ms, passo_ms):
+            fim = min(inicio + passo_ms, fim_ms)
+            condicao = f"{COLUNA_TEMPO} >= {inicio} AND {COLUNA_TEMPO} < {fim}"
+            if filtro:
+                condicao = f"({filtro}) AND {condicao}"
+            sql = f"SELECT {colunas} FROM {tabela} WHERE {condicao}"
+            pagina = self.consultar(f"{sql} LIMIT {tamanho_pagina}", dicionarios)
+            if _num_linhas(pagina) < tamanho_pagina:
+                if _num_linhas(pagina):
+                    yield pagina
+                continue
+            logger.info(f"Janela [{inicio}, {fim}) com {tamanho_pagina}+ linhas, lendo com LIMIT/OFFSET")
+            yield from self.paginar_por_offset(f"{sql} ORDER BY {COLUNA_TEMPO}, {COLUNA_UNICA}",
+                                               tamanho_pagina, dicionarios)
+
+def _num_linhas(colunas):
+    if not colunas:
+        return 0
+    primeira = next(iter(colunas.values()))
+    return len(primeira.codigos if isinstance(primeira, Categorica) else primeira)
+
+def para_dataframe(colunas):
+    """Monta um DataFrame pandas sem copiar as colunas numéricas; categóricas viram pd.Categorical"""
+    import pandas as pd
+
+    dados = {}
+    for nome, coluna in colunas.items():
+        if isinstance(coluna, Categorica):
+            dados[nome] = pd.Categorical.from_codes(coluna.codigos, categories=coluna.categorias)
+        else:
+            dados[nome] = coluna
+    return pd.DataFrame(dados, copy=False)
+
+def concatenar(paginas):
+    """Junta as páginas de uma exportação em um único conjunto de colunas"""
+    paginas = list(paginas)
+    if not paginas:
+        return {}
+    resultado = {}
+    for nome, primeira in paginas[0].items():
+        if isinstance(primeira, Categorica):
+            # Dicionário compartilhado: a última página tem todas as categorias
+            resultado[nome] = Categorica(np.concatenate([p[nome].codigos for p in paginas]),
+                                         paginas[-1][nome].categorias)
+        else:
+            resultado[nome] = np.concatenate([p[nome] for p in paginas])
+    return resultado
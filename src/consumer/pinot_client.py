@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cliente HTTP compartilhado para as chamadas de administração e consulta ao Apache Pinot.
+
+Mantém uma Session (pool de conexões keep-alive) para o controller e outra
+para o broker, aplica timeouts por endpoint, repete falhas transitórias com
+backoff exponencial com jitter e abre um circuit breaker por serviço quando
+as falhas se acumulam. A latência de cada endpoint é registrada em um
+histograma.
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Diretório src/ no path para importar os módulos compartilhados (comum/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum import metricas
+
+logger = logging.getLogger(__name__)
+
+# Configurações do cliente
+PINOT_TENTATIVAS = int(os.environ.get('PINOT_TENTATIVAS', '3'))  # Tentativas por requisição
+PINOT_BACKOFF_BASE_S = float(os.environ.get('PINOT_BACKOFF_BASE_S', '0.2'))
+PINOT_BACKOFF_MAX_S = float(os.environ.get('PINOT_BACKOFF_MAX_S', '5'))
+PINOT_CIRCUITO_FALHAS = int(os.environ.get('PINOT_CIRCUITO_FALHAS', '5'))  # Falhas seguidas para abrir
+PINOT_CIRCUITO_ESPERA_S = float(os.environ.get('PINOT_CIRCUITO_ESPERA_S', '30'))  # Tempo aberto
+PINOT_POOL_CONEXOES = int(os.environ.get('PINOT_POOL_CONEXOES', '10'))
+
+# Timeouts (conexão, leitura) em segundos pelo primeiro segmento do caminho
+TIMEOUTS_ENDPOINT = {
+    "/health": (2, 3),
+    "/": (2, 5),
+    "/schemas": (3, 10),
+    "/tables": (3, 15),
+    "/query": (3, 30),
+}
+TIMEOUT_PADRAO = (3, 10)
+
+# Status HTTP considerados falhas transitórias
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+# Latência das requisições ao Pinot, também exposta em /metrics
+LATENCIA_PINOT = metricas.histograma('pinot_requisicao_segundos', 'Latência das requisições HTTP ao Pinot',
+                                     ['servico', 'metodo', 'endpoint'])
+
+class CircuitoAbertoError(requests.exceptions.RequestException):
+    """Requisição recusada sem chamar o Pinot porque o circuit breaker está aberto"""
+
+class HistogramaLatencia:
+    """Histograma de latências em ms com limites fixos de buckets"""
+
+    LIMITES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+    def __init__(self):
+        self.contagens = [0] * len(self.LIMITES_MS)
+        self.total = 0
+        self.soma_ms = 0.0
+
+    def registrar(self, latencia_ms):
+        for i, limite in enumerate(self.LIMITES_MS):
+            if latencia_ms <= limite:
+                self.contagens[i] += 1
+                break
+        self.total += 1
+        self.soma_ms += latencia_ms
+
+    def percentil(self, p):
+        """Limite superior do bucket que contém o percentil p (0-100)"""
+        if not self.total:
+            return 0.0
+        alvo = self.total * p / 100.0
+        acumulado = 0
+        for limite, contagem in zip(self.LIMITES_MS, self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return self.LIMITES_MS[-1]
+
+    def resumo(self):
+        return {
+            "total": self.total,
+            "media_ms": round(self.soma_ms / self.total, 1) if self.total else 0.0,
+            "p50_ms": self.percentil(50),
+            "p99_ms": self.percentil(99)
+        }
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples: fechado -> aberto após N falhas seguidas ->
+    meio-aberto após o tempo de espera (uma requisição de teste) -> fechado
+    no primeiro sucesso.
+    """
+
+    def __init__(self, nome, limite_falhas=PINOT_CIRCUITO_FALHAS, espera_s=PINOT_CIRCUITO_ESPERA_S):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.espera_s = espera_s
+        self.falhas = 0
+        self.aberto_em = None
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Levanta CircuitoAbertoError se o circuito está aberto"""
+        with self._lock:
+            if self.aberto_em is None:
+                return
+            if time.monotonic() - self.aberto_em >= self.espera_s:
+                # Meio-aberto: deixa passar uma requisição de teste
+                self.aberto_em = time.monotonic()
+                return
+        raise CircuitoAbertoError(f"Circuito do Pinot {self.nome} aberto após {self.falhas} falhas seguidas")
+
+    def sucesso(self):
+        with self._lock:
+            if self.aberto_em is not None:
+                logger.info(f"Circuito do Pinot {self.nome} fechado novamente")
+            self.falhas = 0
+            self.aberto_em = None
+
+    def falha(self):
+        with self._lock:
+            self.falhas += 1
+            if self.falhas >= self.limite_falhas and self.aberto_em is None:
+                logger.warning(f"Circuito do Pinot {self.nome} aberto por {self.espera_s:.0f}s "
+                               f"após {self.falhas} falhas seguidas")
+                self.aberto_em = time.monotonic()
+
+class PinotClient:
+    """
+    Cliente do controller e do broker do Pinot com pool de conexões, timeouts,
+    retry com backoff exponencial e circuit breaker.
+
+    Os métodos retornam o Response do requests, como as chamadas diretas que
+    substituem. Falhas de conexão que persistem após as tentativas levantam
+    requests.exceptions.RequestException (CircuitoAbertoError inclusive).
+
+    Args:
+        controller_url (str): URL base do Pinot Controller
+        broker_url (str): URL base do Pinot Broker
+        tentativas (int): Tentativas por requisição (1 = sem retry)
+    """
+
+    def __init__(self, controller_url, broker_url, tentativas=PINOT_TENTATIVAS):
+        self.urls = {"controller": controller_url.rstrip('/'), "broker": broker_url.rstrip('/')}
+        self.tentativas = max(1, tentativas)
+        self.sessoes = {servico: self._criar_sessao() for servico in self.urls}
+        self.circuitos = {servico: CircuitBreaker(servico) for servico in self.urls}
+        self.histogramas = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _criar_sessao():
+        sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=PINOT_POOL_CONEXOES, pool_maxsize=PINOT_POOL_CONEXOES)
+        sessao.mount("http://", adaptador)
+        sessao.mount("https://", adaptador)
+        return sessao
+
+    @staticmethod
+    def _endpoint(caminho):
+        segmento = "/" + caminho.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+        return segmento
+
+    def requisitar(self, servico, metodo, caminho, idempotente=None, timeout=None, **kwargs):
+        """
+        Executa uma requisição ao controller ou ao broker.
+
+        Args:
+            servico (str): 'controller' ou 'broker'
+            metodo (str): Método HTTP
+            caminho (str): Caminho a partir da URL base (ex.: '/tables')
+            idempotente (bool): Se a requisição pode ser repetida após resposta 5xx ou
+                timeout de leitura; padrão: GET/DELETE e consultas ao broker
+            timeout (tuple|float): Sobrescreve o timeout do endpoint
+        """
+        endpoint = self._endpoint(caminho)
+        if idempotente is None:
+            idempotente = metodo in ("GET", "DELETE") or servico == "broker"
+        timeout = timeout if timeout is not None else TIMEOUTS_ENDPOINT.get(endpoint, TIMEOUT_PADRAO)
+        url = f"{self.urls[servico]}{caminho}"
+        circuito = self.circuitos[servico]
+        chave_histograma = f"{servico} {metodo} {endpoint}"
+        serie_metricas = LATENCIA_PINOT.rotulado(servico, metodo, endpoint)
+
+        for tentativa in range(1, self.tentativas + 1):
+            circuito.permitir()
+            inicio = time.monotonic()
+            try:
+                resposta = self.sessoes[servico].request(metodo, url, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._registrar_latencia(chave_histograma, inicio, serie_metricas)
+                circuito.falha()
+                # Falha ao conectar é segura para repetir; timeout de leitura só se idempotente
+                repetir = isinstance(e, (requests.exceptions.ConnectionError,
+                                         requests.exceptions.ConnectTimeout)) or idempotente
+                if not repetir or tentativa == self.tentativas:
+                    raise
+                logger.warning(f"Falha em {metodo} {url} (tentativa {tentativa}/{self.tentativas}): {e}")
+            else:
+                self._registrar_latencia(chave_histograma, inicio, serie_metricas)
+                if resposta.status_code not in STATUS_TRANSITORIOS:
+                    circuito.sucesso()
+                    return resposta
+                circuito.falha()
+                if not idempotente or tentativa == self.tentativas:
+                    return resposta
+                logger.warning(f"Resposta {resposta.status_code} de {metodo} {url} "
+                               f"(tentativa {tentativa}/{self.tentativas})")
+            time.sleep(self._backoff(tentativa))
+
+    @staticmethod
+    def _backoff(tentativa):
+        """Backoff exponencial com jitter completo"""
+        return random.uniform(0, min(PINOT_BACKOFF_MAX_S, PINOT_BACKOFF_BASE_S * 2 ** (tentativa - 1)))
+
+    def _registrar_latencia(self, chave, inicio, serie_metricas):
+        latencia_ms = (time.monotonic() - inicio) * 1000
+        serie_metricas.observar(latencia_ms / 1000)
+        with self._lock:
+            histograma = self.histogramas.get(chave)
+            if histograma is None:
+                histograma = self.histogramas[chave] = HistogramaLatencia()
+            histograma.registrar(latencia_ms)
+
+    # Atalhos para o controller
+    def get_controller(self, caminho, **kwargs):
+        return self.requisitar("controller", "GET", caminho, **kwargs)
+
+    def post_controller(self, caminho, **kwargs):
+        return self.requisitar("controller", "POST", caminho, **kwargs)
+
+    def put_controller(self, caminho, **kwargs):
+        return self.requisitar("controller", "PUT", caminho, **kwargs)
+
+    def delete_controller(self, caminho, **kwargs):
+        return self.requisitar("controller", "DELETE", caminho, **kwargs)
+
+    def consultar_sql(self, sql, **kwargs):
+        """Envia uma consulta SQL ao broker (/query/sql) e retorna o Response"""
+        return self.requisitar("broker", "POST", "/query/sql", json={"sql": sql}, **kwargs)
+
+    def latencias(self):
+        """Resumo dos histogramas de latência por endpoint"""
+        with self._lock:
+            return {chave: h.resumo() for chave, h in sorted(self.histogramas.items())}
+
+    def fechar(self):
+        for sessao in self.sessoes.values():
+            sessao.close()
@@ -8,18 +8,28 @@ Consumidor Kafka para processar mensagens de vendas e ingerir no Apache Pinot.
 import json
 import time
 import signal
+import asyncio
 import logging
 import requests
 import os
+import sys
 import socket
 from confluent_kafka import Consumer, KafkaError, KafkaException
 from datetime import datetime
 
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.serializadores import obter_serializador, FORMATO_SERIALIZACAO
+from schemas.vendas import schema_pinot
+from comum import metricas
+from comum.logs import configurar_logs, LogAmostrado
+from gerenciador_commits import GerenciadorCommits, COMMIT_MANUAL
+from pinot_client import PinotClient
+from indices_tabela import config_tabela_realtime, atualizar_tabela
+from runtime_async import RUNTIME_CONSUMIDOR, ClientePinotAsync, tarefa_periodica, executar as executar_async
+
 # Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configurar_logs()
 logger = logging.getLogger(__name__)
 
 # Detectar ambiente
@@ -68,6 +78,15 @@ PINOT_CONTROLLER_URL = os.environ.get('PINOT_CONTROLLER_URL', env_config['pinot_
 PINOT_BROKER_URL = os.environ.get('PINOT_BROKER_URL', env_config['pinot_broker'])
 PINOT_TABLE = os.environ.get('PINOT_TABLE', 'vendas')
 
+# Tópico ingerido pela tabela: o bruto ou o curado pelo pipeline transacional (vendas-curadas)
+PINOT_TOPICO = os.environ.get('PINOT_TOPICO', KAFKA_TOPIC)
+
+# Formato das mensagens no tópico (define o decodificador usado pelo Pinot)
+PINOT_FORMATO_MENSAGENS = os.environ.get('PINOT_FORMATO_MENSAGENS', FORMATO_SERIALIZACAO)
+
+# Atualizar os índices de uma tabela já existente para os gerados a partir do workload
+PINOT_ATUALIZAR_INDICES = os.environ.get('PINOT_ATUALIZAR_INDICES', 'false').lower() == 'true'
+
 # Configurações para uso interno do Pinot (como tabela conecta com Kafka)
 KAFKA_CONNECT_URL = os.environ.get('KAFKA_CONNECT_URL', env_config['kafka_for_pinot'])
 
@@ -77,11 +96,32 @@ logger.info(f"Kafka Connect URL (para Pinot): {KAFKA_CONNECT_URL}")
 logger.info(f"Pinot Controller URL: {PINOT_CONTROLLER_URL}")
 logger.info(f"Pinot Broker URL: {PINOT_BROKER_URL}")
 
+# Cliente HTTP compartilhado (pool de conexões, timeouts, retry e circuit breaker)
+cliente_pinot = PinotClient(PINOT_CONTROLLER_URL, PINOT_BROKER_URL)
+
+# Intervalos das tarefas periódicas
+INTERVALO_CONSULTA_S = 30  # Consulta de contagem no Pinot
+INTERVALO_SAUDE_S = 10     # Health check do controller (runtime async)
+
+# Métricas do consumidor (servidas em /metrics com METRICAS_PORTA)
+VENDAS_CONSUMIDAS = metricas.contador('vendas_consumidas_total', 'Mensagens de venda recebidas do Kafka')
+BYTES_CONSUMIDOS = metricas.contador('vendas_consumidas_bytes_total', 'Bytes de mensagens de venda recebidas do Kafka')
+ERROS_CONSUMO = metricas.contador('vendas_erros_consumo_total', 'Mensagens descartadas por tipo de erro', ['tipo'])
+
+# Progresso do consumo: 1 log a cada 10 mensagens, limitado a LOG_MAX_POR_S por segundo
+_log_progresso = LogAmostrado(logger, a_cada=10)
+
 # Controle para interrupções
 running = True
 
-def criar_consumidor():
-    """Cria e retorna uma instância do consumidor Kafka"""
+def criar_consumidor(gerenciador_commits=None):
+    """
+    Cria e retorna uma instância do consumidor Kafka
+    
+    Args:
+        gerenciador_commits (GerenciadorCommits): Se informado, desativa o
+            auto-commit e registra o callback de commit do gerenciador
+    """
     config = {
         'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
         'group.id': KAFKA_GROUP_ID,
@@ -91,6 +131,8 @@ def criar_consumidor():
         'max.poll.interval.ms': 300000,   # 5 minutos
         'session.timeout.ms': 30000       # 30 segundos
     }
+    if gerenciador_commits is not None:
+        config.update(gerenciador_commits.config_consumidor())
     return Consumer(config)
 
 def handle_signal(sig, frame):
@@ -117,7 +159,7 @@ def verificar_pinot():
             url = f"{PINOT_CONTROLLER_URL}{endpoint}"
             logger.info(f"Tentando acessar: {url}")
             
-            response = requests.get(url, timeout=5)
+            response = cliente_pinot.get_controller(endpoint)
             status = response.status_code
             
             logger.info(f"Resposta de {url}: {status}")
@@ -143,47 +185,15 @@ def criar_schema_pinot():
     Cria o schema no Pinot para a tabela de vendas
     Nota: Em produção, isso normalmente seria gerenciado separadamente
     """
-    schema = {
-        "schemaName": PINOT_TABLE,
-        "dimensionFieldSpecs": [
-            {"name": "id_venda", "dataType": "STRING"},
-            {"name": "id_cliente", "dataType": "STRING"},
-            {"name": "nome_cliente", "dataType": "STRING"},
-            {"name": "email_cliente", "dataType": "STRING"},
-            {"name": "produto", "dataType": "STRING"},
-            {"name": "categoria", "dataType": "STRING"},
-            {"name": "forma_pagamento", "dataType": "STRING"},
-            {"name": "loja", "dataType": "STRING"},
-            {"name": "cidade", "dataType": "STRING"},
-            {"name": "estado", "dataType": "STRING"}
-        ],
-        "metricFieldSpecs": [
-            {"name": "preco", "dataType": "DOUBLE"},
-            {"name": "quantidade", "dataType": "INT"},
-            {"name": "valor_total", "dataType": "DOUBLE"}
-        ],
-        "dateTimeFieldSpecs": [
-            {
-                "name": "timestamp",
-                "dataType": "LONG",
-                "format": "1:MILLISECONDS:EPOCH",
-                "granularity": "1:MILLISECONDS"
-            },
-            {
-                "name": "data_hora",
-                "dataType": "STRING",
-                "format": "1:DAYS:SIMPLE_DATE_FORMAT:yyyy-MM-dd'T'HH:mm:ss",
-                "granularity": "1:DAYS"
-            }
-        ]
-    }
+    # Gerado da definição única da venda (src/schemas/vendas_schema.json)
+    schema = schema_pinot(PINOT_TABLE)
     
     # Verificar se o schema já existe
     logger.info(f"Verificando se o schema {PINOT_TABLE} já existe...")
     schema_exists = False
     
     try:
-        response = requests.get(f"{PINOT_CONTROLLER_URL}/schemas")
+        response = cliente_pinot.get_controller("/schemas")
         if response.status_code == 200:
             schemas = response.json()
             if PINOT_TABLE in schemas:
@@ -198,8 +208,8 @@ def criar_schema_pinot():
     if not schema_exists:
         logger.info(f"Criando schema {PINOT_TABLE}...")
         try:
-            response = requests.post(
-                f"{PINOT_CONTROLLER_URL}/schemas",
+            response = cliente_pinot.post_controller(
+                "/schemas",
                 headers={"Content-Type": "application/json"},
                 json=schema
             )
@@ -216,42 +226,21 @@ def criar_schema_pinot():
     
     return True
 
-def criar_tabela_pinot():
+def criar_tabela_pinot(formato=None):
     """
     Cria a tabela no Pinot para ingestão de dados
+    
+    Args:
+        formato (str): Formato das mensagens no tópico ('json' ou 'avro');
+            define o decodificador do Pinot. Padrão: PINOT_FORMATO_MENSAGENS
     """
     logger.info("Preparando para criar a tabela no Pinot...")
+    serializador = obter_serializador(formato or PINOT_FORMATO_MENSAGENS)
+    logger.info(f"Formato das mensagens no tópico: {serializador.nome}")
     
-    # Definindo a configuração da tabela
-    table_config = {
-        "tableName": PINOT_TABLE,
-        "tableType": "REALTIME",
-        "segmentsConfig": {
-            "timeColumnName": "timestamp",
-            "timeType": "MILLISECONDS",
-            "replication": "1",
-            "schemaName": PINOT_TABLE
-        },
-        "tenants": {},
-        "tableIndexConfig": {
-            "loadMode": "MMAP",
-            "streamConfigs": {
-                "streamType": "kafka",
-                "stream.kafka.consumer.type": "lowlevel",
-                "stream.kafka.topic.name": KAFKA_TOPIC,
-                "stream.kafka.decoder.class.name": "org.apache.pinot.plugin.stream.kafka.KafkaJSONMessageDecoder",
-                "stream.kafka.consumer.factory.class.name": "org.apache.pinot.plugin.stream.kafka20.KafkaConsumerFactory",
-                # Usar nome do serviço Docker para comunicação interna do Pinot com Kafka
-                "stream.kafka.broker.list": KAFKA_CONNECT_URL,
-                "realtime.segment.flush.threshold.time": "3600000",
-                "realtime.segment.flush.threshold.size": "500000",
-                "stream.kafka.consumer.prop.auto.offset.reset": "smallest"
-            }
-        },
-        "metadata": {
-            "customConfigs": {}
-        }
-    }
+    # Configuração da tabela (streamConfigs do tópico, decodificador do formato e índices
+    # derivados do schema e do workload em config/workload_consultas.sql)
+    table_config = config_tabela_realtime(PINOT_TABLE, PINOT_TOPICO, KAFKA_CONNECT_URL, serializador)
     
     # Verificar se a tabela já existe
     logger.info(f"Verificando se a tabela {PINOT_TABLE} já existe...")
@@ -259,7 +248,7 @@ def criar_tabela_pinot():
     
     try:
         # Listar todas as tabelas
-        response = requests.get(f"{PINOT_CONTROLLER_URL}/tables")
+        response = cliente_pinot.get_controller("/tables")
         if response.status_code == 200:
             tables = response.json().get("tables", [])
             if f"{PINOT_TABLE}_REALTIME" in tables:
@@ -272,6 +261,12 @@ def criar_tabela_pinot():
     except requests.exceptions.RequestException as e:
         logger.warning(f"Exceção ao listar tabelas: {str(e)}")
     
+    if table_exists and PINOT_ATUALIZAR_INDICES:
+        try:
+            atualizar_tabela(cliente_pinot, PINOT_TABLE, "REALTIME")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Não foi possível atualizar os índices da tabela: {str(e)}")
+    
     # Criar tabela se não existir
     if not table_exists:
         logger.info(f"Criando tabela {PINOT_TABLE}...")
@@ -281,8 +276,8 @@ def criar_tabela_pinot():
             logger.info(f"Configuração da tabela a ser enviada: {json.dumps(table_config, indent=2)}")
             
             # Enviando a requisição para criar a tabela
-            response = requests.post(
-                f"{PINOT_CONTROLLER_URL}/tables",
+            response = cliente_pinot.post_controller(
+                "/tables",
                 headers={"Content-Type": "application/json"},
                 json=table_config
             )
@@ -319,11 +314,7 @@ def testar_consulta_pinot():
     try:
         # Usar o Broker para consultas ao invés do Controller
         logger.info(f"Enviando consulta para {PINOT_BROKER_URL}/query/sql: {count_query}")
-        response = requests.post(
-            f"{PINOT_BROKER_URL}/query/sql",
-            headers={"Content-Type": "application/json"},
-            json={"sql": count_query}
-        )
+        response = cliente_pinot.consultar_sql(count_query)
         
         logger.info(f"Resposta da consulta: {response.status_code}")
         
@@ -344,11 +335,7 @@ def testar_consulta_pinot():
                 if count > 0:
                     try:
                         detail_query = f"SELECT * FROM {PINOT_TABLE} LIMIT 1"
-                        detail_response = requests.post(
-                            f"{PINOT_BROKER_URL}/query/sql",
-                            headers={"Content-Type": "application/json"},
-                            json={"sql": detail_query}
-                        )
+                        detail_response = cliente_pinot.consultar_sql(detail_query)
                         
                         if detail_response.status_code == 200:
                             detail_result = detail_response.json()
@@ -382,11 +369,7 @@ def verificar_tabela_e_corrigir():
     query_ok = False
     try:
         logger.info(f"Tentando consultar tabela {PINOT_TABLE}...")
-        response = requests.post(
-            f"{PINOT_BROKER_URL}/query/sql",
-            headers={"Content-Type": "application/json"},
-            json={"sql": f"SELECT COUNT(*) FROM {PINOT_TABLE}"}
-        )
+        response = cliente_pinot.consultar_sql(f"SELECT COUNT(*) FROM {PINOT_TABLE}")
         
         if response.status_code == 200:
             result = response.json()
@@ -407,7 +390,7 @@ def verificar_tabela_e_corrigir():
         try:
             # Primeiro tentar remover a tabela se ela existe
             logger.info("Tentando remover tabela se existir...")
-            requests.delete(f"{PINOT_CONTROLLER_URL}/tables/{PINOT_TABLE}")
+            cliente_pinot.delete_controller(f"/tables/{PINOT_TABLE}")
             
             # Aguardar um momento para que a remoção seja processada
             time.sleep(3)
@@ -461,6 +444,65 @@ def verificar_kafka():
         logger.error(f"Erro ao conectar ao Kafka: {str(e)}")
         return False
 
+def tratar_erro_mensagem(msg):
+    """Loga o erro de uma mensagem retornada pelo consumidor"""
+    ERROS_CONSUMO.rotulado('kafka').incrementar()
+    if msg.error().code() == KafkaError._PARTITION_EOF:
+        logger.info(f"Fim da partição alcançado {msg.topic()}/{msg.partition()}")
+    elif msg.error().code() == KafkaError._TRANSPORT:
+        logger.error(f"Erro de transporte: {msg.error()}")
+    else:
+        logger.error(f"Erro do consumidor: {msg.error()}")
+
+async def consumir_async(consumidor, gerenciador_commits=None, monitor_lag=None):
+    """
+    Loop de consumo no runtime asyncio.
+    
+    O consumo roda na thread de poll do runtime, enquanto a consulta de
+    contagem e o health check do Pinot rodam como tarefas separadas com um
+    cliente HTTP assíncrono, sem bloquear o consumo.
+    """
+    estado = {"contador": 0}
+    
+    def ciclo():
+        mensagens = consumidor.consume(num_messages=500, timeout=1.0)
+        if monitor_lag is not None:
+            monitor_lag.talvez_atualizar()
+        if not mensagens:
+            if gerenciador_commits is not None:
+                gerenciador_commits.talvez_commitar()
+            return
+        # Kafka já está enviando para o Pinot baseado na configuração da tabela
+        for msg in mensagens:
+            if msg.error():
+                tratar_erro_mensagem(msg)
+            else:
+                estado["contador"] += 1
+                VENDAS_CONSUMIDAS.incrementar()
+                BYTES_CONSUMIDOS.incrementar(len(msg))
+                _log_progresso.info("Processadas %d mensagens até o momento", estado["contador"])
+        if gerenciador_commits is not None:
+            gerenciador_commits.registrar(mensagens)
+    
+    async with ClientePinotAsync(PINOT_CONTROLLER_URL, PINOT_BROKER_URL) as cliente:
+        async def consultar_contagem():
+            resultado = await cliente.consultar_sql(f"SELECT COUNT(*) FROM {PINOT_TABLE}")
+            if resultado.get("exceptions"):
+                logger.warning(f"Erro na consulta: {resultado['exceptions']}")
+            elif resultado.get("resultTable", {}).get("rows"):
+                logger.info(f"Consulta ao Pinot - Total de registros: {resultado['resultTable']['rows'][0][0]}")
+        
+        async def verificar_saude():
+            if not await cliente.saude():
+                logger.warning(f"Pinot Controller em {PINOT_CONTROLLER_URL} não está saudável")
+        
+        await executar_async(sys.modules[__name__], ciclo, [
+            ("consulta-pinot", lambda parar: tarefa_periodica("consulta-pinot", consultar_contagem,
+                                                              INTERVALO_CONSULTA_S, parar)),
+            ("saude-pinot", lambda parar: tarefa_periodica("saude-pinot", verificar_saude,
+                                                           INTERVALO_SAUDE_S, parar)),
+        ])
+
 def main():
     """Função principal para consumo e ingestão no Pinot"""
     # Configurar manipuladores de sinal para encerramento adequado
@@ -470,6 +512,7 @@ def main():
     logger.info(f"Iniciando consumidor para o tópico: {KAFKA_TOPIC}")
     logger.info(f"Usando servidor Kafka: {KAFKA_BOOTSTRAP_SERVERS}")
     logger.info(f"Grupo de consumidores: {KAFKA_GROUP_ID}")
+    metricas.iniciar_servidor()
     
     # Verificar conexão com Pinot
     if not verificar_pinot():
@@ -505,11 +548,7 @@ def main():
         test_query = f"SELECT COUNT(*) FROM {PINOT_TABLE}"
         logger.info(f"Enviando consulta: {test_query}")
         
-        response = requests.post(
-            f"{PINOT_BROKER_URL}/query/sql",
-            headers={"Content-Type": "application/json"},
-            json={"sql": test_query}
-        )
+        response = cliente_pinot.consultar_sql(test_query)
         
         if response.status_code == 200:
             result = response.json()
@@ -533,14 +572,25 @@ def main():
     
     logger.info("Configuração do Pinot concluída com sucesso. Iniciando consumo de Kafka...")
     
-    # Criar e configurar consumidor
-    consumidor = criar_consumidor()
+    # Criar e configurar consumidor (commit manual at-least-once por padrão)
+    gerenciador_commits = GerenciadorCommits() if COMMIT_MANUAL else None
+    consumidor = criar_consumidor(gerenciador_commits)
+    if gerenciador_commits is not None:
+        gerenciador_commits.vincular(consumidor)
+    monitor_lag = metricas.MonitorLag(consumidor)
     
     try:
         # Inscrever nos tópicos
-        consumidor.subscribe([KAFKA_TOPIC])
+        if gerenciador_commits is not None:
+            consumidor.subscribe([KAFKA_TOPIC], on_revoke=gerenciador_commits.ao_revogar)
+        else:
+            consumidor.subscribe([KAFKA_TOPIC])
         logger.info(f"Inscrito no tópico: {KAFKA_TOPIC}")
         
+        if RUNTIME_CONSUMIDOR == 'async':
+            asyncio.run(consumir_async(consumidor, gerenciador_commits, monitor_lag))
+            return
+        
         # Mensagens processadas
         contador = 0
         ultima_consulta = time.time()
@@ -549,42 +599,49 @@ def main():
         while running:
             # Tentar receber mensagem com timeout de 1 segundo
             msg = consumidor.poll(timeout=1.0)
+            monitor_lag.talvez_atualizar()
             
             # Realizar consulta de teste a cada 30 segundos
-            if time.time() - ultima_consulta > 30:
+            if time.time() - ultima_consulta > INTERVALO_CONSULTA_S:
                 testar_consulta_pinot()
+                logger.info(f"Latências do Pinot por endpoint: {cliente_pinot.latencias()}")
                 ultima_consulta = time.time()
             
             if msg is None:
+                if gerenciador_commits is not None:
+                    gerenciador_commits.talvez_commitar()
                 continue
             
             if msg.error():
-                # Erro fatal no consumidor
-                if msg.error().code() == KafkaError._PARTITION_EOF:
-                    logger.info(f"Fim da partição alcançado {msg.topic()}/{msg.partition()}")
-                elif msg.error().code() == KafkaError._TRANSPORT:
-                    logger.error(f"Erro de transporte: {msg.error()}")
-                else:
-                    logger.error(f"Erro do consumidor: {msg.error()}")
+                tratar_erro_mensagem(msg)
                 continue
             
+            VENDAS_CONSUMIDAS.incrementar()
+            BYTES_CONSUMIDOS.incrementar(len(msg))
+            
             # Processar mensagem recebida
             try:
                 # Kafka já está enviando para o Pinot baseado na configuração da tabela.
                 # Apenas para logar que as mensagens estão sendo processadas
                 contador += 1
-                if contador % 10 == 0:
-                    logger.info(f"Processadas {contador} mensagens até o momento")
+                _log_progresso.info("Processadas %d mensagens até o momento", contador)
                     
                 # Em um cenário real poderíamos adicionar validação ou transformação
                 # antes da ingestão no Pinot, mas neste caso o Pinot usa o Kafka diretamente
                 
             except Exception as e:
                 logger.error(f"Erro ao processar mensagem: {str(e)}")
+            
+            # Mensagem tratada: offset liberado para commit
+            if gerenciador_commits is not None:
+                gerenciador_commits.registrar([msg])
     
     except KafkaException as e:
         logger.error(f"Erro Kafka: {e}")
     finally:
+        # Confirmar o que já foi processado antes de fechar
+        if gerenciador_commits is not None:
+            gerenciador_commits.commit_final()
         # Fechar o consumidor apropriadamente
         logger.info("Fechando consumidor Kafka...")
         consumidor.close()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pipeline consume-transforma-produz exactly-once do tópico de vendas para o tópico curado.
+
+Lê vendas-tempo-real, valida e enriquece cada venda e grava o resultado em
+vendas-curadas, que o Pinot pode ingerir (PINOT_TOPICO=vendas-curadas) em vez
+do tópico bruto. As vendas curadas e os offsets consumidos são confirmados
+na mesma transação Kafka (send_offsets_to_transaction): depois de uma queda
+ou de uma transação abortada o pipeline recomeça do último offset confirmado,
+e consumidores com isolation.level=read_committed nunca veem as mensagens
+abortadas, então cada venda aparece uma única vez no tópico curado.
+
+Cada transação agrupa até TRANSACAO_MSGS mensagens ou TRANSACAO_INTERVALO_MS
+milissegundos de consumo: o custo fixo de um commit de transação (idas ao
+coordenador e marcadores nas partições) é dividido por todas as mensagens.
+O log periódico e o cenário de benchmark "transacoes" mostram a vazão em
+função do tamanho da transação.
+
+As vendas são verificadas pelo validador compilado de vendas_schema.json
+(schemas/validacao.py); as que não decodificam ou são inválidas vão para a
+DLQ (fila_erros.py) na mesma transação, com o motivo nos headers.
+
+Enriquecimento (o registro continua com os campos de vendas_schema.json,
+para que o mesmo schema do Pinot ingira os dois tópicos):
+    - data_hora truncada aos segundos (formato yyyy-MM-dd'T'HH:mm:ss do schema do Pinot),
+      ou derivada do timestamp quando ausente
+    - categoria derivada do produto e estado derivado da cidade quando ausentes
+      (antes da DLQ: a venda é validada de novo com as dimensões completadas)
+    - e-mail em minúsculas, sem espaços
+    - valor_total arredondado aos centavos
+
+Uso:
+    python src/consumer/pipeline_transacional.py [--transacao-msgs 10000] [--transacao-intervalo-ms 1000]
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import argparse
+from collections import Counter
+from datetime import datetime, timezone
+
+from confluent_kafka import Consumer, Producer, TopicPartition, KafkaException
+
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.serializadores import obter_serializador, ErroDesserializacao, FORMATO_SERIALIZACAO
+from schemas.dominios import CATEGORIA_DO_PRODUTO, ESTADO_DA_CIDADE
+from schemas.vendas import Venda
+from schemas.validacao import compilar_validador
+from comum import metricas
+from comum.logs import configurar_logs
+from kafka_consumer import tratar_erro_mensagem, TAMANHO_LOTE, LATENCIA_MAX_MS, INTERVALO_RELATORIO_S
+from fila_erros import FilaErros, DLQ_HABILITADA
+
+# Configurar logging
+configurar_logs()
+logger = logging.getLogger(__name__)
+
+# Configurações Kafka
+KAFKA_BOOTSTRAP_SERVERS = os.environ.get('KAFKA_BOOTSTRAP_SERVERS', 'localhost:29092')
+KAFKA_TOPIC = os.environ.get('KAFKA_TOPIC', 'vendas-tempo-real')
+KAFKA_AUTO_OFFSET_RESET = os.environ.get('KAFKA_AUTO_OFFSET_RESET', 'earliest')
+KAFKA_LINGER_MS = int(os.environ.get('KAFKA_LINGER_MS', '20'))
+KAFKA_BATCH_SIZE = int(os.environ.get('KAFKA_BATCH_SIZE', str(1 << 20)))
+KAFKA_COMPRESSION = os.environ.get('KAFKA_COMPRESSION', 'lz4')
+
+# Configurações do pipeline
+KAFKA_TOPICO_CURADO = os.environ.get('KAFKA_TOPICO_CURADO', 'vendas-curadas')
+PIPELINE_GROUP_ID = os.environ.get('PIPELINE_GROUP_ID', 'pipeline-vendas-curadas')
+# Estável entre reinícios: uma instância nova com o mesmo id isola (fence) a anterior
+PIPELINE_TRANSACTIONAL_ID = os.environ.get('PIPELINE_TRANSACTIONAL_ID', 'pipeline-vendas-curadas-0')
+# Formato do tópico curado; o compacto não é lido pelo Pinot
+FORMATO_CURADO = os.environ.get('FORMATO_CURADO', 'avro' if FORMATO_SERIALIZACAO == 'avro' else 'json')
+TRANSACAO_MSGS = int(os.environ.get('TRANSACAO_MSGS', '10000'))  # Mensagens por transação
+TRANSACAO_INTERVALO_MS = int(os.environ.get('TRANSACAO_INTERVALO_MS', '1000'))  # ... ou duração máxima
+TRANSACAO_TIMEOUT_MS = int(os.environ.get('TRANSACAO_TIMEOUT_MS', '60000'))
+TENTATIVAS_TRANSACAO = 3  # Tentativas de commit com erro recuperável antes de abortar
+
+# Métricas do pipeline (servidas em /metrics com METRICAS_PORTA)
+VENDAS_CURADAS = metricas.contador('vendas_curadas_total', 'Vendas validadas e produzidas no tópico curado')
+VENDAS_REJEITADAS = metricas.contador('vendas_rejeitadas_total', 'Vendas descartadas pelo pipeline por motivo',
+                                      ['motivo'])
+TRANSACOES = metricas.contador('pipeline_transacoes_total', 'Transações do pipeline por resultado', ['resultado'])
+TEMPO_COMMIT_TRANSACAO = metricas.histograma('pipeline_commit_transacao_segundos',
+                                             'Duração de send_offsets_to_transaction + commit_transaction')
+_transacoes_confirmadas = TRANSACOES.rotulado('confirmada')
+_transacoes_abortadas = TRANSACOES.rotulado('abortada')
+
+# Controle para interrupções
+running = True
+
+# Motivos de rejeição que completar_dimensoes() pode resolver
+MOTIVOS_COMPLETAVEIS = frozenset({'dominio:categoria', 'dominio:estado'})
+
+def completar_dimensoes(venda):
+    """Completa categoria e estado vazios a partir do produto e da cidade"""
+    categoria, estado = venda.categoria, venda.estado
+    if not categoria and type(venda.produto) is str:
+        categoria = CATEGORIA_DO_PRODUTO.get(venda.produto, categoria)
+    if not estado and type(venda.cidade) is str:
+        estado = ESTADO_DA_CIDADE.get(venda.cidade, estado)
+    return venda._replace(categoria=categoria, estado=estado)
+
+def _data_hora_de_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp / 1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+def enriquecer(venda):
+    """Normaliza os campos de uma venda válida"""
+    return Venda(
+        venda.id_venda,
+        venda.timestamp,
+        venda.data_hora[:19] if venda.data_hora else _data_hora_de_timestamp(venda.timestamp),
+        venda.id_cliente,
+        venda.nome_cliente,
+        venda.email_cliente.strip().lower(),
+        venda.produto,
+        venda.categoria,
+        venda.preco,
+        venda.quantidade,
+        round(venda.valor_total, 2),
+        venda.forma_pagamento,
+        venda.loja,
+        venda.cidade,
+        venda.estado,
+    )
+
+class PipelineTransacional:
+    """
+    Consome, valida, enriquece e produz vendas em transações Kafka.
+
+    processar() abre a transação na primeira mensagem e produz as vendas
+    curadas; talvez_confirmar() a confirma junto com os offsets quando o
+    tamanho ou a duração da transação é atingido. Se a transação precisa ser
+    abortada, o consumidor volta ao primeiro offset da transação em cada
+    partição e as mensagens são processadas de novo. As mensagens rejeitadas
+    vão para a DLQ pelo mesmo produtor, dentro da transação.
+
+    Uso:
+        pipeline = PipelineTransacional(criar_consumidor(), criar_produtor())
+        pipeline.iniciar()
+        consumidor.subscribe([topico], on_revoke=pipeline.ao_revogar)
+
+    Args:
+        consumidor (Consumer): Consumidor sem auto-commit, com isolation.level=read_committed
+        produtor (Producer): Produtor com transactional.id
+        serializador_entrada: Formato do tópico de origem (padrão: FORMATO_SERIALIZACAO)
+        serializador_saida: Formato do tópico curado (padrão: FORMATO_CURADO)
+        topico_saida (str): Tópico curado
+        transacao_msgs (int): Mensagens consumidas por transação
+        transacao_intervalo_ms (int): Duração máxima de uma transação aberta
+        dlq (bool): Envia as rejeitadas à DLQ (senão são só contadas)
+    """
+
+    def __init__(self, consumidor, produtor, serializador_entrada=None, serializador_saida=None,
+                 topico_saida=KAFKA_TOPICO_CURADO, transacao_msgs=TRANSACAO_MSGS,
+                 transacao_intervalo_ms=TRANSACAO_INTERVALO_MS, dlq=DLQ_HABILITADA):
+        self.consumidor = consumidor
+        self.produtor = produtor
+        self.serializador_entrada = serializador_entrada or obter_serializador()
+        self.serializador_saida = serializador_saida or obter_serializador(FORMATO_CURADO)
+        self.topico_saida = topico_saida
+        self.transacao_msgs = transacao_msgs
+        self.transacao_intervalo_s = transacao_intervalo_ms / 1000.0
+        self.validar = compilar_validador()
+        self.fila_erros = FilaErros(produtor, estagio='pipeline') if dlq else None
+
+        self._aberta = False
+        self._offsets = {}  # (tópico, partição) -> próximo offset a consumir
+        self._inicio_particoes = {}  # (tópico, partição) -> primeiro offset da transação aberta
+        self._mensagens_transacao = 0
+        self._curadas_transacao = 0
+        self._rejeitadas_transacao = Counter()
+        self._aberta_em = 0.0
+
+        self.transacoes = 0
+        self.abortadas = 0
+        self.consumidas = 0
+        self.curadas = 0
+        self.rejeitadas = Counter()
+        self.tempo_commit_s = 0.0
+
+    def iniciar(self):
+        """Registra o transactional.id no coordenador (isola instâncias anteriores com o mesmo id)"""
+        self.produtor.init_transactions(TRANSACAO_TIMEOUT_MS / 1000.0)
+
+    def processar(self, mensagens):
+        """
+        Valida, enriquece e produz um lote de mensagens na transação aberta.
+
+        Returns:
+            int: Vendas produzidas no tópico curado
+        """
+        desserializar = self.serializador_entrada.desserializar_venda
+        serializar = self.serializador_saida.serializar
+        produzir = self.produtor.produce
+        topico_saida = self.topico_saida
+        offsets = self._offsets
+        rejeitadas = self._rejeitadas_transacao
+        validar = self.validar
+        fila_erros = self.fila_erros
+        curadas = 0
+        for msg in mensagens:
+            if msg.error():
+                tratar_erro_mensagem(msg)
+                continue
+            if not self._aberta:
+                self._abrir()
+            chave = (msg.topic(), msg.partition())
+            if chave not in self._inicio_particoes:
+                self._inicio_particoes[chave] = msg.offset()
+            offsets[chave] = msg.offset() + 1
+            self._mensagens_transacao += 1
+            try:
+                venda = desserializar(msg.value())
+            except ErroDesserializacao as e:
+                rejeitadas['decodificacao'] += 1
+                if fila_erros is not None:
+                    fila_erros.adicionar(msg, 'decodificacao', e)
+                continue
+            motivo = validar(venda)
+            if motivo in MOTIVOS_COMPLETAVEIS:
+                venda = completar_dimensoes(venda)
+                motivo = validar(venda)
+            if motivo is not None:
+                rejeitadas[motivo] += 1
+                if fila_erros is not None:
+                    fila_erros.adicionar(msg, motivo)
+                continue
+            valor = serializar(enriquecer(venda))
+            while True:
+                try:
+                    produzir(topico_saida, valor, msg.key())
+                    break
+                except BufferError:
+                    # Fila local cheia: entregar pendências e tentar de novo
+                    self.produtor.poll(0.1)
+            curadas += 1
+        # Rejeitadas do lote na transação aberta: confirmadas ou descartadas junto com ela
+        if fila_erros is not None:
+            fila_erros.enviar(aguardar=False)
+        self._curadas_transacao += curadas
+        return curadas
+
+    def _abrir(self):
+        self.produtor.begin_transaction()
+        self._aberta = True
+        self._aberta_em = time.monotonic()
+
+    def talvez_confirmar(self):
+        """Confirma a transação aberta se o tamanho ou a duração máxima foi atingido"""
+        if not self._aberta:
+            return
+        if (self._mensagens_transacao >= self.transacao_msgs
+                or time.monotonic() - self._aberta_em >= self.transacao_intervalo_s):
+            self.confirmar()
+
+    def confirmar(self):
+        """
+        Confirma as vendas produzidas e os offsets consumidos em uma única transação.
+
+        Returns:
+            bool: False se a transação teve de ser abortada (as mensagens serão reprocessadas)
+        """
+        if not self._aberta:
+            return True
+        offsets = [TopicPartition(topico, particao, offset) for (topico, particao), offset in self._offsets.items()]
+        inicio = time.monotonic()
+        try:
+            self.produtor.send_offsets_to_transaction(offsets, self.consumidor.consumer_group_metadata(),
+                                                      TRANSACAO_TIMEOUT_MS / 1000.0)
+            for tentativa in range(1, TENTATIVAS_TRANSACAO + 1):
+                try:
+                    self.produtor.commit_transaction(TRANSACAO_TIMEOUT_MS / 1000.0)
+                    break
+                except KafkaException as e:
+                    if not e.args[0].retriable() or tentativa == TENTATIVAS_TRANSACAO:
+                        raise
+                    logger.warning(f"Erro recuperável no commit da transação (tentativa {tentativa}): {e}")
+        except KafkaException as e:
+            if not e.args[0].txn_requires_abort():
+                # Erro fatal (ex.: outra instância com o mesmo transactional.id): o produtor não pode continuar
+                raise
+            logger.error(f"Transação abortada: {e}")
+            self.abortar()
+            return False
+        decorrido = time.monotonic() - inicio
+        TEMPO_COMMIT_TRANSACAO.observar(decorrido)
+        _transacoes_confirmadas.incrementar()
+        VENDAS_CURADAS.incrementar(self._curadas_transacao)
+        for motivo, quantidade in self._rejeitadas_transacao.items():
+            VENDAS_REJEITADAS.rotulado(motivo).incrementar(quantidade)
+        if self.fila_erros is not None:
+            self.fila_erros.confirmar_transacao()
+        self.transacoes += 1
+        self.tempo_commit_s += decorrido
+        self.consumidas += self._mensagens_transacao
+        self.curadas += self._curadas_transacao
+        self.rejeitadas.update(self._rejeitadas_transacao)
+        self._limpar()
+        return True
+
+    def abortar(self):
+        """Descarta a transação aberta e volta o consumidor ao início dela em cada partição"""
+        if not self._aberta:
+            return
+        self.produtor.abort_transaction(TRANSACAO_TIMEOUT_MS / 1000.0)
+        if self.fila_erros is not None:
+            self.fila_erros.descartar_transacao()
+        _transacoes_abortadas.incrementar()
+        self.abortadas += 1
+        atribuidas = {(tp.topic, tp.partition) for tp in self.consumidor.assignment()}
+        for (topico, particao), offset in self._inicio_particoes.items():
+            if (topico, particao) in atribuidas:
+                self.consumidor.seek(TopicPartition(topico, particao, offset))
+        self._limpar()
+
+    def _limpar(self):
+        self._aberta = False
+        self._offsets = {}
+        self._inicio_particoes = {}
+        self._mensagens_transacao = 0
+        self._curadas_transacao = 0
+        self._rejeitadas_transacao = Counter()
+
+    def ao_revogar(self, consumidor, particoes):
+        """Callback on_revoke: confirma a transação antes de perder as partições"""
+        self.confirmar()
+
+    def estatisticas(self):
+        """Totais das transações confirmadas"""
+        return {
+            "transacoes": self.transacoes,
+            "abortadas": self.abortadas,
+            "consumidas": self.consumidas,
+            "curadas": self.curadas,
+            "rejeitadas": dict(self.rejeitadas),
+            "msgs_por_transacao": self.consumidas / self.transacoes if self.transacoes else 0.0,
+            "commit_medio_ms": self.tempo_commit_s / self.transacoes * 1000 if self.transacoes else 0.0,
+        }
+
+def executar(pipeline, tamanho_lote=TAMANHO_LOTE, latencia_max_ms=LATENCIA_MAX_MS, parar=None):
+    """
+    Loop do pipeline: consume(), processar() e talvez_confirmar().
+
+    Loga a cada INTERVALO_RELATORIO_S segundos a vazão do intervalo e o
+    tamanho médio e o custo de commit das transações.
+
+    Args:
+        parar (callable): Retorna True para encerrar o loop (padrão: sinal recebido)
+    """
+    parar = parar or (lambda: not running)
+    # Lotes maiores que a transação a fariam crescer além de transacao_msgs
+    tamanho_lote = min(tamanho_lote, pipeline.transacao_msgs)
+    anterior = pipeline.estatisticas()
+    ultimo_relatorio = time.monotonic()
+    logger.info(f"Pipeline {KAFKA_TOPIC} -> {pipeline.topico_saida}: transações de até {pipeline.transacao_msgs} "
+                f"mensagens ou {pipeline.transacao_intervalo_s * 1000:.0f} ms")
+    while not parar():
+        mensagens = pipeline.consumidor.consume(num_messages=tamanho_lote, timeout=latencia_max_ms / 1000.0)
+        pipeline.processar(mensagens)
+        pipeline.talvez_confirmar()
+
+        agora = time.monotonic()
+        if agora - ultimo_relatorio >= INTERVALO_RELATORIO_S:
+            atual = pipeline.estatisticas()
+            intervalo = agora - ultimo_relatorio
+            transacoes = atual["transacoes"] - anterior["transacoes"]
+            consumidas = atual["consumidas"] - anterior["consumidas"]
+            logger.info(f"Curadas {atual['curadas']} vendas ({consumidas / intervalo:.0f} msgs/s), "
+                        f"{transacoes / intervalo:.1f} transações/s de "
+                        f"{consumidas / transacoes if transacoes else 0:.0f} mensagens, "
+                        f"commit médio {atual['commit_medio_ms']:.1f} ms, rejeitadas {atual['rejeitadas']}")
+            anterior = atual
+            ultimo_relatorio = agora
+    pipeline.confirmar()
+
+def criar_consumidor():
+    """Consumidor do pipeline: commits só pela transação, lendo apenas dados confirmados"""
+    return Consumer({
+        'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
+        'group.id': PIPELINE_GROUP_ID,
+        'auto.offset.reset': KAFKA_AUTO_OFFSET_RESET,
+        'enable.auto.commit': False,
+        'isolation.level': 'read_committed',
+        'max.poll.interval.ms': 300000,
+        'session.timeout.ms': 30000
+    })
+
+def criar_produtor():
+    """Produtor transacional (idempotente) do tópico curado"""
+    return Producer({
+        'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
+        'transactional.id': PIPELINE_TRANSACTIONAL_ID,
+        'enable.idempotence': True,
+        'transaction.timeout.ms': TRANSACAO_TIMEOUT_MS,
+        'linger.ms': KAFKA_LINGER_MS,
+        'batch.size': KAFKA_BATCH_SIZE,
+        'compression.type': KAFKA_COMPRESSION
+    })
+
+def handle_signal(sig, frame):
+    """Manipulador de sinal para encerrar o pipeline graciosamente"""
+    global running
+    logger.info(f"Sinal recebido: {sig}. Encerrando o pipeline...")
+    running = False
+
+def main():
+    """Função principal do pipeline transacional"""
+    parser = argparse.ArgumentParser(description="Pipeline exactly-once do tópico de vendas para o tópico curado")
+    parser.add_argument("--transacao-msgs", type=int, default=TRANSACAO_MSGS,
+                        help="Mensagens consumidas por transação")
+    parser.add_argument("--transacao-intervalo-ms", type=int, default=TRANSACAO_INTERVALO_MS,
+                        help="Duração máxima de uma transação")
+    parser.add_argument("--topico-saida", default=KAFKA_TOPICO_CURADO)
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    metricas.iniciar_servidor()
+
+    consumidor = criar_consumidor()
+    produtor = criar_produtor()
+    pipeline = PipelineTransacional(consumidor, produtor, topico_saida=args.topico_saida,
+                                    transacao_msgs=args.transacao_msgs,
+                                    transacao_intervalo_ms=args.transacao_intervalo_ms)
+    logger.info(f"Formatos: {pipeline.serializador_entrada.nome} -> {pipeline.serializador_saida.nome}, "
+                f"transactional.id {PIPELINE_TRANSACTIONAL_ID}")
+    try:
+        pipeline.iniciar()
+        consumidor.subscribe([KAFKA_TOPIC], on_revoke=pipeline.ao_revogar)
+        executar(pipeline)
+    except KafkaException as e:
+        logger.error(f"Erro Kafka: {e}")
+    finally:
+        logger.info(f"Fechando pipeline: {pipeline.estatisticas()}")
+        consumidor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Runtime asyncio para os consumidores Kafka (RUNTIME_CONSUMIDOR=async).
+
+O poll do Kafka roda em uma thread dedicada (executor com um único worker,
+pois o Consumer não deve ser usado por várias threads ao mesmo tempo),
+enquanto chamadas HTTP ao Pinot, health checks e consultas periódicas rodam
+como tarefas independentes no event loop. Assim, a latência do Pinot nunca
+bloqueia o consumo.
+"""
+
+import os
+import signal
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from pinot_client import LATENCIA_PINOT
+
+logger = logging.getLogger(__name__)
+
+# Runtime dos consumidores: 'sincrono' (loop bloqueante original) ou 'async'
+RUNTIME_CONSUMIDOR = os.environ.get('RUNTIME_CONSUMIDOR', 'sincrono')
+
+# Configurações do cliente HTTP assíncrono
+PINOT_LIMITE_CONEXOES = int(os.environ.get('PINOT_LIMITE_CONEXOES', '10'))
+PINOT_TIMEOUT_S = float(os.environ.get('PINOT_TIMEOUT_S', '5'))
+
+class ClientePinotAsync:
+    """
+    Cliente HTTP assíncrono para o controller e o broker do Pinot.
+
+    Mantém uma única ClientSession (pool de conexões keep-alive) durante toda
+    a execução. Usar como gerenciador de contexto assíncrono.
+    """
+
+    def __init__(self, controller_url, broker_url, limite_conexoes=PINOT_LIMITE_CONEXOES,
+                 timeout_s=PINOT_TIMEOUT_S):
+        self.controller_url = controller_url
+        self.broker_url = broker_url
+        self.limite_conexoes = limite_conexoes
+        self.timeout_s = timeout_s
+        self.sessao = None
+
+    async def __aenter__(self):
+        self.sessao = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.limite_conexoes),
+            timeout=aiohttp.ClientTimeout(total=self.timeout_s)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.sessao.close()
+
+    async def saude(self):
+        """Retorna True se o controller responde 2xx em /health"""
+        try:
+            with LATENCIA_PINOT.rotulado("controller", "GET", "/health").medir():
+                async with self.sessao.get(f"{self.controller_url}/health") as resposta:
+                    return 200 <= resposta.status < 300
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Health check do Pinot falhou: {e}")
+            return False
+
+    async def consultar_sql(self, sql):
+        """Envia uma consulta SQL ao broker e retorna o JSON da resposta"""
+        with LATENCIA_PINOT.rotulado("broker", "POST", "/query").medir():
+            async with self.sessao.post(f"{self.broker_url}/query/sql", json={"sql": sql}) as resposta:
+                resposta.raise_for_status()
+                return await resposta.json()
+
+async def tarefa_periodica(nome, funcao, intervalo_s, parar):
+    """
+    Executa a corrotina funcao() a cada intervalo_s segundos até o evento parar.
+
+    Falhas são logadas e não interrompem as próximas execuções.
+    """
+    while not parar.is_set():
+        try:
+            await funcao()
+        except Exception as e:
+            logger.warning(f"Tarefa {nome} falhou: {e}")
+        try:
+            await asyncio.wait_for(parar.wait(), timeout=intervalo_s)
+        except asyncio.TimeoutError:
+            pass
+
+async def executar(modulo, ciclo, tarefas=()):
+    """
+    Executa o consumo e as tarefas periódicas até o sinal de encerramento.
+
+    Args:
+        modulo: Módulo do consumidor; seu handle_signal é chamado nos sinais
+            SIGINT/SIGTERM e seu flag `running` controla o fim do consumo
+        ciclo (callable): Função síncrona com uma iteração de consumo
+            (poll/consume, processamento e commit), executada na thread de poll
+        tarefas (iterable): Pares (nome, fabrica) onde fabrica(parar) retorna
+            a corrotina de uma tarefa a rodar em paralelo ao consumo
+    """
+    loop = asyncio.get_running_loop()
+    parar = asyncio.Event()
+
+    def ao_sinal(sig):
+        # Mesma semântica do loop síncrono: handle_signal desliga `running`
+        modulo.handle_signal(sig, None)
+        parar.set()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, ao_sinal, sig)
+
+    executor_poll = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kafka-poll')
+
+    async def consumir():
+        try:
+            while modulo.running:
+                await loop.run_in_executor(executor_poll, ciclo)
+        finally:
+            parar.set()
+
+    pendentes = [asyncio.create_task(consumir(), name='consumo')]
+    pendentes += [asyncio.create_task(fabrica(parar), name=nome) for nome, fabrica in tarefas]
+
+    try:
+        await parar.wait()
+        modulo.running = False
+        resultados = await asyncio.gather(*pendentes, return_exceptions=True)
+        for tarefa, resultado in zip(pendentes, resultados):
+            if isinstance(resultado, Exception):
+                logger.error(f"Tarefa {tarefa.get_name()} terminou com erro: {resultado}")
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        # O consumidor é fechado pelo chamador, na thread principal, após o ciclo em curso terminar
+        executor_poll.shutdown(wait=True)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sonda de frescor: mede quanto tempo uma venda leva do produce() até ser consultável no Pinot.
+
+A cada FRESCOR_INTERVALO_S a sonda envia uma venda marcadora (id_venda com o
+prefixo FRESCOR_PREFIXO) pelo mesmo caminho do gerador: gerar_venda(),
+serializador configurado e produtor Kafka. As marcadoras pendentes são
+procuradas no broker a cada FRESCOR_POLL_MS com uma única consulta por
+id_venda (IN, coberta pelo bloom filter) restrita ao intervalo de tempo das
+marcadoras, que poda os segmentos antigos.
+
+Para cada marcadora são medidos produce -> confirmação do Kafka e
+produce -> visível no Pinot (resolução de FRESCOR_POLL_MS). Os percentis da
+janela recente são logados e exportados em /metrics (METRICAS_PORTA).
+As marcadoras são vendas válidas; para excluí-las das análises use
+id_venda NOT LIKE 'sonda-%'.
+
+Uso:
+    python src/consumer/sonda_frescor.py [--duracao 600]
+"""
+
+import os
+import sys
+import time
+import uuid
+import logging
+import argparse
+from collections import deque
+
+import numpy as np
+import requests
+
+# Diretórios src/ e src/producer no path para usar o caminho de produção do gerador
+DIRETORIO_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO_SRC)
+sys.path.insert(0, os.path.join(DIRETORIO_SRC, 'producer'))
+from schemas.serializadores import obter_serializador
+from comum import metricas
+from comum.logs import configurar_logs
+from pinot_client import PinotClient
+from data_generator import gerar_venda, criar_produtor
+
+# Configurar logging
+configurar_logs()
+logger = logging.getLogger(__name__)
+
+# Configurações Kafka e Pinot
+KAFKA_TOPIC = os.environ.get('KAFKA_TOPIC', 'vendas-tempo-real')
+PINOT_CONTROLLER_URL = os.environ.get('PINOT_CONTROLLER_URL', 'http://localhost:9000')
+PINOT_BROKER_URL = os.environ.get('PINOT_BROKER_URL', 'http://localhost:8099')
+PINOT_TABLE = os.environ.get('PINOT_TABLE', 'vendas')
+
+# Configurações da sonda
+FRESCOR_INTERVALO_S = float(os.environ.get('FRESCOR_INTERVALO_S', '5'))  # Uma marcadora a cada N s
+FRESCOR_POLL_MS = int(os.environ.get('FRESCOR_POLL_MS', '200'))  # Intervalo entre buscas no broker
+FRESCOR_TIMEOUT_S = float(os.environ.get('FRESCOR_TIMEOUT_S', '300'))  # Marcadora dada como perdida
+FRESCOR_JANELA = int(os.environ.get('FRESCOR_JANELA', '720'))  # Amostras usadas nos percentis
+FRESCOR_PREFIXO = os.environ.get('FRESCOR_PREFIXO', 'sonda-')
+INTERVALO_RELATORIO_S = 30
+PERCENTIS = (50, 90, 99)
+
+# Limites dos histogramas: a ingestão realtime fica entre centenas de ms e minutos
+LIMITES_FRESCOR = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+# Métricas da sonda
+LATENCIA_ETAPA = metricas.histograma('frescor_latencia_segundos', 'Latência das marcadoras por etapa',
+                                     ['etapa'], limites=LIMITES_FRESCOR)
+PERCENTIL_ETAPA = metricas.medidor('frescor_percentil_segundos',
+                                   'Percentis da janela recente de marcadoras por etapa',
+                                   ['etapa', 'percentil'])
+MARCADORAS = metricas.contador('frescor_marcadoras_total', 'Marcadoras por resultado', ['resultado'])
+PENDENTES = metricas.medidor('frescor_marcadoras_pendentes', 'Marcadoras enviadas ainda não visíveis no Pinot')
+
+# Etapas medidas a partir do produce()
+ETAPA_ACK = 'kafka_ack'
+ETAPA_VISIVEL = 'pinot_visivel'
+
+class Marcadora:
+    """Venda marcadora em voo"""
+
+    __slots__ = ('id_venda', 'timestamp', 'enviada', 'ack_s')
+
+    def __init__(self, id_venda, timestamp, enviada):
+        self.id_venda = id_venda
+        self.timestamp = timestamp
+        self.enviada = enviada
+        self.ack_s = None
+
+class SondaFrescor:
+    """
+    Injeta marcadoras e acompanha quando ficam visíveis no Pinot.
+
+    Args:
+        produtor: Producer Kafka (ou compatível)
+        cliente: PinotClient usado nas buscas (sem cache, para não mascarar o frescor)
+        topico (str): Tópico das vendas
+        tabela (str): Tabela do Pinot
+        janela (int): Amostras recentes usadas nos percentis
+        timeout_s (float): Tempo após o qual uma marcadora não encontrada é descartada
+    """
+
+    def __init__(self, produtor, cliente, topico=KAFKA_TOPIC, tabela=PINOT_TABLE,
+                 janela=FRESCOR_JANELA, timeout_s=FRESCOR_TIMEOUT_S):
+        self.produtor = produtor
+        self.cliente = cliente
+        self.topico = topico
+        self.tabela = tabela
+        self.timeout_s = timeout_s
+        self.serializador = obter_serializador()
+        self.pendentes = {}  # id_venda -> Marcadora
+        self.amostras = {ETAPA_ACK: deque(maxlen=janela), ETAPA_VISIVEL: deque(maxlen=janela)}
+        self.enviadas = self.visiveis = self.perdidas = self.erros_entrega = 0
+
+    def injetar(self):
+        """Envia uma marcadora pelo caminho normal de produção"""
+        venda = gerar_venda()
+        venda = venda._replace(id_venda=f"{FRESCOR_PREFIXO}{uuid.uuid4()}")
+        marcadora = Marcadora(venda.id_venda, venda.timestamp, time.monotonic())
+        self.pendentes[venda.id_venda] = marcadora
+        self.produtor.produce(self.topico, key=venda.id_venda.encode('utf-8'),
+                              value=self.serializador.serializar(venda), callback=self._ao_entregar)
+        self.enviadas += 1
+        PENDENTES.definir(len(self.pendentes))
+
+    def _ao_entregar(self, err, msg):
+        marcadora = self.pendentes.get(msg.key().decode('utf-8'))
+        if marcadora is None:
+            return
+        if err is not None:
+            logger.error(f"Erro na entrega da marcadora {marcadora.id_venda}: {err}")
+            del self.pendentes[marcadora.id_venda]
+            self.erros_entrega += 1
+            MARCADORAS.rotulado('erro_entrega').incrementar()
+            return
+        latencia = msg.latency()
+        marcadora.ack_s = latencia if latencia is not None else time.monotonic() - marcadora.enviada
+        self._registrar(ETAPA_ACK, marcadora.ack_s)
+
+    def _registrar(self, etapa, segundos):
+        self.amostras[etapa].append(segundos)
+        LATENCIA_ETAPA.rotulado(etapa).observar(segundos)
+
+    def consulta_pendentes(self):
+        """SQL que busca as marcadoras pendentes já confirmadas pelo Kafka"""
+        confirmadas = [m for m in self.pendentes.values() if m.ack_s is not None]
+        if not confirmadas:
+            return None
+        ids = ", ".join(f"'{m.id_venda}'" for m in confirmadas)
+        inicio = min(m.timestamp for m in confirmadas)
+        return (f"SELECT id_venda FROM {self.tabela} "
+                f"WHERE id_venda IN ({ids}) AND timestamp >= {inicio} LIMIT {len(confirmadas)}")
+
+    def verificar(self):
+        """Processa as confirmações de entrega e busca as marcadoras pendentes no broker"""
+        self.produtor.poll(0)
+        sql = self.consulta_pendentes()
+        if sql is not None:
+            try:
+                resposta = self.cliente.consultar_sql(sql)
+                resposta.raise_for_status()
+                resultado = resposta.json()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Erro ao buscar marcadoras no Pinot: {e}")
+                resultado = {}
+            if resultado.get("exceptions"):
+                logger.warning(f"Erro na busca de marcadoras: {resultado['exceptions']}")
+            agora = time.monotonic()
+            for (id_venda,) in resultado.get("resultTable", {}).get("rows", []):
+                marcadora = self.pendentes.pop(id_venda, None)
+                if marcadora is not None:
+                    self.visiveis += 1
+                    MARCADORAS.rotulado('visivel').incrementar()
+                    self._registrar(ETAPA_VISIVEL, agora - marcadora.enviada)
+        self._expirar()
+        PENDENTES.definir(len(self.pendentes))
+
+    def _expirar(self):
+        limite = time.monotonic() - self.timeout_s
+        for id_venda in [i for i, m in self.pendentes.items() if m.enviada < limite]:
+            del self.pendentes[id_venda]
+            self.perdidas += 1
+            MARCADORAS.rotulado('perdida').incrementar()
+            logger.warning(f"Marcadora {id_venda} não apareceu no Pinot em {self.timeout_s:.0f}s")
+
+    def percentis(self):
+        """{etapa: {'p50': s, ...}} da janela recente; também atualiza os medidores exportados"""
+        resultado = {}
+        for etapa, amostras in self.amostras.items():
+            if not amostras:
+                continue
+            valores = np.percentile(np.fromiter(amostras, dtype=np.float64), PERCENTIS)
+            resultado[etapa] = {f"p{p}": float(v) for p, v in zip(PERCENTIS, valores)}
+            for nome, valor in resultado[etapa].items():
+                PERCENTIL_ETAPA.rotulado(etapa, nome).definir(valor)
+        return resultado
+
+    def relatar(self):
+        partes = [f"{etapa} " + " ".join(f"{p}={v * 1000:.0f}ms" for p, v in valores.items())
+                  for etapa, valores in self.percentis().items()]
+        logger.info(f"Frescor: {self.enviadas} enviadas, {self.visiveis} visíveis, {len(self.pendentes)} pendentes, "
+                    f"{self.perdidas} perdidas" + (" | " + " | ".join(partes) if partes else ""))
+
+    def executar(self, duracao=0, intervalo_s=FRESCOR_INTERVALO_S, poll_ms=FRESCOR_POLL_MS):
+        """
+        Injeta marcadoras e as procura até duracao segundos (0 = até interrupção).
+
+        Ao final, continua buscando as pendentes até o timeout.
+        """
+        inicio = time.monotonic()
+        proxima_injecao = ultimo_relatorio = inicio
+        try:
+            while duracao <= 0 or time.monotonic() - inicio < duracao:
+                agora = time.monotonic()
+                if agora >= proxima_injecao:
+                    self.injetar()
+                    proxima_injecao = agora + intervalo_s
+                self.verificar()
+                if agora - ultimo_relatorio >= INTERVALO_RELATORIO_S:
+                    self.relatar()
+                    ultimo_relatorio = agora
+                time.sleep(poll_ms / 1000.0)
+            self.produtor.flush(10)
+            while self.pendentes:
+                self.verificar()
+                time.sleep(poll_ms / 1000.0)
+        except KeyboardInterrupt:
+            logger.info("Interrompido pelo usuário. Finalizando...")
+        finally:
+            self.relatar()
+        return self.percentis()
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a latência do produce() até a venda ser consultável no Pinot")
+    parser.add_argument("--duracao", type=float, default=0, help="Duração em segundos (0 = até interrupção)")
+    parser.add_argument("--intervalo", type=float, default=FRESCOR_INTERVALO_S, help="Segundos entre marcadoras")
+    args = parser.parse_args()
+
+    metricas.iniciar_servidor()
+    logger.info(f"Sonda de frescor: tópico {KAFKA_TOPIC}, tabela {PINOT_TABLE} em {PINOT_BROKER_URL}, "
+                f"uma marcadora a cada {args.intervalo:.1f}s")
+    cliente = PinotClient(PINOT_CONTROLLER_URL, PINOT_BROKER_URL)
+    sonda = SondaFrescor(criar_produtor(), cliente)
+    try:
+        sonda.executar(args.duracao, args.intervalo)
+    finally:
+        cliente.fechar()
+
+if __name__ == "__main__":
+    main()
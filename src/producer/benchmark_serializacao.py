@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do caminho quente do produtor: custo por registro do caminho
+original (datetime.now/isoformat, uuid4, dict e json.dumps) contra o caminho
+atual (RelogioISO, PoolUUID, Venda e codificador JSON compilado).
+
+Faker fica fora da medição nos dois caminhos (nome e email fixos), pois é
+igual em ambos e dominaria o tempo.
+
+Uso:
+    python src/producer/benchmark_serializacao.py [--registros 200000]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime
+
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_generator import (RelogioISO, PoolUUID, CATEGORIAS_PRODUTOS, PRODUTOS, PRECOS,
+                            FORMAS_PAGAMENTO, ESTADOS_LOJAS)
+from schemas.serializadores import SerializadorJSON
+from schemas.vendas import Venda
+
+NOME, EMAIL = "Maria da Silva", "maria@example.com"
+
+def _sortear_produto():
+    categoria = random.choice(CATEGORIAS_PRODUTOS)
+    produto = random.choice(PRODUTOS[categoria])
+    preco = round(random.uniform(*PRECOS[categoria]), 2)
+    quantidade = random.randint(1, 5)
+    estado = random.choice(list(ESTADOS_LOJAS.keys()))
+    cidade = random.choice(ESTADOS_LOJAS[estado])
+    return categoria, produto, preco, quantidade, estado, cidade
+
+def caminho_original():
+    """Registro e mensagem como no gerar_venda()/main() originais"""
+    agora = datetime.now()
+    timestamp = int(agora.timestamp() * 1000)
+    data_hora = agora.isoformat()
+    id_cliente = str(uuid.uuid4())
+    categoria, produto, preco, quantidade, estado, cidade = _sortear_produto()
+    venda = {
+        "id_venda": str(uuid.uuid4()),
+        "timestamp": timestamp,
+        "data_hora": data_hora,
+        "id_cliente": id_cliente,
+        "nome_cliente": NOME,
+        "email_cliente": EMAIL,
+        "produto": produto,
+        "categoria": categoria,
+        "preco": preco,
+        "quantidade": quantidade,
+        "valor_total": round(preco * quantidade, 2),
+        "forma_pagamento": random.choice(FORMAS_PAGAMENTO),
+        "loja": f"{cidade}-{random.randint(1, 10)}",
+        "cidade": cidade,
+        "estado": estado
+    }
+    return json.dumps(venda).encode('utf-8'), venda['id_venda'].encode('utf-8')
+
+def criar_caminho_atual():
+    relogio = RelogioISO()
+    pool_uuid = PoolUUID()
+    serializador = SerializadorJSON()
+
+    def caminho_atual():
+        timestamp, data_hora = relogio.agora()
+        id_cliente = pool_uuid.proximo()
+        categoria, produto, preco, quantidade, estado, cidade = _sortear_produto()
+        venda = Venda(pool_uuid.proximo(), timestamp, data_hora, id_cliente, NOME, EMAIL, produto, categoria,
+                      preco, quantidade, round(preco * quantidade, 2), random.choice(FORMAS_PAGAMENTO),
+                      f"{cidade}-{random.randint(1, 10)}", cidade, estado)
+        return serializador.serializar(venda), venda.id_venda.encode('utf-8')
+
+    return caminho_atual
+
+def medir(funcao, registros):
+    """Tempo médio por chamada em microssegundos"""
+    inicio = time.perf_counter()
+    for _ in range(registros):
+        funcao()
+    return (time.perf_counter() - inicio) / registros * 1e6
+
+def medir_componentes(registros):
+    """Custo isolado de cada parte substituída"""
+    relogio = RelogioISO()
+    pool_uuid = PoolUUID()
+    serializador = SerializadorJSON()
+    venda = Venda(str(uuid.uuid4()), 0, datetime.now().isoformat(), str(uuid.uuid4()), NOME, EMAIL,
+                  "Notebook", "Eletrônicos", 1234.5, 2, 2469.0, "PIX", "Campinas-3", "Campinas", "SP")
+    registro = venda._asdict()
+
+    def data_original():
+        agora = datetime.now()
+        return int(agora.timestamp() * 1000), agora.isoformat()
+
+    return [
+        ("data/hora", medir(data_original, registros), medir(relogio.agora, registros)),
+        ("uuid", medir(lambda: str(uuid.uuid4()), registros), medir(pool_uuid.proximo, registros)),
+        ("json", medir(lambda: json.dumps(registro).encode('utf-8'), registros),
+         medir(lambda: serializador.serializar(venda), registros)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do caminho quente do produtor")
+    parser.add_argument("--registros", type=int, default=200000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    linhas = medir_componentes(args.registros)
+    linhas.append(("registro completo", medir(caminho_original, args.registros),
+                   medir(criar_caminho_atual(), args.registros)))
+
+    print(f"{'etapa':<20}{'original (us)':>15}{'atual (us)':>12}{'ganho':>8}")
+    for etapa, original, atual in linhas:
+        print(f"{etapa:<20}{original:>15.2f}{atual:>12.2f}{original / atual:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
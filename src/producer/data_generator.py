@@ -5,21 +5,28 @@
 Gerador de dados simulados de vendas para envio ao Kafka.
 """
 
-import json
 import time
-import uuid
 import random
 from datetime import datetime
+import numpy as np
 from confluent_kafka import Producer
 from faker import Faker
 import os
+import sys
 import logging
 
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.serializadores import obter_serializador
+from schemas.vendas import Venda, CAMPOS, vendas_de_colunas
+# Constantes para simulação de dados (reexportadas para quem importa do gerador)
+from schemas.dominios import (CATEGORIAS_PRODUTOS, PRODUTOS, PRECOS, FORMAS_PAGAMENTO, ESTADOS_LOJAS,
+                              LOJAS_POR_CIDADE, nome_loja)
+from comum import metricas
+from comum.logs import configurar_logs, LogAmostrado
+
 # Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configurar_logs()
 logger = logging.getLogger(__name__)
 
 # Inicializar Faker para gerar dados realistas
@@ -33,58 +40,77 @@ KAFKA_TOPIC = os.environ.get('KAFKA_TOPIC', 'vendas-tempo-real')
 INTERVALO_MIN_MS = 500  # Intervalo mínimo entre mensagens (ms)
 INTERVALO_MAX_MS = 2000  # Intervalo máximo entre mensagens (ms)
 
-# Constantes para simulação de dados
-CATEGORIAS_PRODUTOS = [
-    "Eletrônicos", "Roupas", "Alimentos", "Livros", "Móveis", 
-    "Esportes", "Beleza", "Brinquedos", "Ferramentas", "Jóias"
-]
-
-PRODUTOS = {
-    "Eletrônicos": ["Smartphone", "Notebook", "Tablet", "Smart TV", "Fones de Ouvido"],
-    "Roupas": ["Camisa", "Calça", "Vestido", "Casaco", "Tênis"],
-    "Alimentos": ["Café", "Chocolate", "Pão", "Arroz", "Feijão"],
-    "Livros": ["Romance", "Técnico", "Biografia", "Ficção", "Auto-ajuda"],
-    "Móveis": ["Sofá", "Mesa", "Cadeira", "Armário", "Cama"],
-    "Esportes": ["Bola", "Raquete", "Tênis Esportivo", "Luvas", "Bicicleta"],
-    "Beleza": ["Perfume", "Shampoo", "Maquiagem", "Creme", "Batom"],
-    "Brinquedos": ["Boneca", "Carrinho", "Jogo de Tabuleiro", "Quebra-cabeça", "Pelúcia"],
-    "Ferramentas": ["Martelo", "Furadeira", "Alicate", "Serra", "Chave de Fenda"],
-    "Jóias": ["Anel", "Colar", "Brinco", "Pulseira", "Relógio"]
-}
-
-PRECOS = {
-    "Eletrônicos": (500, 5000),
-    "Roupas": (50, 500),
-    "Alimentos": (5, 100),
-    "Livros": (30, 200),
-    "Móveis": (300, 3000),
-    "Esportes": (50, 1000),
-    "Beleza": (20, 300),
-    "Brinquedos": (30, 500),
-    "Ferramentas": (40, 800),
-    "Jóias": (100, 5000)
-}
-
-FORMAS_PAGAMENTO = ["Crédito", "Débito", "Dinheiro", "PIX", "Boleto"]
-
-ESTADOS_LOJAS = {
-    "SP": ["São Paulo", "Campinas", "Santos", "Guarulhos"],
-    "RJ": ["Rio de Janeiro", "Niterói", "Petrópolis"],
-    "MG": ["Belo Horizonte", "Contagem", "Juiz de Fora"],
-    "RS": ["Porto Alegre", "Caxias do Sul", "Pelotas"],
-    "PR": ["Curitiba", "Londrina", "Maringá"]
-}
+# Configurações do modo de carga (MODO_GERADOR=carga)
+MODO_GERADOR = os.environ.get('MODO_GERADOR', 'simulacao')  # 'simulacao', 'carga' ou 'perfil' (perfis_carga.py)
+TAXA_ALVO_MSGS = float(os.environ.get('TAXA_ALVO_MSGS', '0'))  # msgs/s; 0 = máximo possível
+DURACAO_CARGA_S = float(os.environ.get('DURACAO_CARGA_S', '0'))  # 0 = até interrupção
+AMOSTRAGEM_ENTREGA = int(os.environ.get('AMOSTRAGEM_ENTREGA', '10000'))  # Loga 1 a cada N entregas
+INTERVALO_RELATORIO_S = 5  # Intervalo entre relatórios de vazão
+
+# Ajustes do produtor para alta vazão
+KAFKA_LINGER_MS = int(os.environ.get('KAFKA_LINGER_MS', '20'))
+KAFKA_BATCH_SIZE = int(os.environ.get('KAFKA_BATCH_SIZE', '1048576'))  # 1 MB
+KAFKA_COMPRESSION = os.environ.get('KAFKA_COMPRESSION', 'lz4')
+
+# Configurações da geração em lote
+TAMANHO_LOTE_PADRAO = 10000  # Registros por lote colunar
+TAMANHO_POOL_CLIENTES = 5000  # Nomes/emails pré-gerados com Faker
+TAMANHO_POOL_UUID = 4096  # UUIDs formatados de uma vez a partir de os.urandom
+INTERVALO_MAX_LOTE_MS = 1000  # Intervalo máximo antes de agora coberto pelos timestamps de um lote
+
+class RelogioISO:
+    """
+    Timestamp em ms e data/hora ISO local, no formato de datetime.now().isoformat().
+    
+    O prefixo 'AAAA-MM-DDTHH:MM:SS' é formatado uma vez por segundo; nas
+    demais chamadas só os microssegundos são acrescentados.
+    """
+    
+    def __init__(self):
+        self._segundo = None
+        self._prefixo = None
+    
+    def agora(self):
+        """Retorna (timestamp_ms, data_hora)"""
+        t = time.time()
+        segundo = int(t)
+        if segundo != self._segundo:
+            self._segundo = segundo
+            self._prefixo = datetime.fromtimestamp(segundo).isoformat()
+        micro = int((t - segundo) * 1000000)
+        return int(t * 1000), (f"{self._prefixo}.{micro:06d}" if micro else self._prefixo)
+
+class PoolUUID:
+    """
+    UUIDs versão 4 tirados de um buffer de os.urandom formatado em lote.
+    
+    O pool é descartado se o processo mudar (fork), para que processos
+    filhos não repitam os UUIDs do pai.
+    """
+    
+    def __init__(self, tamanho=TAMANHO_POOL_UUID):
+        self.tamanho = tamanho
+        self._uuids = []
+        self._pid = os.getpid()
+    
+    def proximo(self):
+        if not self._uuids or self._pid != os.getpid():
+            self._pid = os.getpid()
+            brutos = np.frombuffer(os.urandom(16 * self.tamanho), dtype=np.uint8).reshape(-1, 16).copy()
+            self._uuids = _formatar_uuids(brutos).tolist()
+        return self._uuids.pop()
+
+_relogio = RelogioISO()
+_pool_uuid = PoolUUID()
 
 # Função para gerar registro de venda
 def gerar_venda():
     """Gera um registro simulado de venda"""
     # Dados temporais
-    agora = datetime.now()
-    timestamp = int(agora.timestamp() * 1000)
-    data_hora = agora.isoformat()
+    timestamp, data_hora = _relogio.agora()
     
     # Cliente
-    id_cliente = str(uuid.uuid4())
+    id_cliente = _pool_uuid.proximo()
     nome_cliente = fake.name()
     email_cliente = fake.email()
     
@@ -102,75 +128,429 @@ def gerar_venda():
     # Localização
     estado = random.choice(list(ESTADOS_LOJAS.keys()))
     cidade = random.choice(ESTADOS_LOJAS[estado])
-    loja = f"{cidade}-{random.randint(1, 10)}"
+    loja = nome_loja(cidade, random.randint(1, LOJAS_POR_CIDADE))
     
-    # Montar registro
+    # Montar registro (campos de vendas_schema.json)
+    return Venda(
+        id_venda=_pool_uuid.proximo(),
+        timestamp=timestamp,
+        data_hora=data_hora,
+        id_cliente=id_cliente,
+        nome_cliente=nome_cliente,
+        email_cliente=email_cliente,
+        produto=produto,
+        categoria=categoria,
+        preco=preco,
+        quantidade=quantidade,
+        valor_total=valor_total,
+        forma_pagamento=forma_pagamento,
+        loja=loja,
+        cidade=cidade,
+        estado=estado
+    )
+
+# Estruturas auxiliares para geração vetorizada (montadas sob demanda)
+_tabelas_lote = None
+_pool_clientes = None
+_fim_ultimo_lote_us = None  # Instante (µs) da última venda do lote colunar anterior
+
+def _montar_tabelas_lote():
+    """Converte as constantes de simulação em arrays NumPy indexáveis por código"""
+    global _tabelas_lote
+    if _tabelas_lote is None:
+        categorias = np.array(CATEGORIAS_PRODUTOS)
+        max_produtos = max(len(PRODUTOS[c]) for c in CATEGORIAS_PRODUTOS)
+        produtos = np.array([
+            PRODUTOS[c] + [""] * (max_produtos - len(PRODUTOS[c]))
+            for c in CATEGORIAS_PRODUTOS
+        ])
+        estados = np.array(list(ESTADOS_LOJAS.keys()))
+        max_cidades = max(len(v) for v in ESTADOS_LOJAS.values())
+        cidades = np.array([
+            ESTADOS_LOJAS[e] + [""] * (max_cidades - len(ESTADOS_LOJAS[e]))
+            for e in estados
+        ])
+        _tabelas_lote = {
+            "categorias": categorias,
+            "produtos": produtos,
+            "num_produtos": np.array([len(PRODUTOS[c]) for c in CATEGORIAS_PRODUTOS]),
+            "preco_min": np.array([PRECOS[c][0] for c in CATEGORIAS_PRODUTOS], dtype=np.float64),
+            "preco_max": np.array([PRECOS[c][1] for c in CATEGORIAS_PRODUTOS], dtype=np.float64),
+            "formas_pagamento": np.array(FORMAS_PAGAMENTO),
+            "estados": estados,
+            "cidades": cidades,
+            "num_cidades": np.array([len(ESTADOS_LOJAS[e]) for e in estados]),
+        }
+    return _tabelas_lote
+
+def _obter_pool_clientes(tamanho=TAMANHO_POOL_CLIENTES):
+    """Retorna arrays de nomes e emails pré-gerados pelo Faker (gerados uma única vez)"""
+    global _pool_clientes
+    if _pool_clientes is None or len(_pool_clientes[0]) < tamanho:
+        nomes = np.array([fake.name() for _ in range(tamanho)], dtype=object)
+        emails = np.array([fake.email() for _ in range(tamanho)], dtype=object)
+        _pool_clientes = (nomes, emails)
+    return _pool_clientes
+
+def _gerar_uuids(rng, n):
+    """Gera n UUIDs versão 4 (como string) a partir de bytes aleatórios do gerador NumPy"""
+    return _formatar_uuids(rng.integers(0, 256, size=(n, 16), dtype=np.uint8))
+
+def _formatar_uuids(brutos):
+    """Formata uma matriz (n, 16) de bytes aleatórios como UUIDs versão 4"""
+    n = len(brutos)
+    brutos[:, 6] = (brutos[:, 6] & 0x0F) | 0x40  # versão 4
+    brutos[:, 8] = (brutos[:, 8] & 0x3F) | 0x80  # variante RFC 4122
+    h = brutos.tobytes().hex()
+    return np.array([
+        f"{h[i:i+8]}-{h[i+8:i+12]}-{h[i+12:i+16]}-{h[i+16:i+20]}-{h[i+20:i+32]}"
+        for i in range(0, n * 32, 32)
+    ], dtype=object)
+
+def _instantes_lote(n):
+    """
+    Timestamps (ms) e data_hora ISO local de n vendas, como os de gerar_venda().
+    
+    As vendas são distribuídas igualmente entre a última do lote anterior e
+    agora, limitado aos INTERVALO_MAX_LOTE_MS anteriores (o primeiro lote e os
+    gerados após uma pausa não recuam mais que isso).
+    """
+    global _fim_ultimo_lote_us
+    agora_us = time.time_ns() // 1000
+    inicio_us = agora_us - INTERVALO_MAX_LOTE_MS * 1000
+    if _fim_ultimo_lote_us is not None:
+        inicio_us = min(max(inicio_us, _fim_ultimo_lote_us), agora_us)
+    instantes_us = np.linspace(inicio_us, agora_us, n + 1)[1:].astype(np.int64)
+    _fim_ultimo_lote_us = agora_us
+    
+    # data_hora no formato de datetime.now().isoformat(): hora local, sem microssegundos quando zero
+    fuso = datetime.fromtimestamp(agora_us // 1000000).astimezone().utcoffset()
+    locais = (instantes_us + int(fuso.total_seconds()) * 1000000).astype('datetime64[us]')
+    data_hora = np.datetime_as_string(locais, unit='us').astype(object)
+    sem_micro = instantes_us % 1000000 == 0
+    if sem_micro.any():
+        data_hora[sem_micro] = [texto[:-7] for texto in data_hora[sem_micro]]
+    return instantes_us // 1000, data_hora
+
+def _gerar_lote_colunar(rng, n):
+    """Gera um único lote colunar com n registros de venda"""
+    t = _montar_tabelas_lote()
+    nomes, emails = _obter_pool_clientes()
+    
+    # Dados temporais (instantes distribuídos no intervalo coberto pelo lote)
+    timestamp, data_hora = _instantes_lote(n)
+    
+    # Cliente
+    idx_cliente = rng.integers(0, len(nomes), size=n)
+    
+    # Produto e preço
+    cod_categoria = rng.integers(0, len(t["categorias"]), size=n)
+    cod_produto = (rng.random(n) * t["num_produtos"][cod_categoria]).astype(np.int64)
+    preco_min = t["preco_min"][cod_categoria]
+    preco_max = t["preco_max"][cod_categoria]
+    preco = np.round(preco_min + rng.random(n) * (preco_max - preco_min), 2)
+    quantidade = rng.integers(1, 6, size=n, dtype=np.int32)
+    valor_total = np.round(preco * quantidade, 2)
+    
+    # Pagamento
+    cod_pagamento = rng.integers(0, len(t["formas_pagamento"]), size=n)
+    
+    # Localização (estado uniforme, cidade uniforme dentro do estado)
+    cod_estado = rng.integers(0, len(t["estados"]), size=n)
+    cod_cidade = (rng.random(n) * t["num_cidades"][cod_estado]).astype(np.int64)
+    cidade = t["cidades"][cod_estado, cod_cidade]
+    num_loja = rng.integers(1, LOJAS_POR_CIDADE + 1, size=n)
+    loja = np.char.add(np.char.add(cidade, "-"), num_loja.astype(str))
+    
+    # Montar lote na mesma ordem de campos de vendas_schema.json
     return {
-        "id_venda": str(uuid.uuid4()),
+        "id_venda": _gerar_uuids(rng, n),
         "timestamp": timestamp,
         "data_hora": data_hora,
-        "id_cliente": id_cliente,
-        "nome_cliente": nome_cliente,
-        "email_cliente": email_cliente,
-        "produto": produto,
-        "categoria": categoria,
+        "id_cliente": _gerar_uuids(rng, n),
+        "nome_cliente": nomes[idx_cliente],
+        "email_cliente": emails[idx_cliente],
+        "produto": t["produtos"][cod_categoria, cod_produto],
+        "categoria": t["categorias"][cod_categoria],
         "preco": preco,
         "quantidade": quantidade,
         "valor_total": valor_total,
-        "forma_pagamento": forma_pagamento,
+        "forma_pagamento": t["formas_pagamento"][cod_pagamento],
         "loja": loja,
         "cidade": cidade,
-        "estado": estado
+        "estado": t["estados"][cod_estado]
     }
 
+def gerar_vendas_lote(n, tamanho_lote=TAMANHO_LOTE_PADRAO, rng=None):
+    """
+    Gera n registros simulados de venda em lotes colunares.
+    
+    Cada lote é um dict {campo: np.ndarray} com os mesmos campos e distribuições
+    de gerar_venda(), porém sorteados de forma vetorizada. Nomes e emails de
+    clientes vêm de um pool pré-gerado pelo Faker.
+    
+    Args:
+        n (int): Quantidade total de registros a gerar
+        tamanho_lote (int): Quantidade máxima de registros por lote
+        rng (np.random.Generator): Gerador aleatório (opcional, para reprodutibilidade)
+    
+    Yields:
+        dict: Lote colunar de vendas
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    restantes = n
+    while restantes > 0:
+        tamanho = min(tamanho_lote, restantes)
+        yield _gerar_lote_colunar(rng, tamanho)
+        restantes -= tamanho
+
+def lote_para_registros(lote):
+    """Converte um lote colunar em uma lista de Venda, como as de gerar_venda()"""
+    return vendas_de_colunas([lote[campo].tolist() for campo in CAMPOS])
+
+# Métricas do produtor (servidas em /metrics com METRICAS_PORTA)
+VENDAS_PRODUZIDAS = metricas.contador('vendas_produzidas_total', 'Vendas enviadas ao produtor Kafka')
+BYTES_PRODUZIDOS = metricas.contador('vendas_produzidas_bytes_total', 'Bytes serializados enviados ao produtor Kafka')
+ENTREGAS = metricas.contador('vendas_entregas_total', 'Confirmações de entrega por resultado', ['resultado'])
+LATENCIA_ENTREGA = metricas.histograma('vendas_latencia_entrega_segundos',
+                                       'Tempo entre produce() e a confirmação de entrega')
+_entregas_ok = ENTREGAS.rotulado('ok')
+_entregas_erro = ENTREGAS.rotulado('erro')
+
+def registrar_entrega(err, msg):
+    """Atualiza as métricas de entrega a partir do callback do produtor"""
+    if err is not None:
+        _entregas_erro.incrementar()
+        return
+    _entregas_ok.incrementar()
+    latencia = msg.latency()
+    if latencia is not None:
+        LATENCIA_ENTREGA.observar(latencia)
+
+# Log por entrega limitado a LOG_MAX_POR_S linhas por segundo; progresso a cada 10 mensagens
+_log_entregas = LogAmostrado(logger)
+_log_progresso = LogAmostrado(logger, a_cada=10)
+
 # Callback para confirmação de entrega
 def delivery_report(err, msg):
     """Callback invocado quando a mensagem é entregue (ou falha)"""
+    registrar_entrega(err, msg)
     if err is not None:
-        logger.error(f"Erro na entrega da mensagem: {err}")
+        logger.error("Erro na entrega da mensagem: %s", err)
     else:
-        logger.info(f"Mensagem entregue ao tópico {msg.topic()} [partição {msg.partition()}] em {msg.offset()}")
+        _log_entregas.info("Mensagem entregue ao tópico %s [partição %d] em %d",
+                           msg.topic(), msg.partition(), msg.offset())
+
+class EstatisticasEntrega:
+    """
+    Contabiliza entregas do produtor e loga apenas uma amostra delas.
+    
+    Substitui delivery_report no modo de carga, onde logar cada entrega
+    consumiria a maior parte da CPU.
+    """
+    
+    def __init__(self, amostragem=AMOSTRAGEM_ENTREGA):
+        self.amostragem = max(1, amostragem)
+        self.entregues = 0
+        self.erros = 0
+        self._log = LogAmostrado(logger, a_cada=self.amostragem)
+    
+    def delivery_report(self, err, msg):
+        """Callback de entrega com log amostrado (erros são sempre logados)"""
+        registrar_entrega(err, msg)
+        if err is not None:
+            self.erros += 1
+            logger.error("Erro na entrega da mensagem: %s", err)
+        else:
+            self.entregues += 1
+            self._log.info("Mensagem entregue ao tópico %s [partição %d] em %d (%d entregues)",
+                           msg.topic(), msg.partition(), msg.offset(), self.entregues)
+
+class LimitadorTaxa:
+    """
+    Token bucket para controlar a taxa de envio.
+    
+    Os tokens são repostos continuamente a `taxa` por segundo, com rajada
+    máxima de `capacidade`. Só dorme quando o saldo fica negativo, em vez de
+    chamar time.sleep a cada mensagem. Taxa <= 0 desativa o limite.
+    """
+    
+    def __init__(self, taxa, capacidade=None):
+        self.taxa = taxa
+        self.capacidade = capacidade if capacidade is not None else max(1.0, taxa * 0.1)
+        self.tokens = self.capacidade
+        self.ultimo = time.monotonic()
+    
+    def adquirir(self, n=1):
+        """Consome n tokens, aguardando a reposição se necessário"""
+        if self.taxa <= 0:
+            return
+        agora = time.monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa) - n
+        self.ultimo = agora
+        if self.tokens < 0:
+            time.sleep(-self.tokens / self.taxa)
 
 # Configuração do produtor Kafka
-def criar_produtor():
-    """Cria e retorna uma instância do produtor Kafka"""
+def criar_produtor(alta_vazao=False):
+    """
+    Cria e retorna uma instância do produtor Kafka
+    
+    Args:
+        alta_vazao (bool): Ajusta batching, compressão e filas internas para carga
+    """
     config = {
         'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
         'client.id': 'gerador-vendas'
     }
+    if alta_vazao:
+        config.update({
+            'linger.ms': KAFKA_LINGER_MS,
+            'batch.size': KAFKA_BATCH_SIZE,
+            'compression.type': KAFKA_COMPRESSION,
+            'queue.buffering.max.messages': 1000000,
+            'queue.buffering.max.kbytes': 1048576  # 1 GB
+        })
     return Producer(config)
 
+def produzir_com_espera(produtor, topico, valor, chave, callback, **kwargs):
+    """Envia a mensagem, aguardando espaço na fila local do librdkafka quando cheia"""
+    while True:
+        try:
+            produtor.produce(topico, key=chave, value=valor, callback=callback, **kwargs)
+            return
+        except BufferError:
+            produtor.poll(0.1)
+
+def executar_carga(produtor, taxa=TAXA_ALVO_MSGS, duracao=DURACAO_CARGA_S, rng=None,
+                   particoes=None, parar=None, estatisticas=None, ao_relatar=None):
+    """
+    Gera e envia vendas na taxa alvo (ou o mais rápido possível) e reporta a vazão.
+    
+    Args:
+        produtor (Producer): Produtor Kafka, idealmente criado com alta_vazao=True
+        taxa (float): Mensagens por segundo; 0 = sem limite
+        duracao (float): Tempo máximo de execução em segundos; 0 = até interrupção
+        rng (np.random.Generator): Gerador aleatório (opcional, para reprodutibilidade)
+        particoes (list): Partições usadas em rodízio; None = particionador padrão pela chave
+        parar (threading.Event | multiprocessing.Event): Sinaliza o fim da carga (opcional)
+        estatisticas (EstatisticasEntrega): Contador de entregas (opcional)
+        ao_relatar (callable): Recebe um dict com os totais a cada relatório (opcional)
+    
+    Returns:
+        dict: Totais de mensagens e bytes enviados e duração
+    """
+    limitador = LimitadorTaxa(taxa)
+    estatisticas = estatisticas if estatisticas is not None else EstatisticasEntrega()
+    # Lotes pequenos em taxas baixas para não envelhecer os timestamps
+    tamanho_lote = TAMANHO_LOTE_PADRAO if taxa <= 0 else int(min(TAMANHO_LOTE_PADRAO, max(1, taxa * 0.1)))
+    rng = rng if rng is not None else np.random.default_rng()
+    serializador = obter_serializador()
+    
+    inicio = ultimo_relatorio = time.monotonic()
+    enviadas = bytes_enviados = 0
+    enviadas_relatorio = bytes_relatorio = 0
+    enviadas_metricas = bytes_metricas = 0
+    
+    def totais():
+        return {
+            "mensagens": enviadas,
+            "bytes": bytes_enviados,
+            "entregues": estatisticas.entregues,
+            "erros": estatisticas.erros,
+            "duracao_s": max(time.monotonic() - inicio, 1e-9)
+        }
+    
+    logger.info(f"Modo de carga: taxa alvo {'máxima' if taxa <= 0 else f'{taxa:.0f} msgs/s'}, lotes de {tamanho_lote}")
+    
+    try:
+        while parar is None or not parar.is_set():
+            lote = next(gerar_vendas_lote(tamanho_lote, tamanho_lote, rng))
+            for venda in lote_para_registros(lote):
+                limitador.adquirir()
+                mensagem = serializador.serializar(venda)
+                extras = {'partition': particoes[enviadas % len(particoes)]} if particoes else {}
+                produzir_com_espera(produtor, KAFKA_TOPIC, mensagem,
+                                    venda.id_venda.encode('utf-8'),
+                                    estatisticas.delivery_report, **extras)
+                enviadas += 1
+                bytes_enviados += len(mensagem)
+                if enviadas % 1000 == 0:
+                    produtor.poll(0)
+                    # Métricas atualizadas junto com o poll, não por mensagem
+                    VENDAS_PRODUZIDAS.incrementar(enviadas - enviadas_metricas)
+                    BYTES_PRODUZIDOS.incrementar(bytes_enviados - bytes_metricas)
+                    enviadas_metricas, bytes_metricas = enviadas, bytes_enviados
+            
+            agora = time.monotonic()
+            if agora - ultimo_relatorio >= INTERVALO_RELATORIO_S:
+                decorrido = agora - ultimo_relatorio
+                logger.info(f"Vazão: {(enviadas - enviadas_relatorio) / decorrido:.0f} msgs/s, "
+                            f"{(bytes_enviados - bytes_relatorio) / decorrido / 1e6:.2f} MB/s "
+                            f"(total {enviadas}, entregues {estatisticas.entregues}, erros {estatisticas.erros})")
+                ultimo_relatorio = agora
+                enviadas_relatorio, bytes_relatorio = enviadas, bytes_enviados
+                if ao_relatar is not None:
+                    ao_relatar(totais())
+            
+            if duracao > 0 and agora - inicio >= duracao:
+                break
+    finally:
+        VENDAS_PRODUZIDAS.incrementar(enviadas - enviadas_metricas)
+        BYTES_PRODUZIDOS.incrementar(bytes_enviados - bytes_metricas)
+        resultado = totais()
+        decorrido = resultado["duracao_s"]
+        logger.info(f"Carga finalizada: {enviadas} mensagens em {decorrido:.1f}s - "
+                    f"{enviadas / decorrido:.0f} msgs/s, {bytes_enviados / decorrido / 1e6:.2f} MB/s")
+    
+    return resultado
+
 def main():
     """Função principal que gera e envia dados para o Kafka"""
     logger.info(f"Iniciando gerador de dados para o tópico: {KAFKA_TOPIC}")
     logger.info(f"Usando servidor Kafka: {KAFKA_BOOTSTRAP_SERVERS}")
     
-    produtor = criar_produtor()
+    metricas.iniciar_servidor()
+    produtor = criar_produtor(alta_vazao=(MODO_GERADOR in ('carga', 'perfil')))
+    serializador = obter_serializador()
+    logger.info(f"Formato de serialização: {serializador.nome}")
     
     try:
+        if MODO_GERADOR == 'carga':
+            executar_carga(produtor)
+            return
+        if MODO_GERADOR == 'perfil':
+            # Importado aqui: perfis_carga importa este módulo
+            import perfis_carga
+            gerador = perfis_carga.GeradorPerfil(perfis_carga.obter_perfil(taxa=perfis_carga.PERFIL_TAXA))
+            perfis_carga.executar_perfil(produtor, gerador, duracao=DURACAO_CARGA_S)
+            return
+        
         contador = 0
         while True:  # Loop infinito para geração contínua
             # Gerar venda
             venda = gerar_venda()
             
-            # Serializar para JSON
-            mensagem = json.dumps(venda).encode('utf-8')
+            # Serializar no formato configurado (JSON ou Avro)
+            mensagem = serializador.serializar(venda)
             
             # Enviar para o Kafka
             produtor.produce(
                 KAFKA_TOPIC,
-                key=venda['id_venda'].encode('utf-8'),
+                key=venda.id_venda.encode('utf-8'),
                 value=mensagem,
                 callback=delivery_report
             )
             
+            VENDAS_PRODUZIDAS.incrementar()
+            BYTES_PRODUZIDOS.incrementar(len(mensagem))
+            
             # Garantir entrega
             produtor.poll(0)
             
             # Incrementar contador
             contador += 1
-            if contador % 10 == 0:
-                logger.info(f"Geradas {contador} mensagens até o momento")
+            _log_progresso.info("Geradas %d mensagens até o momento", contador)
             
             # Aguardar intervalo aleatório para simular fluxo real
             intervalo = random.randint(INTERVALO_MIN_MS, INTERVALO_MAX_MS) / 1000.0
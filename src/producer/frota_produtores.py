@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lançador de múltiplos processos produtores para saturar um tópico com várias partições.
+
+Cada processo (trabalhador) roda o modo de carga de data_generator.py com seu
+próprio produtor Kafka, seu próprio gerador aleatório semeado e um subconjunto
+determinístico das partições do tópico. As estatísticas de cada trabalhador
+chegam ao processo principal por um Pipe.
+"""
+
+import os
+import time
+import signal
+import logging
+import multiprocessing as mp
+from multiprocessing.connection import wait
+
+import numpy as np
+
+import data_generator
+from comum import metricas
+
+logger = logging.getLogger(__name__)
+
+# Configurações da frota
+FROTA_PROCESSOS = int(os.environ.get('FROTA_PROCESSOS', os.cpu_count() or 1))
+FROTA_SEMENTE = int(os.environ.get('FROTA_SEMENTE', '42'))
+TIMEOUT_ENCERRAMENTO_S = 30  # Tempo máximo para cada trabalhador fazer flush e sair
+
+# Métricas da frota, atualizadas no processo principal a partir dos relatórios dos trabalhadores
+FROTA_MENSAGENS = metricas.medidor('frota_vendas_produzidas', 'Vendas enviadas por trabalhador da frota',
+                                   ['trabalhador'])
+FROTA_BYTES = metricas.medidor('frota_vendas_produzidas_bytes', 'Bytes enviados por trabalhador da frota',
+                               ['trabalhador'])
+FROTA_ERROS = metricas.medidor('frota_entregas_erro', 'Erros de entrega por trabalhador da frota',
+                               ['trabalhador'])
+
+def particoes_do_trabalhador(particoes, indice, total):
+    """
+    Retorna as partições atribuídas a um trabalhador.
+
+    As partições são distribuídas em rodízio (p % total == indice). Se houver
+    mais trabalhadores do que partições, cada trabalhador compartilha a
+    partição indice % len(particoes).
+    """
+    particoes = sorted(particoes)
+    if not particoes:
+        return None
+    proprias = [p for i, p in enumerate(particoes) if i % total == indice]
+    return proprias or [particoes[indice % len(particoes)]]
+
+def descobrir_particoes(produtor, topico, timeout=10):
+    """Consulta os metadados do tópico e retorna a lista de partições"""
+    metadados = produtor.list_topics(topico, timeout=timeout)
+    info = metadados.topics.get(topico)
+    if info is None or info.error is not None:
+        logger.warning(f"Não foi possível obter as partições de {topico}: {info.error if info else 'tópico ausente'}")
+        return []
+    return list(info.partitions.keys())
+
+def executar_trabalhador(indice, total, semente, taxa, duracao, conexao, parar):
+    """
+    Processo trabalhador: produz vendas nas suas partições até o sinal de parada.
+
+    Args:
+        indice (int): Índice do trabalhador (0..total-1)
+        total (int): Quantidade de trabalhadores
+        semente (int): Semente base; cada trabalhador usa (semente, indice)
+        taxa (float): Taxa alvo deste trabalhador em msgs/s; 0 = máxima
+        duracao (float): Duração máxima em segundos; 0 = até o sinal de parada
+        conexao (Connection): Extremidade de escrita do Pipe para o processo principal
+        parar (Event): Evento de parada compartilhado
+    """
+    # O processo principal coordena o encerramento; ignorar sinais aqui
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    data_generator.fake.seed_instance(semente + indice)
+    rng = np.random.default_rng([semente, indice])
+
+    produtor = data_generator.criar_produtor(alta_vazao=True)
+    estatisticas = data_generator.EstatisticasEntrega()
+    particoes = particoes_do_trabalhador(
+        descobrir_particoes(produtor, data_generator.KAFKA_TOPIC), indice, total
+    )
+    logger.info(f"Trabalhador {indice}: partições {particoes if particoes else 'definidas pela chave'}")
+
+    def relatar(totais, final=False):
+        conexao.send({"trabalhador": indice, "particoes": particoes, "final": final, **totais})
+
+    resultado = {"mensagens": 0, "bytes": 0, "entregues": 0, "erros": 0, "duracao_s": 0.0}
+    try:
+        resultado = data_generator.executar_carga(
+            produtor, taxa=taxa, duracao=duracao, rng=rng, particoes=particoes,
+            parar=parar, estatisticas=estatisticas, ao_relatar=relatar
+        )
+    finally:
+        pendentes = produtor.flush(TIMEOUT_ENCERRAMENTO_S)
+        if pendentes:
+            logger.warning(f"Trabalhador {indice}: {pendentes} mensagens não entregues após flush")
+        resultado.update(entregues=estatisticas.entregues, erros=estatisticas.erros, pendentes=pendentes)
+        relatar(resultado, final=True)
+        conexao.close()
+
+def resumir(estatisticas):
+    """Loga a vazão agregada e por trabalhador a partir do último relatório de cada um"""
+    total_msgs = total_bytes = total_erros = 0
+    vazao_total = 0.0
+    for indice in sorted(estatisticas):
+        e = estatisticas[indice]
+        vazao = e["mensagens"] / e["duracao_s"]
+        total_msgs += e["mensagens"]
+        total_bytes += e["bytes"]
+        total_erros += e["erros"]
+        vazao_total += vazao
+        logger.info(f"  Trabalhador {indice} {e['particoes']}: {e['mensagens']} msgs, "
+                    f"{vazao:.0f} msgs/s, {e['bytes'] / e['duracao_s'] / 1e6:.2f} MB/s, "
+                    f"entregues {e['entregues']}, erros {e['erros']}")
+    logger.info(f"Frota: {total_msgs} msgs, ~{vazao_total:.0f} msgs/s, "
+                f"{total_bytes / 1e6:.1f} MB enviados, {total_erros} erros de entrega")
+
+def main():
+    """Inicia a frota de produtores e acompanha as estatísticas até o encerramento"""
+    total = max(1, FROTA_PROCESSOS)
+    taxa_por_trabalhador = data_generator.TAXA_ALVO_MSGS / total
+
+    logger.info(f"Iniciando {total} produtores para o tópico {data_generator.KAFKA_TOPIC} "
+                f"(semente {FROTA_SEMENTE}, taxa alvo "
+                f"{'máxima' if taxa_por_trabalhador <= 0 else f'{data_generator.TAXA_ALVO_MSGS:.0f} msgs/s'})")
+
+    metricas.iniciar_servidor()
+    parar = mp.Event()
+
+    def handle_signal(sig, frame):
+        """Manipulador de sinal para encerrar a frota graciosamente"""
+        logger.info(f"Sinal recebido: {sig}. Encerrando os produtores...")
+        parar.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    processos = []
+    leitores = {}
+    for indice in range(total):
+        leitor, escritor = mp.Pipe(duplex=False)
+        processo = mp.Process(
+            target=executar_trabalhador,
+            args=(indice, total, FROTA_SEMENTE, taxa_por_trabalhador,
+                  data_generator.DURACAO_CARGA_S, escritor, parar),
+            name=f"produtor-{indice}"
+        )
+        processo.start()
+        escritor.close()
+        processos.append(processo)
+        leitores[leitor] = indice
+
+    estatisticas = {}
+    ultimo_resumo = time.monotonic()
+
+    # Recebe relatórios até todos os trabalhadores fecharem seus Pipes
+    while leitores:
+        for leitor in wait(list(leitores), timeout=1.0):
+            try:
+                relatorio = leitor.recv()
+            except EOFError:
+                del leitores[leitor]
+                continue
+            estatisticas[relatorio["trabalhador"]] = relatorio
+            trabalhador = str(relatorio["trabalhador"])
+            FROTA_MENSAGENS.rotulado(trabalhador).definir(relatorio["mensagens"])
+            FROTA_BYTES.rotulado(trabalhador).definir(relatorio["bytes"])
+            FROTA_ERROS.rotulado(trabalhador).definir(relatorio["erros"])
+
+        if estatisticas and time.monotonic() - ultimo_resumo >= data_generator.INTERVALO_RELATORIO_S:
+            resumir(estatisticas)
+            ultimo_resumo = time.monotonic()
+
+    for processo in processos:
+        processo.join(TIMEOUT_ENCERRAMENTO_S)
+        if processo.is_alive():
+            logger.warning(f"{processo.name} não encerrou a tempo; forçando término")
+            processo.terminate()
+
+    logger.info("Resumo final da frota:")
+    if estatisticas:
+        resumir(estatisticas)
+    logger.info("Finalizado com sucesso!")
+
+if __name__ == "__main__":
+    main()
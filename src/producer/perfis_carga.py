@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Perfis de carga semeados e reproduzíveis para o gerador de vendas.
+
+Um perfil descreve a forma do tráfego: taxa média, concentração (Zipf) de
+produtos e lojas, curva diurna da taxa, rajadas e clientes "quentes" que
+concentram parte das vendas e, com campo_chave='id_cliente', das chaves
+Kafka (partições desbalanceadas). O tempo é um relógio virtual que começa
+em PERFIL_INICIO e avança pelos intervalos entre chegadas sorteados, de modo
+que timestamps, data_hora e todos os campos dependem apenas do perfil e da
+semente: o mesmo perfil com a mesma semente produz o mesmo fluxo de
+mensagens, byte a byte (com as mesmas versões de NumPy e Faker).
+
+Cada aspecto usa um gerador aleatório próprio, derivado da semente
+(SeedSequence.spawn), para que mudar um parâmetro, como a taxa das rajadas,
+não desloque o sorteio dos demais. data_hora é formatada em UTC para não
+depender do fuso da máquina.
+
+Uso:
+    python src/producer/perfis_carga.py --perfil realista --semente 42 --registros 100000 --resumo
+    python src/producer/perfis_carga.py --perfil zipf --duracao 600 --velocidade 10  # envia ao Kafka
+    MODO_GERADOR=perfil PERFIL_CARGA=diurno python src/producer/data_generator.py
+"""
+
+import os
+import sys
+import math
+import time
+import hashlib
+import logging
+import argparse
+from typing import NamedTuple
+from datetime import datetime, timezone
+
+import numpy as np
+from faker import Faker
+
+# Diretório src/ no path para importar os módulos compartilhados (schemas/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas.serializadores import obter_serializador
+from schemas.vendas import CAMPOS, vendas_de_colunas
+from schemas.dominios import (CATEGORIAS_PRODUTOS, PRODUTOS, PRECOS, FORMAS_PAGAMENTO, ESTADOS_LOJAS,
+                              valores_dimensoes)
+from comum import metricas
+from comum.logs import configurar_logs
+import data_generator
+
+logger = logging.getLogger(__name__)
+
+# Configurações dos perfis
+PERFIL_CARGA = os.environ.get('PERFIL_CARGA', 'realista')
+PERFIL_SEMENTE = int(os.environ.get('PERFIL_SEMENTE', '42'))
+PERFIL_TAXA = float(os.environ.get('PERFIL_TAXA', '0'))  # msgs/s virtuais; 0 = taxa do perfil
+PERFIL_INICIO = os.environ.get('PERFIL_INICIO', '2024-01-01T00:00:00')  # UTC; 'agora' = não reproduzível
+PERFIL_VELOCIDADE = float(os.environ.get('PERFIL_VELOCIDADE', '1'))  # Tempo virtual / real; 0 = máxima
+TAMANHO_BLOCO = 1024  # Registros sorteados por vez
+SEGUNDOS_DIA = 86400
+
+class PerfilCarga(NamedTuple):
+    """
+    Parâmetros de um perfil de carga.
+
+    Attributes:
+        nome (str): Nome do perfil
+        taxa (float): Taxa média em msgs/s de tempo virtual
+        zipf_produtos (float): Expoente Zipf da popularidade dos produtos; 0 = uniforme
+        zipf_lojas (float): Expoente Zipf da popularidade das lojas; 0 = uniforme
+        amplitude_diurna (float): Variação da taxa ao longo do dia (0 a <1); taxa * (1 + a * cos)
+        hora_pico (float): Hora UTC do pico da curva diurna
+        rajadas_por_hora (float): Início médio de rajadas por hora virtual
+        duracao_rajada_s (float): Duração de cada rajada
+        fator_rajada (float): Multiplicador da taxa durante a rajada
+        clientes_quentes (int): Clientes que concentram fracao_quente das vendas
+        fracao_quente (float): Fração das vendas feitas pelos clientes quentes
+        campo_chave (str): Campo da venda usado como chave Kafka
+    """
+    nome: str
+    taxa: float = 1000.0
+    zipf_produtos: float = 0.0
+    zipf_lojas: float = 0.0
+    amplitude_diurna: float = 0.0
+    hora_pico: float = 20.0
+    rajadas_por_hora: float = 0.0
+    duracao_rajada_s: float = 30.0
+    fator_rajada: float = 5.0
+    clientes_quentes: int = 0
+    fracao_quente: float = 0.0
+    campo_chave: str = 'id_venda'
+
+# Perfis disponíveis por nome
+PERFIS = {perfil.nome: perfil for perfil in (
+    PerfilCarga('uniforme'),
+    PerfilCarga('zipf', zipf_produtos=1.1, zipf_lojas=0.9),
+    PerfilCarga('diurno', amplitude_diurna=0.8),
+    PerfilCarga('rajadas', rajadas_por_hora=6, duracao_rajada_s=30, fator_rajada=8),
+    PerfilCarga('chave_quente', clientes_quentes=3, fracao_quente=0.3, campo_chave='id_cliente'),
+    PerfilCarga('realista', zipf_produtos=1.0, zipf_lojas=0.8, amplitude_diurna=0.6,
+                rajadas_por_hora=2, duracao_rajada_s=60, fator_rajada=4,
+                clientes_quentes=20, fracao_quente=0.05),
+)}
+
+def obter_perfil(nome=None, taxa=None):
+    """
+    Retorna o perfil pelo nome, opcionalmente com outra taxa média.
+
+    Args:
+        nome (str): Nome do perfil; padrão PERFIL_CARGA
+        taxa (float): Taxa média em msgs/s virtuais; None ou 0 = taxa do perfil
+    """
+    nome = nome or PERFIL_CARGA
+    if nome not in PERFIS:
+        raise ValueError(f"Perfil de carga desconhecido: {nome}. Disponíveis: {', '.join(PERFIS)}")
+    perfil = PERFIS[nome]
+    return perfil._replace(taxa=taxa) if taxa else perfil
+
+def inicio_virtual_ms(inicio=PERFIL_INICIO):
+    """Início do relógio virtual em ms: data/hora ISO em UTC ou 'agora'"""
+    if inicio == 'agora':
+        return int(time.time() * 1000)
+    return int(datetime.fromisoformat(inicio).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def _distribuicao_acumulada(n, expoente, rng):
+    """Probabilidades acumuladas de uma Zipf(expoente) sobre n itens em ordem sorteada"""
+    pesos = rng.permutation(1.0 / np.arange(1, n + 1, dtype=np.float64) ** expoente)  # Populares variam com a semente
+    acumulada = np.cumsum(pesos / pesos.sum())
+    acumulada[-1] = 1.0
+    return acumulada
+
+class GeradorPerfil:
+    """
+    Gera vendas de um perfil de carga em tempo virtual, de forma determinística.
+
+    Os clientes vêm de um pool gerado pelo Faker semeado (clientes recorrentes,
+    com id fixo); os primeiros clientes_quentes do pool são os quentes.
+
+    Args:
+        perfil (PerfilCarga): Perfil de carga
+        semente (int): Semente de todos os sorteios
+        inicio_ms (int): Início do relógio virtual (padrão: PERFIL_INICIO)
+        clientes (int): Tamanho do pool de clientes
+    """
+
+    def __init__(self, perfil, semente=PERFIL_SEMENTE, inicio_ms=None, clientes=data_generator.TAMANHO_POOL_CLIENTES):
+        self.perfil = perfil
+        self.semente = semente
+        self.inicio_ms = inicio_virtual_ms() if inicio_ms is None else inicio_ms
+        sementes = np.random.SeedSequence(semente).spawn(5)
+        self._rng_chegadas, self._rng_rajadas, self._rng_vendas, rng_pool, rng_popularidade = (
+            np.random.default_rng(s) for s in sementes)
+
+        # Produtos (categoria segue o produto) e lojas (cidade e estado seguem a loja)
+        self._produtos = np.array([p for c in CATEGORIAS_PRODUTOS for p in PRODUTOS[c]], dtype=object)
+        self._categoria_produto = np.array([i for i, c in enumerate(CATEGORIAS_PRODUTOS) for _ in PRODUTOS[c]])
+        self._categorias = np.array(CATEGORIAS_PRODUTOS, dtype=object)
+        self._preco_min = np.array([PRECOS[c][0] for c in CATEGORIAS_PRODUTOS], dtype=np.float64)
+        self._preco_max = np.array([PRECOS[c][1] for c in CATEGORIAS_PRODUTOS], dtype=np.float64)
+        self._formas_pagamento = np.array(FORMAS_PAGAMENTO, dtype=object)
+        dimensoes = valores_dimensoes()
+        estado_da_cidade = {cidade: estado for estado, cidades in ESTADOS_LOJAS.items()
+                            for cidade in cidades}
+        self._lojas = np.array(dimensoes["loja"], dtype=object)
+        self._cidades = np.array([loja.rsplit('-', 1)[0] for loja in dimensoes["loja"]], dtype=object)
+        self._estados = np.array([estado_da_cidade[c] for c in self._cidades], dtype=object)
+        self._acum_produtos = _distribuicao_acumulada(len(self._produtos), perfil.zipf_produtos, rng_popularidade)
+        self._acum_lojas = _distribuicao_acumulada(len(self._lojas), perfil.zipf_lojas, rng_popularidade)
+
+        # Pool de clientes recorrentes
+        fake = Faker('pt_BR')
+        fake.seed_instance(semente)
+        clientes = max(clientes, perfil.clientes_quentes + 1)
+        self._nomes = np.array([fake.name() for _ in range(clientes)], dtype=object)
+        self._emails = np.array([fake.email() for _ in range(clientes)], dtype=object)
+        self._ids_cliente = data_generator._gerar_uuids(rng_pool, clientes)
+
+        # Relógio virtual e rajadas
+        self.agora_ms = float(self.inicio_ms)
+        self._fim_rajada_ms = -math.inf
+        self._proxima_rajada_ms = self._sortear_rajada(self.agora_ms)
+        self._segundo = None
+        self._prefixo = None
+        self.geradas = 0
+
+    def _sortear_rajada(self, desde_ms):
+        if self.perfil.rajadas_por_hora <= 0:
+            return math.inf
+        return desde_ms + self._rng_rajadas.exponential(3600000.0 / self.perfil.rajadas_por_hora)
+
+    def taxa_em(self, t_ms):
+        """Taxa instantânea (msgs/s virtuais) no instante t_ms: curva diurna x rajada"""
+        perfil = self.perfil
+        taxa = perfil.taxa
+        if perfil.amplitude_diurna:
+            hora = (t_ms / 1000.0 % SEGUNDOS_DIA) / 3600.0
+            taxa *= 1.0 + perfil.amplitude_diurna * math.cos(2 * math.pi * (hora - perfil.hora_pico) / 24.0)
+        while t_ms >= self._proxima_rajada_ms:
+            self._fim_rajada_ms = self._proxima_rajada_ms + perfil.duracao_rajada_s * 1000.0
+            self._proxima_rajada_ms = self._sortear_rajada(self._fim_rajada_ms)
+        if t_ms < self._fim_rajada_ms:
+            taxa *= perfil.fator_rajada
+        return taxa
+
+    def _timestamps(self, n):
+        """Instantes de chegada (ms) de n vendas: processo de Poisson com a taxa do perfil"""
+        intervalos = self._rng_chegadas.exponential(1.0, n)
+        timestamps = np.empty(n, dtype=np.int64)
+        agora = self.agora_ms
+        for i, intervalo in enumerate(intervalos.tolist()):
+            agora += intervalo * 1000.0 / self.taxa_em(agora)
+            timestamps[i] = int(agora)
+        self.agora_ms = agora
+        return timestamps
+
+    def _data_hora(self, timestamps):
+        """data_hora ISO (UTC) no formato de datetime.isoformat(), com o prefixo em cache por segundo"""
+        resultado = []
+        for ts in timestamps.tolist():
+            segundo, ms = divmod(ts, 1000)
+            if segundo != self._segundo:
+                self._segundo = segundo
+                self._prefixo = datetime.fromtimestamp(segundo, timezone.utc).replace(tzinfo=None).isoformat()
+            resultado.append(f"{self._prefixo}.{ms * 1000:06d}" if ms else self._prefixo)
+        return np.array(resultado, dtype=object)
+
+    def proximo_lote(self, n=TAMANHO_BLOCO):
+        """
+        Sorteia as próximas n vendas do perfil.
+
+        Returns:
+            dict: Lote colunar {campo: np.ndarray} na ordem de vendas_schema.json
+        """
+        rng = self._rng_vendas
+        perfil = self.perfil
+        timestamps = self._timestamps(n)
+
+        cod_produto = np.searchsorted(self._acum_produtos, rng.random(n), side='right')
+        cod_categoria = self._categoria_produto[cod_produto]
+        preco_min = self._preco_min[cod_categoria]
+        preco = np.round(preco_min + rng.random(n) * (self._preco_max[cod_categoria] - preco_min), 2)
+        quantidade = rng.integers(1, 6, size=n, dtype=np.int32)
+        cod_pagamento = rng.integers(0, len(self._formas_pagamento), size=n)
+        cod_loja = np.searchsorted(self._acum_lojas, rng.random(n), side='right')
+
+        cod_cliente = rng.integers(perfil.clientes_quentes, len(self._nomes), size=n)
+        if perfil.clientes_quentes and perfil.fracao_quente:
+            quentes = rng.random(n) < perfil.fracao_quente
+            cod_cliente[quentes] = rng.integers(0, perfil.clientes_quentes, size=int(quentes.sum()))
+
+        self.geradas += n
+        return {
+            "id_venda": data_generator._gerar_uuids(rng, n),
+            "timestamp": timestamps,
+            "data_hora": self._data_hora(timestamps),
+            "id_cliente": self._ids_cliente[cod_cliente],
+            "nome_cliente": self._nomes[cod_cliente],
+            "email_cliente": self._emails[cod_cliente],
+            "produto": self._produtos[cod_produto],
+            "categoria": self._categorias[cod_categoria],
+            "preco": preco,
+            "quantidade": quantidade,
+            "valor_total": np.round(preco * quantidade, 2),
+            "forma_pagamento": self._formas_pagamento[cod_pagamento],
+            "loja": self._lojas[cod_loja],
+            "cidade": self._cidades[cod_loja],
+            "estado": self._estados[cod_loja],
+        }
+
+    def vendas(self, tamanho_bloco=TAMANHO_BLOCO):
+        """Gerador infinito de Venda, em ordem de timestamp"""
+        while True:
+            lote = self.proximo_lote(tamanho_bloco)
+            yield from vendas_de_colunas([lote[campo].tolist() for campo in CAMPOS])
+
+    def chave(self, venda):
+        """Chave Kafka da venda (campo_chave do perfil)"""
+        return getattr(venda, self.perfil.campo_chave).encode('utf-8')
+
+def resumo_fluxo(gerador, registros, serializador=None):
+    """
+    Gera registros mensagens e resume o fluxo para comparar execuções.
+
+    Returns:
+        dict: sha256 de (chave, valor) de todas as mensagens, bytes, intervalo virtual
+            e as 5 chaves mais frequentes
+    """
+    serializador = serializador or obter_serializador()
+    resumo = hashlib.sha256()
+    total_bytes = 0
+    chaves = {}
+    primeiro = ultimo = None
+    for i, venda in zip(range(registros), gerador.vendas()):
+        chave = gerador.chave(venda)
+        valor = serializador.serializar(venda)
+        resumo.update(len(chave).to_bytes(4, 'big') + chave + len(valor).to_bytes(4, 'big') + valor)
+        total_bytes += len(valor)
+        chaves[chave] = chaves.get(chave, 0) + 1
+        primeiro = venda.timestamp if primeiro is None else primeiro
+        ultimo = venda.timestamp
+    quentes = sorted(chaves.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "perfil": gerador.perfil.nome,
+        "semente": gerador.semente,
+        "formato": serializador.nome,
+        "mensagens": registros,
+        "bytes": total_bytes,
+        "sha256": resumo.hexdigest(),
+        "segundos_virtuais": (ultimo - primeiro) / 1000.0 if registros else 0.0,
+        "chaves_mais_frequentes": [(chave.decode('utf-8'), n) for chave, n in quentes],
+    }
+
+def executar_perfil(produtor, gerador, registros=0, duracao=0, velocidade=PERFIL_VELOCIDADE,
+                    parar=None, estatisticas=None):
+    """
+    Envia as vendas do perfil ao Kafka, acompanhando o relógio virtual.
+
+    Com velocidade v, cada segundo real avança v segundos virtuais (a curva
+    diurna inteira cabe em 24h / v); velocidade 0 envia o mais rápido
+    possível. Os timestamps das vendas são sempre os virtuais.
+
+    Args:
+        produtor (Producer): Produtor Kafka, idealmente criado com alta_vazao=True
+        gerador (GeradorPerfil): Gerador do perfil
+        registros (int): Quantidade de mensagens; 0 = sem limite
+        duracao (float): Segundos virtuais a enviar; 0 = sem limite
+        velocidade (float): Tempo virtual por tempo real; 0 = máxima
+        parar (threading.Event): Sinaliza o fim do envio (opcional)
+        estatisticas (EstatisticasEntrega): Contador de entregas (opcional)
+
+    Returns:
+        dict: Totais de mensagens e bytes enviados, duração real e virtual
+    """
+    estatisticas = estatisticas if estatisticas is not None else data_generator.EstatisticasEntrega()
+    serializador = obter_serializador()
+    inicio = ultimo_relatorio = time.monotonic()
+    inicio_virtual = gerador.agora_ms
+    enviadas = bytes_enviados = enviadas_relatorio = 0
+    enviadas_metricas = bytes_metricas = 0
+
+    logger.info(f"Perfil {gerador.perfil.nome} (semente {gerador.semente}): taxa média "
+                f"{gerador.perfil.taxa:.0f} msgs/s virtuais, velocidade "
+                f"{'máxima' if velocidade <= 0 else f'{velocidade:g}x'}, chave {gerador.perfil.campo_chave}")
+    try:
+        for venda in gerador.vendas():
+            if (registros and enviadas >= registros) or (parar is not None and parar.is_set()):
+                break
+            decorrido_virtual = (venda.timestamp - inicio_virtual) / 1000.0
+            if duracao and decorrido_virtual >= duracao:
+                break
+            if velocidade > 0:
+                espera = decorrido_virtual / velocidade - (time.monotonic() - inicio)
+                if espera > 0:
+                    produtor.poll(0)
+                    time.sleep(espera)
+            mensagem = serializador.serializar(venda)
+            data_generator.produzir_com_espera(produtor, data_generator.KAFKA_TOPIC, mensagem,
+                                               gerador.chave(venda), estatisticas.delivery_report)
+            enviadas += 1
+            bytes_enviados += len(mensagem)
+            if enviadas % 1000 == 0:
+                produtor.poll(0)
+                data_generator.VENDAS_PRODUZIDAS.incrementar(enviadas - enviadas_metricas)
+                data_generator.BYTES_PRODUZIDOS.incrementar(bytes_enviados - bytes_metricas)
+                enviadas_metricas, bytes_metricas = enviadas, bytes_enviados
+                agora = time.monotonic()
+                if agora - ultimo_relatorio >= data_generator.INTERVALO_RELATORIO_S:
+                    logger.info(f"Perfil {gerador.perfil.nome}: {(enviadas - enviadas_relatorio) / (agora - ultimo_relatorio):.0f} "
+                                f"msgs/s reais, taxa virtual atual {gerador.taxa_em(venda.timestamp):.0f} msgs/s, "
+                                f"relógio virtual {datetime.fromtimestamp(venda.timestamp / 1000, timezone.utc):%Y-%m-%d %H:%M:%S}")
+                    ultimo_relatorio, enviadas_relatorio = agora, enviadas
+    finally:
+        data_generator.VENDAS_PRODUZIDAS.incrementar(enviadas - enviadas_metricas)
+        data_generator.BYTES_PRODUZIDOS.incrementar(bytes_enviados - bytes_metricas)
+        produtor.flush()
+    decorrido = max(time.monotonic() - inicio, 1e-9)
+    totais = {
+        "mensagens": enviadas,
+        "bytes": bytes_enviados,
+        "entregues": estatisticas.entregues,
+        "erros": estatisticas.erros,
+        "duracao_s": decorrido,
+        "duracao_virtual_s": (gerador.agora_ms - inicio_virtual) / 1000.0,
+    }
+    logger.info(f"Perfil {gerador.perfil.nome} finalizado: {enviadas} mensagens em {decorrido:.1f}s "
+                f"({enviadas / decorrido:.0f} msgs/s, {totais['duracao_virtual_s']:.0f}s virtuais)")
+    return totais
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera vendas de um perfil de carga semeado e reproduzível")
+    parser.add_argument("--perfil", default=PERFIL_CARGA, choices=sorted(PERFIS), help="Perfil de carga")
+    parser.add_argument("--semente", type=int, default=PERFIL_SEMENTE, help="Semente dos sorteios")
+    parser.add_argument("--taxa", type=float, default=PERFIL_TAXA, help="Taxa média em msgs/s virtuais (0 = do perfil)")
+    parser.add_argument("--registros", type=int, default=0, help="Quantidade de mensagens (0 = sem limite)")
+    parser.add_argument("--duracao", type=float, default=0, help="Segundos virtuais a gerar (0 = sem limite)")
+    parser.add_argument("--velocidade", type=float, default=PERFIL_VELOCIDADE,
+                        help="Segundos virtuais por segundo real (0 = máxima)")
+    parser.add_argument("--resumo", action="store_true",
+                        help="Não envia ao Kafka: gera --registros mensagens e imprime o sha256 do fluxo")
+    args = parser.parse_args()
+
+    configurar_logs()
+    gerador = GeradorPerfil(obter_perfil(args.perfil, args.taxa), args.semente)
+    if args.resumo:
+        for chave, valor in resumo_fluxo(gerador, args.registros or 100000).items():
+            print(f"{chave}: {valor}")
+        return
+
+    metricas.iniciar_servidor()
+    produtor = data_generator.criar_produtor(alta_vazao=True)
+    try:
+        executar_perfil(produtor, gerador, args.registros, args.duracao, args.velocidade)
+    except KeyboardInterrupt:
+        logger.info("Interrompido pelo usuário. Finalizando...")
+
+if __name__ == "__main__":
+    main()
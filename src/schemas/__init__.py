@@ -0,0 +1 @@
+"""Esquemas e serialização dos registros de vendas compartilhados por produtores e consumidores."""
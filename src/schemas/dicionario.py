@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dicionário versionado das dimensões de baixa cardinalidade da venda.
+
+Cada dimensão (produto, categoria, forma_pagamento, loja, cidade, estado)
+tem uma lista de valores; o código de um valor é a sua posição na lista.
+O dicionário é derivado das tabelas de dominios.py e gravado em
+dicionario_dimensoes.json, que é compartilhado por produtores e consumidores
+como vendas_schema.json.
+
+Os códigos só crescem: valores novos entram no fim da lista e incrementam a
+versão, valores existentes nunca mudam de código. Assim um consumidor decodifica
+qualquer mensagem codificada com uma versão menor ou igual à sua; mensagens
+de versão maior indicam que o dicionário local precisa ser atualizado.
+
+Uso:
+    cd src && python -m schemas.dicionario  # acrescenta valores novos dos domínios e regrava o dicionário
+"""
+
+import os
+import json
+import functools
+from typing import NamedTuple
+
+from .dominios import valores_dimensoes
+from .vendas import CAMPOS, TIPOS_PYTHON, Venda, carregar_definicao
+
+CAMINHO_DICIONARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dicionario_dimensoes.json')
+
+class Dicionario:
+    """
+    Valores e códigos de cada dimensão em uma versão do dicionário.
+
+    Args:
+        versao (int): Versão do dicionário
+        dimensoes (dict): {campo: [valores]}, código = posição na lista
+    """
+
+    def __init__(self, versao, dimensoes):
+        self.versao = versao
+        self.dimensoes = {campo: list(valores) for campo, valores in dimensoes.items()}
+        self.codigos = {campo: {valor: codigo for codigo, valor in enumerate(valores)}
+                        for campo, valores in self.dimensoes.items()}
+
+    def codificar(self, campo, valor):
+        """Código do valor na dimensão, ou None se o valor não está no dicionário"""
+        return self.codigos[campo].get(valor)
+
+    def expandir(self, campo, codigo):
+        """Valor correspondente ao código (IndexError se o código não existe nesta versão)"""
+        return self.dimensoes[campo][codigo]
+
+    def acrescentar(self, dimensoes):
+        """
+        Nova versão com os valores ainda ausentes acrescentados ao fim de cada dimensão.
+
+        Returns:
+            Dicionario: self se nada mudou, senão o dicionário da versão seguinte
+        """
+        novas = {campo: list(valores) for campo, valores in self.dimensoes.items()}
+        mudou = False
+        for campo, valores in dimensoes.items():
+            atuais = novas.setdefault(campo, [])
+            conhecidos = set(atuais)
+            for valor in valores:
+                if valor not in conhecidos:
+                    atuais.append(valor)
+                    conhecidos.add(valor)
+                    mudou = True
+        return Dicionario(self.versao + 1, novas) if mudou else self
+
+    def para_dict(self):
+        return {"versao": self.versao, "dimensoes": self.dimensoes}
+
+@functools.lru_cache(maxsize=None)
+def carregar_dicionario(caminho=CAMINHO_DICIONARIO):
+    """Lê o dicionário uma única vez por processo"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        conteudo = json.load(f)
+    return Dicionario(conteudo["versao"], conteudo["dimensoes"])
+
+def gravar_dicionario(dicionario, caminho=CAMINHO_DICIONARIO):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dicionario.para_dict(), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def atualizar_dicionario(caminho=CAMINHO_DICIONARIO):
+    """
+    Acrescenta ao dicionário gravado os valores novos dos domínios.
+
+    Returns:
+        Dicionario: Dicionário gravado (versão incrementada só se houve valores novos)
+    """
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            conteudo = json.load(f)
+        atual = Dicionario(conteudo["versao"], conteudo["dimensoes"])
+    else:
+        atual = Dicionario(0, {})
+    novo = atual.acrescentar(valores_dimensoes())
+    if novo is not atual:
+        gravar_dicionario(novo, caminho)
+    return novo
+
+# Venda com as dimensões do dicionário como códigos (int); valores fora do dicionário ficam como str
+VendaCodificada = NamedTuple("VendaCodificada", [(campo["name"], TIPOS_PYTHON[campo["type"]])
+                                                 for campo in carregar_definicao()["fields"]])
+VendaCodificada.__doc__ = "Venda com as dimensões do dicionário representadas pelos seus códigos"
+
+def expandir_venda(venda, dicionario=None):
+    """
+    Converte uma VendaCodificada em Venda, expandindo os códigos das dimensões.
+
+    Args:
+        venda (VendaCodificada): Venda com códigos
+        dicionario (Dicionario): Padrão: carregar_dicionario()
+    """
+    dicionario = dicionario or carregar_dicionario()
+    valores = list(venda)
+    for i, campo in enumerate(CAMPOS):
+        if campo in dicionario.dimensoes and isinstance(valores[i], int):
+            valores[i] = dicionario.dimensoes[campo][valores[i]]
+    return Venda._make(valores)
+
+if __name__ == "__main__":
+    dicionario = atualizar_dicionario()
+    print(f"Dicionário v{dicionario.versao} gravado em {CAMINHO_DICIONARIO}: "
+          + ", ".join(f"{campo} ({len(valores)})" for campo, valores in dicionario.dimensoes.items()))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Domínios das dimensões de venda: categorias, produtos, preços, formas de
+pagamento, estados, cidades e lojas.
+
+Usados pelo gerador de dados (data_generator.py reexporta estas tabelas) e
+pelo dicionário de codificação das dimensões (dicionario.py).
+"""
+
+CATEGORIAS_PRODUTOS = [
+    "Eletrônicos", "Roupas", "Alimentos", "Livros", "Móveis",
+    "Esportes", "Beleza", "Brinquedos", "Ferramentas", "Jóias"
+]
+
+PRODUTOS = {
+    "Eletrônicos": ["Smartphone", "Notebook", "Tablet", "Smart TV", "Fones de Ouvido"],
+    "Roupas": ["Camisa", "Calça", "Vestido", "Casaco", "Tênis"],
+    "Alimentos": ["Café", "Chocolate", "Pão", "Arroz", "Feijão"],
+    "Livros": ["Romance", "Técnico", "Biografia", "Ficção", "Auto-ajuda"],
+    "Móveis": ["Sofá", "Mesa", "Cadeira", "Armário", "Cama"],
+    "Esportes": ["Bola", "Raquete", "Tênis Esportivo", "Luvas", "Bicicleta"],
+    "Beleza": ["Perfume", "Shampoo", "Maquiagem", "Creme", "Batom"],
+    "Brinquedos": ["Boneca", "Carrinho", "Jogo de Tabuleiro", "Quebra-cabeça", "Pelúcia"],
+    "Ferramentas": ["Martelo", "Furadeira", "Alicate", "Serra", "Chave de Fenda"],
+    "Jóias": ["Anel", "Colar", "Brinco", "Pulseira", "Relógio"]
+}
+
+PRECOS = {
+    "Eletrônicos": (500, 5000),
+    "Roupas": (50, 500),
+    "Alimentos": (5, 100),
+    "Livros": (30, 200),
+    "Móveis": (300, 3000),
+    "Esportes": (50, 1000),
+    "Beleza": (20, 300),
+    "Brinquedos": (30, 500),
+    "Ferramentas": (40, 800),
+    "Jóias": (100, 5000)
+}
+
+FORMAS_PAGAMENTO = ["Crédito", "Débito", "Dinheiro", "PIX", "Boleto"]
+
+ESTADOS_LOJAS = {
+    "SP": ["São Paulo", "Campinas", "Santos", "Guarulhos"],
+    "RJ": ["Rio de Janeiro", "Niterói", "Petrópolis"],
+    "MG": ["Belo Horizonte", "Contagem", "Juiz de Fora"],
+    "RS": ["Porto Alegre", "Caxias do Sul", "Pelotas"],
+    "PR": ["Curitiba", "Londrina", "Maringá"]
+}
+
+# Dimensões derivadas: categoria de cada produto e estado de cada cidade
+CATEGORIA_DO_PRODUTO = {produto: categoria for categoria in CATEGORIAS_PRODUTOS
+                        for produto in PRODUTOS[categoria]}
+ESTADO_DA_CIDADE = {cidade: estado for estado, cidades in ESTADOS_LOJAS.items() for cidade in cidades}
+
+LOJAS_POR_CIDADE = 10  # Lojas "<cidade>-1" a "<cidade>-10"
+
+def nome_loja(cidade, numero):
+    return f"{cidade}-{numero}"
+
+def valores_dimensoes():
+    """
+    Valores possíveis de cada dimensão, em ordem determinística.
+
+    Returns:
+        dict: {campo: [valores]} para produto, categoria, forma_pagamento, loja, cidade e estado
+    """
+    cidades = [cidade for cidades in ESTADOS_LOJAS.values() for cidade in cidades]
+    return {
+        "produto": list(dict.fromkeys(p for c in CATEGORIAS_PRODUTOS for p in PRODUTOS[c])),
+        "categoria": list(CATEGORIAS_PRODUTOS),
+        "forma_pagamento": list(FORMAS_PAGAMENTO),
+        "loja": [nome_loja(c, n) for c in cidades for n in range(1, LOJAS_POR_CIDADE + 1)],
+        "cidade": cidades,
+        "estado": list(ESTADOS_LOJAS),
+    }
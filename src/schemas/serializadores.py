@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Camada de serialização plugável para as mensagens de vendas.
+
+Produtor e consumidores obtêm o serializador pelo nome (variável de ambiente
+FORMATO_SERIALIZACAO) e usam apenas serializar/desserializar, sem depender
+do formato concreto. Cada serializador também informa o decodificador que o
+Pinot deve usar para ler o tópico.
+"""
+
+import io
+import os
+import json
+import struct
+import functools
+from json.encoder import encode_basestring_ascii
+
+import fastavro
+
+from .vendas import CAMINHO_DEFINICAO, Venda, schema_avro, carregar_definicao, venda_de_dict, venda_para_dict
+from .dicionario import VendaCodificada, carregar_dicionario
+
+# Formato usado por padrão no tópico
+FORMATO_SERIALIZACAO = os.environ.get('FORMATO_SERIALIZACAO', 'json')
+
+# Schema Avro do registro Venda (gerado da definição única em vendas_schema.json)
+CAMINHO_SCHEMA_AVRO = CAMINHO_DEFINICAO
+
+class ErroDesserializacao(ValueError):
+    """Mensagem que não pôde ser decodificada pelo serializador configurado"""
+
+@functools.lru_cache(maxsize=None)
+def carregar_schema_avro(caminho=CAMINHO_SCHEMA_AVRO):
+    """Lê e faz o parse do schema Avro uma única vez por processo"""
+    return fastavro.parse_schema(schema_avro(carregar_definicao(caminho)))
+
+def _numero_json(valor, _float=float, _int=int, _repr_float=float.__repr__, _repr_int=int.__repr__,
+                 _infinito=float('inf')):
+    """Número como json.dumps: NaN/Infinity em floats e json.dumps para o que não é int/float exato"""
+    if type(valor) is _float:
+        if valor != valor:
+            return 'NaN'
+        if valor == _infinito:
+            return 'Infinity'
+        if valor == -_infinito:
+            return '-Infinity'
+        return _repr_float(valor)
+    if type(valor) is _int:
+        return _repr_int(valor)
+    return json.dumps(valor)
+
+def compilar_codificador_json(definicao=None):
+    """
+    Compila uma função Venda -> str com a saída exata de json.dumps(dict).
+    
+    As chaves, separadores e a ordem dos campos viram literais de um único
+    template; só os valores são convertidos a cada chamada.
+    """
+    definicao = definicao or carregar_definicao()
+    conversores = {"string": "_texto", "long": "_numero", "int": "_numero", "double": "_numero",
+                   "float": "_numero", "boolean": "_booleano"}
+    partes = []
+    for i, campo in enumerate(definicao["fields"]):
+        literal = ("{" if i == 0 else ", ") + encode_basestring_ascii(campo["name"]) + ": "
+        partes.append(f"{literal!r} + {conversores[campo['type']]}(v[{i}])")
+    codigo = f"def codificar(v):\n    return {' + '.join(partes)} + '}}'\n"
+    escopo = {"_texto": encode_basestring_ascii, "_numero": _numero_json,
+              "_booleano": lambda valor: "true" if valor else "false"}
+    exec(compile(codigo, "<codificador_json_venda>", "exec"), escopo)
+    return escopo["codificar"]
+
+def _venda_de_registro(registro):
+    try:
+        return venda_de_dict(registro)
+    except (KeyError, TypeError) as e:
+        raise ErroDesserializacao(f"Registro sem o campo {e}") from e
+
+class SerializadorJSON:
+    """
+    Serializa vendas como JSON UTF-8 (formato original do tópico).
+    
+    Vendas (NamedTuple) passam pelo codificador compilado, sem montar dict;
+    a saída é idêntica à de json.dumps, inclusive o escape ASCII.
+    
+    Não há escrita em um bytearray reutilizado: Producer.produce() só aceita
+    bytes (bytearray e memoryview levantam TypeError), então cada mensagem
+    seria copiada de volta para bytes, e acrescentar campo a campo ao buffer
+    mediu ~7% mais lento que montar o str do template e codificá-lo uma vez.
+    """
+    
+    nome = 'json'
+    codifica_dimensoes = False
+    
+    def __init__(self):
+        self._codificar = compilar_codificador_json()
+    
+    def serializar(self, registro):
+        """Serializa um dict ou uma Venda"""
+        if isinstance(registro, Venda):
+            return self._codificar(registro).encode('ascii')
+        return json.dumps(registro).encode('utf-8')
+    
+    def desserializar(self, dados):
+        try:
+            return json.loads(dados)
+        except ValueError as e:
+            raise ErroDesserializacao(str(e)) from e
+    
+    def desserializar_venda(self, dados):
+        """Desserializa diretamente em Venda (ErroDesserializacao se faltar algum campo)"""
+        return _venda_de_registro(self.desserializar(dados))
+    
+    def config_decodificador_pinot(self):
+        """Propriedades de streamConfigs para o Pinot ler este formato"""
+        return {
+            "stream.kafka.decoder.class.name": "org.apache.pinot.plugin.stream.kafka.KafkaJSONMessageDecoder"
+        }
+
+class SerializadorAvro:
+    """
+    Serializa vendas em Avro binário sem schema embutido (schemaless).
+    
+    Produtor e consumidores compartilham o schema de vendas_schema.json, então cada
+    mensagem carrega apenas os valores dos campos.
+    """
+    
+    nome = 'avro'
+    codifica_dimensoes = False
+    
+    def __init__(self, schema=None):
+        self.schema = schema if schema is not None else carregar_schema_avro()
+        self._buffer = io.BytesIO()
+    
+    def serializar(self, registro):
+        """Serializa um dict ou uma Venda"""
+        if isinstance(registro, Venda):
+            registro = venda_para_dict(registro)
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        fastavro.schemaless_writer(buffer, self.schema, registro)
+        return buffer.getvalue()
+    
+    def desserializar(self, dados):
+        try:
+            return fastavro.schemaless_reader(io.BytesIO(dados), self.schema)
+        except Exception as e:
+            raise ErroDesserializacao(str(e)) from e
+    
+    def desserializar_venda(self, dados):
+        """Desserializa diretamente em Venda"""
+        return _venda_de_registro(self.desserializar(dados))
+    
+    def config_decodificador_pinot(self):
+        """Propriedades de streamConfigs para o Pinot ler este formato"""
+        schema = json.dumps(schema_avro())
+        return {
+            "stream.kafka.decoder.class.name": "org.apache.pinot.plugin.inputformat.avro.SimpleAvroMessageDecoder",
+            "stream.kafka.decoder.prop.schema": schema
+        }
+
+class SerializadorCompacto:
+    """
+    Formato binário compacto com as dimensões codificadas pelo dicionário.
+
+    Cada mensagem começa com uma struct fixa: byte mágico, versão do
+    dicionário, os campos numéricos, um código de 1 byte por dimensão do
+    dicionário, os flags de UUID e o tamanho (u16) de cada texto restante.
+    Em seguida vêm os textos em UTF-8; UUIDs canônicos (id_venda, id_cliente)
+    ocupam 16 bytes. Valores fora do dicionário usam o código de escape 255 e
+    seguem por extenso no fim da mensagem, então o formato aceita qualquer venda.
+
+    Como no JSON, codificação e decodificação são compiladas a partir da
+    definição da venda. desserializar_codificada() devolve VendaCodificada,
+    com os códigos das dimensões, para agregações que não precisam dos textos.
+    O Pinot não tem decodificador para este formato: o tópico lido pelo Pinot
+    deve usar json ou avro.
+    """
+
+    nome = 'compacto'
+    codifica_dimensoes = True
+
+    MAGICO = 0xC5
+    ESCAPE = 255
+    CAMPOS_UUID = ('id_venda', 'id_cliente')
+    FORMATOS_NUMERO = {"long": "q", "int": "i", "double": "d", "float": "d", "boolean": "?"}
+
+    def __init__(self, dicionario=None, definicao=None):
+        self.dicionario = dicionario or carregar_dicionario()
+        campos = (definicao or carregar_definicao())["fields"]
+        numeros = [i for i, c in enumerate(campos) if c["type"] in self.FORMATOS_NUMERO]
+        self._dimensoes = [(i, c["name"]) for i, c in enumerate(campos)
+                           if c["type"] == "string" and c["name"] in self.dicionario.dimensoes]
+        textos = [i for i, c in enumerate(campos) if c["type"] == "string" and i not in dict(self._dimensoes)]
+        uuids = [i for i in textos if campos[i]["name"] in self.CAMPOS_UUID]
+        self._fixo = struct.Struct("<BH" + "".join(self.FORMATOS_NUMERO[campos[i]["type"]] for i in numeros)
+                                   + "B" * len(self._dimensoes) + "B" + "H" * len(textos))
+        self._valores = [self.dicionario.dimensoes[nome] for _, nome in self._dimensoes]
+        escopo = {
+            "_pack": self._fixo.pack, "_unpack": self._fixo.unpack_from, "_fixo": self._fixo.size,
+            "_uuid_em_bytes": _uuid_em_bytes, "_uuid_de_bytes": _uuid_de_bytes,
+            "_escapes": self._escapes, "_ler_escapes": self._ler_escapes, "_verificar": self._verificar,
+            "_falha": self._falha, "_ErroDesserializacao": ErroDesserializacao, "_struct_error": struct.error,
+            "_Venda": Venda._make, "_VendaCodificada": VendaCodificada._make,
+            "_MAGICO": self.MAGICO, "_VERSAO": self.dicionario.versao,
+        }
+        for k, (_, nome) in enumerate(self._dimensoes):
+            # Códigos limitados a 1 byte; valores além do 255º seguem por extenso
+            escopo[f"_t{k}"] = {v: c for v, c in self.dicionario.codigos[nome].items() if c < self.ESCAPE}
+            escopo[f"_v{k}"] = self._valores[k]
+        exec(compile(self._gerar_codigo(len(campos), numeros, textos, uuids), "<serializador_compacto>", "exec"),
+             escopo)
+        self.serializar_venda = escopo["serializar"]
+        self.desserializar_venda = escopo["desserializar_venda"]
+        self.desserializar_codificada = escopo["desserializar_codificada"]
+
+    def _gerar_codigo(self, num_campos, numeros, textos, uuids):
+        codigos = ", ".join(f"c{k}" for k in range(len(self._dimensoes))) + ","
+        linhas = ["def serializar(v):"]
+        for k, (i, _) in enumerate(self._dimensoes):
+            linhas.append(f"    c{k} = _t{k}.get(v[{i}], {self.ESCAPE})")
+        flags = ["0"]
+        for bit, i in enumerate(textos):
+            if i in uuids:
+                linhas.append(f"    b{i} = _uuid_em_bytes(v[{i}])")
+                linhas.append(f"    if b{i} is None: b{i} = v[{i}].encode('utf-8')")
+                linhas.append(f"    else: f{i} = {1 << bit}")
+                linhas.insert(1, f"    f{i} = 0")
+                flags.append(f"f{i}")
+            else:
+                linhas.append(f"    b{i} = v[{i}].encode('utf-8')")
+        argumentos = (["_MAGICO", "_VERSAO"] + [f"v[{i}]" for i in numeros] + [codigos.rstrip(",")]
+                      + [" | ".join(flags)] + [f"len(b{i})" for i in textos])
+        linhas.append(f"    dados = _pack({', '.join(argumentos)})" + "".join(f" + b{i}" for i in textos))
+        linhas.append(f"    if {self.ESCAPE} in ({codigos}): dados += _escapes(v)")
+        linhas.append("    return dados")
+
+        campos_fixo = ", ".join(["magico", "versao"] + [f"x{i}" for i in numeros] + [codigos.rstrip(",")]
+                                + ["flags"] + [f"l{i}" for i in textos])
+        for nome, expandir in (("desserializar_venda", True), ("desserializar_codificada", False)):
+            corpo = [f"{campos_fixo}, = _unpack(d)",
+                     "fim = _fixo" + "".join(f" + l{i}" for i in textos),
+                     "if magico != _MAGICO or versao > _VERSAO or fim > len(d): _verificar(d, fim)",
+                     "p = _fixo"]
+            for bit, i in enumerate(textos):
+                corpo.append(f"e = p + l{i}")
+                if i in uuids:
+                    corpo.append(f"x{i} = _uuid_de_bytes(d[p:e]) if flags & {1 << bit} else str(d[p:e], 'utf-8')")
+                else:
+                    corpo.append(f"x{i} = str(d[p:e], 'utf-8')")
+                corpo.append("p = e")
+            corpo.append(f"if {self.ESCAPE} in ({codigos}): {codigos} = _ler_escapes(d, fim, ({codigos}), {expandir})")
+            if expandir:
+                corpo.append("else:")
+                corpo.extend(f"    c{k} = _v{k}[c{k}]" for k in range(len(self._dimensoes)))
+            else:
+                limites = " or ".join(f"c{k} >= {len(v)}" for k, v in enumerate(self._valores))
+                corpo.append(f"elif {limites}: raise IndexError('código fora do dicionário')")
+            posicoes = {i: k for k, (i, _) in enumerate(self._dimensoes)}
+            valores = ", ".join(f"c{posicoes[i]}" if i in posicoes else f"x{i}" for i in range(num_campos))
+            corpo.append(f"return {'_Venda' if expandir else '_VendaCodificada'}(({valores},))")
+            linhas.append(f"def {nome}(d):")
+            linhas.append("    try:")
+            linhas.extend("        " + linha for linha in corpo)
+            linhas.append("    except _ErroDesserializacao:")
+            linhas.append("        raise")
+            linhas.append("    except (ValueError, IndexError, TypeError, _struct_error) as e:")
+            linhas.append("        _falha(d, e)")
+        return "\n".join(linhas) + "\n"
+
+    def _escapes(self, venda):
+        """Valores por extenso das dimensões fora do dicionário (tamanho u16 + UTF-8)"""
+        partes = []
+        for i, nome in self._dimensoes:
+            codigo = self.dicionario.codificar(nome, venda[i])
+            if codigo is None or codigo >= self.ESCAPE:
+                dados = venda[i].encode('utf-8')
+                partes.append(struct.pack("<H", len(dados)) + dados)
+        return b"".join(partes)
+
+    def _ler_escapes(self, dados, posicao, codigos, expandir):
+        """Códigos (ou valores, com expandir) das dimensões, lendo os escapes a partir de posicao"""
+        resultado = []
+        for codigo, valores in zip(codigos, self._valores):
+            if codigo == self.ESCAPE:
+                tamanho, = struct.unpack_from("<H", dados, posicao)
+                posicao += 2
+                if posicao + tamanho > len(dados):
+                    raise ValueError("valor por extenso além do fim da mensagem")
+                resultado.append(str(dados[posicao:posicao + tamanho], 'utf-8'))
+                posicao += tamanho
+            elif codigo >= len(valores):
+                raise IndexError("código fora do dicionário")
+            else:
+                resultado.append(valores[codigo] if expandir else codigo)
+        return resultado
+
+    def _falha(self, dados, erro):
+        raise ErroDesserializacao(f"Mensagem compacta inválida (dicionário v{self.dicionario.versao}): {erro}") from erro
+
+    def _verificar(self, dados, fim):
+        """Levanta ErroDesserializacao para cabeçalho inválido ou mensagem truncada"""
+        magico, versao = dados[0], int.from_bytes(dados[1:3], 'little')
+        if magico != self.MAGICO:
+            raise ErroDesserializacao(f"Byte mágico inválido: {magico:#x}")
+        if versao > self.dicionario.versao:
+            raise ErroDesserializacao(f"Mensagem codificada com o dicionário v{versao}, mais novo que o local "
+                                      f"v{self.dicionario.versao}: atualize dicionario_dimensoes.json")
+        raise ErroDesserializacao(f"Mensagem compacta truncada: {fim} bytes esperados, {len(dados)} recebidos")
+
+    def serializar(self, registro):
+        """Serializa um dict ou uma Venda"""
+        if not isinstance(registro, tuple):
+            registro = venda_de_dict(registro)
+        return self.serializar_venda(registro)
+
+    def desserializar(self, dados):
+        return venda_para_dict(self.desserializar_venda(dados))
+
+    def config_decodificador_pinot(self):
+        raise ValueError("O Pinot não decodifica o formato compacto; use json ou avro no tópico lido pelo Pinot "
+                         "(PINOT_FORMATO_MENSAGENS)")
+
+def _uuid_em_bytes(valor):
+    """16 bytes do UUID se valor estiver na forma canônica (minúsculas, com hífens), senão None"""
+    if len(valor) != 36 or valor[8] != '-' or valor[13] != '-' or valor[18] != '-' or valor[23] != '-':
+        return None
+    try:
+        dados = bytes.fromhex(valor.replace('-', ''))
+    except ValueError:
+        return None
+    if len(dados) != 16 or valor != valor.lower():
+        return None
+    return dados
+
+def _uuid_de_bytes(dados):
+    if len(dados) != 16:
+        raise ValueError("UUID truncado")
+    h = dados.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+# Serializadores disponíveis por nome
+SERIALIZADORES = {
+    SerializadorJSON.nome: SerializadorJSON,
+    SerializadorAvro.nome: SerializadorAvro,
+    SerializadorCompacto.nome: SerializadorCompacto,
+}
+
+_instancias = {}
+
+def obter_serializador(nome=None):
+    """
+    Retorna a instância (única por processo) do serializador pedido.
+    
+    Args:
+        nome (str): Nome do formato ('json', 'avro' ou 'compacto'); padrão FORMATO_SERIALIZACAO
+    """
+    nome = nome or FORMATO_SERIALIZACAO
+    if nome not in _instancias:
+        if nome not in SERIALIZADORES:
+            raise ValueError(f"Formato de serialização desconhecido: {nome}. "
+                             f"Disponíveis: {', '.join(SERIALIZADORES)}")
+        _instancias[nome] = SERIALIZADORES[nome]()
+    return _instancias[nome]
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Validação das vendas compilada a partir de vendas_schema.json.
+
+O tipo Avro de cada campo e as regras do atributo "validacao" viram uma
+única expressão booleana em uma função gerada com exec, como o codificador
+JSON de serializadores.py: o caminho comum (venda válida) é um encadeamento
+de comparações sobre os campos desempacotados, sem exceções, dicts ou
+chamadas por campo. Só quando a expressão falha uma segunda função gerada
+testa as regras uma a uma para dizer o motivo.
+
+Regras (atributo "validacao" de cada campo):
+    {"positivo": true}                        valor > 0
+    {"minimo": N}                             valor >= N
+    {"dominio": "categoria"}                  valor entre os de dominios.valores_dimensoes()[nome]
+    {"produto_de": ["preco", "quantidade"]}   |valor - preco * quantidade| <= tolerancia
+
+Motivos retornados: 'tipo:<campo>', 'positivo:<campo>', 'minimo:<campo>',
+'dominio:<campo>' e 'produto_de:<campo>'.
+"""
+
+import os
+
+from .dominios import valores_dimensoes
+from .vendas import carregar_definicao
+
+# Diferença máxima aceita em regras produto_de (ex.: valor_total x preco * quantidade)
+TOLERANCIA_VALOR = float(os.environ.get('TOLERANCIA_VALOR', '0.01'))
+
+# Tipos Avro -> condição sobre o valor (exata: bool não passa como int)
+CONDICOES_TIPO = {
+    "string": "type({v}) is str",
+    "long": "type({v}) is int",
+    "int": "type({v}) is int",
+    "double": "(type({v}) is float or type({v}) is int)",  # JSON não distingue 100 de 100.0
+    "float": "(type({v}) is float or type({v}) is int)",
+    "boolean": "type({v}) is bool",
+}
+
+def _condicoes(definicao, dicionario, escopo):
+    """Lista de (motivo, condição) na ordem da definição; tipos antes das regras de cada campo"""
+    nomes = [campo["name"] for campo in definicao["fields"]]
+    variavel = {nome: f"c{i}" for i, nome in enumerate(nomes)}
+    dominios = None
+    condicoes = []
+    for campo in definicao["fields"]:
+        nome, v = campo["name"], variavel[campo["name"]]
+        regras = campo.get("validacao", {})
+        codificado = dicionario is not None and nome in dicionario.dimensoes
+        if codificado:
+            # VendaCodificada: código do dicionário (int) ou o próprio texto, se escapado
+            condicoes.append((f"tipo:{nome}", f"(type({v}) is int or type({v}) is str)"))
+        else:
+            condicoes.append((f"tipo:{nome}", CONDICOES_TIPO[campo["type"]].format(v=v)))
+        if regras.get("positivo"):
+            condicoes.append((f"positivo:{nome}", f"{v} > 0"))
+        if "minimo" in regras:
+            condicoes.append((f"minimo:{nome}", f"{v} >= {regras['minimo']!r}"))
+        if "dominio" in regras:
+            dominios = dominios or valores_dimensoes()
+            valores = frozenset(dominios[regras["dominio"]])
+            escopo[f"_dominio_{nome}"] = valores
+            if codificado:
+                escopo[f"_codigos_{nome}"] = frozenset(dicionario.codificar(nome, valor) for valor in valores) - {None}
+                condicoes.append((f"dominio:{nome}",
+                                  f"({v} in _codigos_{nome} if type({v}) is int else {v} in _dominio_{nome})"))
+            else:
+                condicoes.append((f"dominio:{nome}", f"{v} in _dominio_{nome}"))
+        if "produto_de" in regras:
+            fatores = " * ".join(variavel[fator] for fator in regras["produto_de"])
+            condicoes.append((f"produto_de:{nome}", f"-_tolerancia <= {v} - {fatores} <= _tolerancia"))
+    return nomes, variavel, condicoes
+
+def compilar_validador(definicao=None, dicionario=None, tolerancia=TOLERANCIA_VALOR):
+    """
+    Compila uma função venda -> motivo da rejeição, ou None se a venda é válida.
+
+    As regras de um campo só são avaliadas depois que o tipo dos campos
+    anteriores e do próprio campo foi verificado, então produto_de deve citar
+    campos declarados antes dele.
+
+    Args:
+        definicao (dict): Definição da venda (padrão: vendas_schema.json)
+        dicionario (Dicionario): Se informado, valida VendaCodificada com as
+            dimensões deste dicionário representadas por códigos
+        tolerancia (float): Diferença máxima aceita nas regras produto_de
+    """
+    definicao = definicao or carregar_definicao()
+    escopo = {"_tolerancia": tolerancia}
+    nomes, variavel, condicoes = _condicoes(definicao, dicionario, escopo)
+    desempacotar = f"    {', '.join(variavel[nome] for nome in nomes)}, = v\n"
+    # Expressão única do caminho comum; o motivo é calculado à parte só para as inválidas
+    codigo = ("def validar(v):\n"
+              "    try:\n"
+              f"    {desempacotar}"
+              "    except (TypeError, ValueError):\n"
+              "        return 'campos'\n"
+              f"    if {' and '.join(condicao for _, condicao in condicoes)}:\n"
+              "        return None\n"
+              "    return _motivo(" + ", ".join(variavel[nome] for nome in nomes) + ")\n")
+    codigo += f"def _motivo({', '.join(variavel[nome] for nome in nomes)}):\n"
+    for motivo, condicao in condicoes:
+        codigo += f"    if not ({condicao}):\n        return {motivo!r}\n"
+    codigo += "    return None\n"
+    exec(compile(codigo, "<validador_venda>", "exec"), escopo)
+    return escopo["validar"]
+
+def separar_invalidas(registros, validar):
+    """
+    Valida um lote inteiro.
+
+    Returns:
+        tuple: (registros válidos, [(índice no lote, motivo)] dos inválidos);
+            sem inválidos, a própria lista recebida é retornada
+    """
+    motivos = list(map(validar, registros))
+    if motivos.count(None) == len(motivos):
+        return registros, []
+    validos = []
+    invalidos = []
+    for i, (registro, motivo) in enumerate(zip(registros, motivos)):
+        if motivo is None:
+            validos.append(registro)
+        else:
+            invalidos.append((i, motivo))
+    return validos, invalidos
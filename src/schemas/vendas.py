@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Definição única do registro de venda.
+
+vendas_schema.json é a única fonte dos campos: cada campo tem o tipo Avro e,
+no atributo "pinot", o papel no schema do Pinot (dimensao, metrica ou tempo);
+o atributo opcional "validacao" traz as regras compiladas por validacao.py.
+Deste módulo saem o schema Avro, o schema do Pinot (usado por
+criar_schema_pinot() e gravado em config/pinot_schema.json) e o registro
+Venda, uma NamedTuple com os campos na ordem do schema.
+
+Uso:
+    python src/schemas/vendas.py  # regrava config/pinot_schema.json a partir da definição
+"""
+
+import os
+import json
+import functools
+from operator import itemgetter
+from typing import NamedTuple
+
+CAMINHO_DEFINICAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vendas_schema.json')
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CAMINHO_SCHEMA_PINOT = os.path.join(RAIZ_PROJETO, 'config', 'pinot_schema.json')
+
+# Tipos Avro -> tipos do Pinot e do Python
+TIPOS_PINOT = {"string": "STRING", "long": "LONG", "int": "INT", "double": "DOUBLE", "float": "FLOAT", "boolean": "BOOLEAN"}
+TIPOS_PYTHON = {"string": str, "long": int, "int": int, "double": float, "float": float, "boolean": bool}
+
+# Atributos da definição que não fazem parte do schema Avro
+ATRIBUTOS_EXTRAS = ("pinot", "validacao")
+
+# Papel no schema do Pinot -> seção do schema
+SECOES_PINOT = {"dimensao": "dimensionFieldSpecs", "metrica": "metricFieldSpecs", "tempo": "dateTimeFieldSpecs"}
+
+@functools.lru_cache(maxsize=None)
+def carregar_definicao(caminho=CAMINHO_DEFINICAO):
+    """Lê a definição da venda uma única vez por processo"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def schema_avro(definicao=None):
+    """Schema Avro (dict) da venda, sem os atributos do Pinot e de validação"""
+    definicao = definicao or carregar_definicao()
+    schema = {chave: valor for chave, valor in definicao.items() if chave != "fields"}
+    schema["fields"] = [{chave: valor for chave, valor in campo.items() if chave not in ATRIBUTOS_EXTRAS}
+                        for campo in definicao["fields"]]
+    return schema
+
+def schema_pinot(nome='vendas', definicao=None):
+    """Schema do Pinot da venda, com os campos na ordem da definição"""
+    definicao = definicao or carregar_definicao()
+    schema = {"schemaName": nome}
+    for secao in SECOES_PINOT.values():
+        schema[secao] = []
+    for campo in definicao["fields"]:
+        pinot = campo["pinot"]
+        spec = {"name": campo["name"], "dataType": TIPOS_PINOT[campo["type"]]}
+        spec.update({chave: valor for chave, valor in pinot.items() if chave != "papel"})
+        schema[SECOES_PINOT[pinot["papel"]]].append(spec)
+    return schema
+
+def _criar_registro(definicao):
+    return NamedTuple(definicao["name"], [(campo["name"], TIPOS_PYTHON[campo["type"]])
+                                          for campo in definicao["fields"]])
+
+# Campos na ordem do schema e registro tipado correspondente
+CAMPOS = tuple(campo["name"] for campo in carregar_definicao()["fields"])
+Venda = _criar_registro(carregar_definicao())
+Venda.__doc__ = "Registro de venda com os campos de vendas_schema.json, na mesma ordem"
+
+# Conversões pré-montadas entre dict e Venda
+_valores_de_dict = itemgetter(*CAMPOS)
+_criar_venda = Venda._make
+
+def venda_de_dict(registro):
+    """Converte um dict com todos os campos em Venda (KeyError se faltar algum)"""
+    return _criar_venda(_valores_de_dict(registro))
+
+def venda_para_dict(venda):
+    """Converte uma Venda em dict na ordem dos campos do schema"""
+    return dict(zip(CAMPOS, venda))
+
+def vendas_de_colunas(colunas):
+    """Converte colunas (sequências na ordem de CAMPOS) em uma lista de Venda"""
+    return list(map(_criar_venda, zip(*colunas)))
+
+def gravar_schema_pinot(caminho=CAMINHO_SCHEMA_PINOT, nome='vendas'):
+    """Regrava o schema do Pinot em disco a partir da definição"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(schema_pinot(nome), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+if __name__ == "__main__":
+    gravar_schema_pinot()
+    print(f"Schema do Pinot gravado em {CAMINHO_SCHEMA_PINOT}")